@@ -0,0 +1,684 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python 작업 처리 서버의 asyncio 모드 (aiohttp.web)
+
+python_server.py와 같은 HTTP API를 제공하되, 모든 작업이 하나의 이벤트 루프에서
+태스크로 실행된다. 메뉴 스크래핑은 공유 NaverMenuScraper(공유 aiohttp 세션, DB 풀,
+파싱 실행기)로 프로세스 안에서, 가입 후처리 스크립트는 비동기 서브프로세스로 실행하므로
+동시 요청이 늘어도 스레드 수와 요청당 부담이 일정하다.
+
+실행: python async_server.py [--host 0.0.0.0] [--port 8000]
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+from aiohttp import web
+
+from naver_menu_scraper import NaverMenuScraper, asyncpg, scrape_output
+from server_metrics import ServerMetrics, refresh_gauges, task_gauges
+from server_common import (
+    SCRAPE_DB_CONFIG, MENU_STATS_CACHE_TTL, TASK_TYPE_LIMITS, TASK_TRANSITIONS,
+    RUN_SCRIPT_TIMEOUT, SCRAPE_MENU_TIMEOUT, SCRAPE_FRESHNESS_SEC, TASK_PRIORITIES, MenuStatsCache,
+    ScrapeCoalescer, build_script_result, create_refresh_scheduler, create_task_store, format_sse,
+    TaskRejected, new_task_id, parse_priority, parse_store_ids, stats_etag
+)
+from refresh_scheduler import (
+    REFRESH_CANDIDATES_SQL, REFRESH_CANDIDATES_WITHOUT_FETCH_STATE_SQL, FETCH_STATE_EXISTS_SQL
+)
+
+# 로깅 설정 (스크래퍼 모듈의 기본 설정을 대체해 서버 로그로 모음)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('async_server.log'),
+        logging.StreamHandler(sys.stdout)
+    ],
+    force=True
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_PATH = os.environ.get('POST_SIGNUP_SCRIPT') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'post_signup.py')
+
+class AsyncTaskRunner:
+    """이벤트 루프 위의 작업 큐 (종류별 우선순위 큐와 동시 실행 수만큼의 소비 태스크)"""
+
+    def __init__(self, limits: Dict[str, int], handlers: Dict[str, Any], results, metrics: ServerMetrics,
+                 max_events: int = 1000):
+        self.limits = limits
+        self.handlers = handlers
+        self.results = results
+        self.server_metrics = metrics
+        self._queues = {task_type: asyncio.PriorityQueue() for task_type in limits}
+        self._running = {task_type: 0 for task_type in limits}
+        self._active = {}  # task_id → 대기/실행 중 작업 상태
+        self._consumers = []
+        self._seq = 0
+        self._enqueued = 0
+        self._events = deque(maxlen=max_events)
+        self._event_seq = 0
+        self._changed = asyncio.Condition()
+        self.stats = {
+            task_type: {'completed': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+                        'service_ms_total': 0.0, 'service_ms_max': 0.0}
+            for task_type in limits
+        }
+
+    def start(self):
+        """종류별 동시 실행 수만큼 소비 태스크 시작"""
+        for task_type, limit in self.limits.items():
+            for _ in range(limit):
+                self._consumers.append(asyncio.create_task(self._consume(task_type)))
+
+    async def stop(self):
+        """소비 태스크 종료"""
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    async def _transition(self, task: dict, status: str, **extra):
+        """작업 상태 전이 기록과 이벤트 발행 (허용되지 않은 전이는 경고 후 무시하고 False 반환)"""
+        current = self._active.get(task['task_id'], {}).get('status')
+        if status not in TASK_TRANSITIONS.get(current, ()):
+            logger.warning(f"작업 {task['task_id']}: 잘못된 상태 전이 {current} → {status}")
+            return False
+        if status == 'completed':
+            self._active.pop(task['task_id'], None)
+        else:
+            self._active[task['task_id']] = {
+                'status': status,
+                'task_type': task['type'],
+                'store_id': task['args'].get('store_id'),
+                'priority': task['priority'],
+                'enqueued_at': task['enqueued_at'],
+                'started_at': task.get('started_at')
+            }
+
+        async with self._changed:
+            self._event_seq += 1
+            self._events.append({
+                'task_id': task['task_id'],
+                'status': status,
+                'task_type': task['type'],
+                'store_id': task['args'].get('store_id'),
+                'at': datetime.now().isoformat(),
+                **extra,
+                'seq': self._event_seq
+            })
+            self._changed.notify_all()
+        return True
+
+    async def submit(self, task_type: str, task_id: str, args: dict, priority: int):
+        """작업 추가 (같은 우선순위는 먼저 들어온 순서대로, 같은 ID가 대기/실행 중이면 TaskRejected)"""
+        loop = asyncio.get_running_loop()
+        task = {
+            'task_id': task_id,
+            'type': task_type,
+            'args': args,
+            'priority': priority,
+            'enqueued_at': loop.time()
+        }
+        if not await self._transition(task, 'queued', priority=priority):
+            raise TaskRejected(f"작업 {task_id}: 이미 대기/실행 중인 작업 ID입니다.")
+        self._seq += 1
+        self._queues[task_type].put_nowait((priority, self._seq, task))
+
+    async def _consume(self, task_type: str):
+        """작업 처리 (소비 태스크)"""
+        loop = asyncio.get_running_loop()
+        queue = self._queues[task_type]
+        while True:
+            _, _, task = await queue.get()
+            task_id = task['task_id']
+            task['started_at'] = loop.time()
+            wait_ms = (task['started_at'] - task['enqueued_at']) * 1000
+            self._running[task_type] += 1
+            await self._transition(task, 'running')
+
+            logger.info(f"작업 {task_id}: 큐에서 처리 시작 ({task_type}, 대기 {wait_ms:.0f}ms)")
+
+            try:
+                result = await self.handlers[task_type](task_id, task['args'])
+            except Exception as e:
+                logger.error(f"작업 큐 처리 중 오류: {e}")
+                result = {
+                    'success': False,
+                    'task_id': task_id,
+                    'error': str(e),
+                    'completed_at': datetime.now().isoformat()
+                }
+
+            service_ms = (loop.time() - task['started_at']) * 1000
+            result['task_type'] = task_type
+            result['priority'] = task['priority']
+            result['queue_wait_ms'] = round(wait_ms, 1)
+            result['service_ms'] = round(service_ms, 1)
+
+            # 결과 저장 후 완료 이벤트 (완료 이벤트를 받은 쪽이 바로 결과를 조회할 수 있도록)
+            self.results.put(task_id, result, store_id=task['args'].get('store_id'))
+            self.server_metrics.observe_task(task_type, wait_ms, service_ms, result)
+            self._running[task_type] -= 1
+            stats = self.stats[task_type]
+            stats['completed'] += 1
+            stats['wait_ms_total'] += wait_ms
+            stats['wait_ms_max'] = max(stats['wait_ms_max'], wait_ms)
+            stats['service_ms_total'] += service_ms
+            stats['service_ms_max'] = max(stats['service_ms_max'], service_ms)
+            await self._transition(task, 'completed', success=result.get('success', False))
+            queue.task_done()
+
+            logger.info(f"작업 {task_id}: 처리 완료 (처리 {service_ms:.0f}ms)")
+
+    def qsize(self) -> int:
+        """대기 중인 작업 수"""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def state(self, task_id: str) -> dict:
+        """작업 상태 조회 (queued/running/completed, 모르는 작업이면 unknown)"""
+        state = self._active.get(task_id)
+        if state:
+            return {'task_id': task_id, **state}
+        result = self.results.get(task_id)
+        if result is not None:
+            return {'task_id': task_id, 'status': 'completed', 'result': result}
+        return {'task_id': task_id, 'status': 'unknown'}
+
+    async def wait_done(self, task_id: str, timeout: float):
+        """작업이 끝날 때까지 최대 timeout초 대기"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: task_id not in self._active),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def last_seq(self) -> int:
+        """마지막 이벤트 순번"""
+        return self._event_seq
+
+    async def events_since(self, seq: int, timeout: float) -> list:
+        """seq 이후 이벤트 (없으면 timeout까지 대기)"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self._event_seq > seq), timeout)
+            except asyncio.TimeoutError:
+                return []
+            return [event for event in self._events if event['seq'] > seq]
+
+    def metrics(self) -> dict:
+        """종류별 대기/실행 수와 평균/최대 대기·처리 시간"""
+        result = {}
+        for task_type, stats in self.stats.items():
+            completed = stats['completed']
+            result[task_type] = {
+                'queued': self._queues[task_type].qsize(),
+                'running': self._running[task_type],
+                'limit': self.limits[task_type],
+                'completed': completed,
+                'wait_ms_avg': round(stats['wait_ms_total'] / completed, 1) if completed else 0.0,
+                'wait_ms_max': round(stats['wait_ms_max'], 1),
+                'service_ms_avg': round(stats['service_ms_total'] / completed, 1) if completed else 0.0,
+                'service_ms_max': round(stats['service_ms_max'], 1)
+            }
+        return result
+
+async def run_script_task(task_id: str, args: dict) -> dict:
+    """가입 후처리 스크립트를 비동기 서브프로세스로 실행"""
+    logger.info(f"작업 {task_id}: Python 스크립트 실행 시작")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SCRIPT_PATH,
+        '--store_id', str(args['store_id']),
+        '--store_name', args['store_name'],
+        '--business_number', args['business_number'],
+        '--naver_url', args.get('naver_url', ''),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=os.path.dirname(SCRIPT_PATH)
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), RUN_SCRIPT_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.error(f"작업 {task_id}: 실행 시간 초과")
+        return {
+            'success': False,
+            'task_id': task_id,
+            'timed_out': True,
+            'error': '실행 시간 초과',
+            'completed_at': datetime.now().isoformat()
+        }
+
+    return build_script_result(task_id, process.returncode,
+                               stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace'))
+
+def make_scrape_task(app: web.Application):
+    """공유 스크래퍼로 메뉴 스크래핑을 실행하는 작업 처리기"""
+    async def scrape_task(task_id: str, args: dict) -> dict:
+        store_id, naver_store_id = args['store_id'], args['naver_store_id']
+        logger.info(f"🍽️ [메뉴 스크래핑] 시작 - 매장 {store_id}, 네이버 ID {naver_store_id}")
+        result = None
+        try:
+            scrape_result = await asyncio.wait_for(
+                app['scraper'].scrape_store(naver_store_id, store_id), SCRAPE_MENU_TIMEOUT
+            )
+            output_data = scrape_output(scrape_result)
+            logger.info(f"🍽️ [메뉴 스크래핑] 완료 - {output_data.get('menu_count', 0)}개 메뉴")
+            result = {
+                'success': True,
+                'result': output_data
+            }
+        except asyncio.TimeoutError:
+            logger.error(f"🍽️ [메뉴 스크래핑] 시간 초과")
+            result = {
+                'success': False,
+                'timed_out': True,
+                'error': '스크래핑 시간 초과'
+            }
+        finally:
+            app['menu_stats_cache'].invalidate(store_id, naver_store_id)
+            app['scrape_coalescer'].finish(store_id, naver_store_id, task_id, result)
+        return result
+    return scrape_task
+
+async def fetch_menu_stats(scraper: NaverMenuScraper, store_id: Optional[int], naver_store_id: Optional[str]) -> list:
+    """메뉴 통계 조회 (asyncpg면 루프에서, psycopg2면 스레드에서, dry-run이면 저장된 통계가 없으므로 빈 목록)"""
+    if scraper.storage == 'dry-run':
+        return []
+
+    conditions, params = [], []
+    if store_id:
+        conditions.append('store_id')
+        params.append(store_id)
+    if naver_store_id:
+        conditions.append('naver_store_id')
+        params.append(naver_store_id)
+
+    if scraper.storage == 'asyncpg':
+        where = ' AND '.join(f"{column} = ${i}" for i, column in enumerate(conditions, 1))
+        async with scraper.async_storage.connection() as conn:
+            rows = await conn.fetch(f"SELECT * FROM naver_menu_stats WHERE {where}", *params)
+        return [dict(row) for row in rows]
+
+    def query():
+        where = ' AND '.join(f"{column} = %s" for column in conditions)
+        with scraper.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT * FROM naver_menu_stats WHERE {where}", params)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            cursor.close()
+            conn.rollback()
+        return rows
+    return await asyncio.to_thread(query)
+
+async def load_refresh_candidates(scraper: NaverMenuScraper) -> list:
+    """갱신 대상 매장과 마지막 확인/변경 이후 경과 시간 조회 (asyncpg면 루프에서, psycopg2면 스레드에서, dry-run이면 없음)"""
+    if scraper.storage == 'dry-run':
+        return []
+    if scraper.storage == 'asyncpg':
+        async with scraper.async_storage.connection() as conn:
+            has_fetch_state = await conn.fetchval(FETCH_STATE_EXISTS_SQL)
+            rows = await conn.fetch(REFRESH_CANDIDATES_SQL if has_fetch_state
+                                    else REFRESH_CANDIDATES_WITHOUT_FETCH_STATE_SQL)
+        return [dict(row) for row in rows]
+
+    def query():
+        with scraper.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(FETCH_STATE_EXISTS_SQL)
+            has_fetch_state = cursor.fetchone()[0]
+            cursor.execute(REFRESH_CANDIDATES_SQL if has_fetch_state else REFRESH_CANDIDATES_WITHOUT_FETCH_STATE_SQL)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            cursor.close()
+            conn.rollback()
+        return rows
+    return await asyncio.to_thread(query)
+
+def make_refresh_submit(app: web.Application):
+    """갱신 스크래핑을 일괄(bulk) 우선순위로 큐에 추가하는 함수 (같은 가게의 진행 중/최근 작업이 있으면 합침)"""
+    async def submit(row: dict) -> str:
+        store_id, naver_store_id = row['store_id'], row['naver_store_id']
+        task_id = new_task_id('menu_refresh', store_id)
+        coalescer = app['scrape_coalescer']
+        claimed_id, coalesced = coalescer.claim(store_id, naver_store_id, task_id)
+        if coalesced == 'new':
+            try:
+                await app['runner'].submit('scrape-menu', task_id, {
+                    'store_id': store_id,
+                    'naver_store_id': naver_store_id
+                }, TASK_PRIORITIES['bulk'])
+            except Exception:
+                coalescer.forget(store_id, naver_store_id, task_id)
+                raise
+        app['server_metrics'].observe_refresh_submit(coalesced)
+        return coalesced
+    return submit
+
+def json_response(data: Any, status: int = 200, **kwargs) -> web.Response:
+    """JSON 응답 (datetime/Decimal은 문자열로)"""
+    return web.json_response(data, status=status,
+                             dumps=lambda value: json.dumps(value, ensure_ascii=False, default=str), **kwargs)
+
+routes = web.RouteTableDef()
+
+@routes.get('/health')
+async def health_check(request: web.Request) -> web.Response:
+    """헬스체크 엔드포인트"""
+    scraper = request.app['scraper']
+    return json_response({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'service': 'python-processor',
+        'mode': 'asyncio',
+        'task_queue': request.app['runner'].metrics(),
+        'task_results': request.app['task_results'].metrics(),
+        'menu_stats_cache': request.app['menu_stats_cache'].metrics(),
+        'scrape_coalescing': request.app['scrape_coalescer'].metrics(),
+        'menu_refresh': request.app['refresh_scheduler'].metrics() if request.app['refresh_scheduler'] else None,
+        'transport': scraper.transport.metrics(),
+        'db_pool': scraper.pool_metrics()
+    })
+
+@routes.get('/metrics')
+async def metrics(request: web.Request) -> web.Response:
+    """Prometheus 텍스트 형식 지표"""
+    gauges = task_gauges(request.app['runner'].metrics(), request.app['task_results'].metrics())
+    gauges.append(('scrape_inflight', 'Menu scrapes in flight after coalescing', (),
+                   {(): request.app['scrape_coalescer'].metrics()['inflight']}))
+    if request.app['refresh_scheduler']:
+        gauges.extend(refresh_gauges(request.app['refresh_scheduler'].metrics()))
+    return web.Response(text=request.app['server_metrics'].render(gauges),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+async def read_json(request: web.Request) -> Optional[dict]:
+    """요청 본문 JSON (없거나 잘못되면 None)"""
+    try:
+        data = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+@routes.post('/run-script')
+async def run_script(request: web.Request) -> web.Response:
+    """스크립트 실행 API"""
+    data = await read_json(request)
+    if not data:
+        return json_response({'error': '요청 데이터가 없습니다.'}, 400)
+
+    for field in ['store_id', 'store_name', 'business_number']:
+        if field not in data:
+            return json_response({'error': f'필수 필드가 없습니다: {field}'}, 400)
+
+    priority = parse_priority(data, 'interactive')
+    if priority is None:
+        return json_response({'error': f"잘못된 우선순위입니다: {data.get('priority')}"}, 400)
+
+    task_id = new_task_id('task', data['store_id'])
+    await request.app['runner'].submit('run-script', task_id, data, priority)
+    logger.info(f"작업 {task_id}: 큐에 추가됨")
+
+    return json_response({
+        'success': True,
+        'task_id': task_id,
+        'message': '작업이 큐에 추가되었습니다.',
+        'status': 'queued',
+        'priority': priority
+    })
+
+@routes.post('/scrape-menu')
+async def scrape_menu(request: web.Request) -> web.Response:
+    """네이버 메뉴 스크래핑 API"""
+    data = await read_json(request)
+    if not data:
+        return json_response({'error': '요청 데이터가 없습니다.'}, 400)
+
+    for field in ['store_id', 'naver_store_id']:
+        if field not in data:
+            return json_response({'error': f'필수 필드가 없습니다: {field}'}, 400)
+
+    priority = parse_priority(data, 'normal')
+    if priority is None:
+        return json_response({'error': f"잘못된 우선순위입니다: {data.get('priority')}"}, 400)
+
+    store_ids = parse_store_ids(data)
+    if store_ids is None:
+        return json_response({'error': f"잘못된 가게 ID입니다: store_id={data['store_id']!r}, "
+                                       f"naver_store_id={data['naver_store_id']!r}"}, 400)
+    store_id, naver_store_id = store_ids
+    task_id = new_task_id('menu_scrape', store_id)
+
+    # 같은 가게의 진행 중 작업이나 최근 성공 결과가 있으면 그 작업 ID 반환 (force: true면 최근 결과 무시)
+    runner, coalescer = request.app['runner'], request.app['scrape_coalescer']
+    claimed_id, coalesced = coalescer.claim(store_id, naver_store_id, task_id, allow_fresh=not data.get('force'))
+    if coalesced == 'fresh' and runner.state(claimed_id)['status'] == 'unknown':
+        # 결과가 저장소에서 밀려났으면 새로 스크래핑
+        claimed_id, coalesced = coalescer.claim(store_id, naver_store_id, task_id, allow_fresh=False)
+    if coalesced != 'new':
+        logger.info(f"🍽️ [메뉴 스크래핑] 기존 작업 재사용 ({coalesced}) - {claimed_id}")
+        return json_response({
+            'success': True,
+            'task_id': claimed_id,
+            'message': '진행 중이거나 최근 완료된 같은 가게의 스크래핑 작업을 반환합니다.',
+            'status': runner.state(claimed_id)['status'],
+            'coalesced': coalesced
+        })
+
+    try:
+        await runner.submit('scrape-menu', task_id, {
+            'store_id': store_id,
+            'naver_store_id': naver_store_id
+        }, priority)
+    except Exception:
+        coalescer.forget(store_id, naver_store_id, task_id)
+        raise
+    logger.info(f"🍽️ [메뉴 스크래핑] 작업 추가 - {task_id}")
+
+    return json_response({
+        'success': True,
+        'task_id': task_id,
+        'message': '메뉴 스크래핑이 큐에 추가되었습니다.',
+        'status': 'queued',
+        'priority': priority
+    })
+
+@routes.get('/task-status/{task_id}')
+async def get_task_status(request: web.Request) -> web.Response:
+    """작업 상태 조회 API (?wait=초 지정 시 완료될 때까지 최대 그 시간 동안 대기)"""
+    task_id = request.match_info['task_id']
+    runner = request.app['runner']
+    try:
+        wait = min(max(float(request.query.get('wait', 0)), 0), 60)
+    except ValueError:
+        return json_response({'error': 'wait는 초 단위 숫자여야 합니다.'}, 400)
+
+    state = runner.state(task_id)
+    if wait and state['status'] in ('queued', 'running'):
+        await runner.wait_done(task_id, wait)
+        state = runner.state(task_id)
+
+    if state['status'] == 'unknown':
+        return json_response({**state, 'message': '알 수 없는 작업입니다.'}, 404)
+    if state['status'] != 'completed':
+        state['queue_size'] = runner.qsize()
+    return json_response(state)
+
+@routes.get('/task-events')
+async def stream_task_events(request: web.Request) -> web.StreamResponse:
+    """작업 상태 전이 SSE 스트림 (?task_id= 지정 시 해당 작업이 완료되면 종료, Last-Event-ID로 이어 받기)"""
+    runner = request.app['runner']
+    task_id = request.query.get('task_id')
+    store_id = request.query.get('store_id')
+    try:
+        seq = int(request.headers.get('Last-Event-ID') or runner.last_seq())
+    except ValueError:
+        seq = runner.last_seq()
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    await response.prepare(request)
+
+    # 특정 작업 구독 시 현재 상태를 먼저 보냄 (이미 끝난 작업이면 바로 종료)
+    if task_id:
+        state = runner.state(task_id)
+        result = state.pop('result', None)
+        if result is not None:
+            state['success'] = result.get('success', False)
+        await response.write(format_sse({'seq': seq, **state}).encode('utf-8'))
+        if state['status'] in ('completed', 'unknown'):
+            return response
+
+    while True:
+        events = await runner.events_since(seq, timeout=15)
+        if not events:
+            # 연결 유지용 주석
+            await response.write(b': keep-alive\n\n')
+            continue
+        for event in events:
+            seq = event['seq']
+            if task_id and event['task_id'] != task_id:
+                continue
+            if store_id and str(event.get('store_id')) != store_id:
+                continue
+            await response.write(format_sse(event).encode('utf-8'))
+            if task_id and event['status'] == 'completed':
+                return response
+
+@routes.get('/tasks')
+async def list_tasks(request: web.Request) -> web.Response:
+    """완료된 작업 목록 조회 (최근 순, ?store_id=&limit=&offset= 페이지 단위)"""
+    try:
+        limit = min(max(int(request.query.get('limit', 50)), 1), 500)
+        offset = max(int(request.query.get('offset', 0)), 0)
+    except ValueError:
+        return json_response({'error': 'limit/offset은 정수여야 합니다.'}, 400)
+
+    return json_response(request.app['task_results'].list(
+        store_id=request.query.get('store_id'), limit=limit, offset=offset
+    ))
+
+@routes.post('/clear-tasks')
+async def clear_tasks(request: web.Request) -> web.Response:
+    """완료된 작업 결과 정리"""
+    count = request.app['task_results'].clear()
+    return json_response({
+        'success': True,
+        'message': f'{count}개의 작업 결과가 정리되었습니다.'
+    })
+
+@routes.get('/menu-stats')
+async def get_menu_stats(request: web.Request) -> web.Response:
+    """메뉴 통계 조회 API"""
+    try:
+        store_id = int(request.query['store_id']) if request.query.get('store_id') else None
+    except ValueError:
+        store_id = None
+    naver_store_id = request.query.get('naver_store_id')
+
+    if not store_id and not naver_store_id:
+        return json_response({'error': 'store_id 또는 naver_store_id가 필요합니다.'}, 400)
+
+    try:
+        cache = request.app['menu_stats_cache']
+        key = (store_id, naver_store_id)
+        cached = cache.get(key)
+        if cached:
+            result, etag = cached
+        else:
+            result = await fetch_menu_stats(request.app['scraper'], store_id, naver_store_id)
+            etag = stats_etag(result)
+            cache.put(key, result, etag)
+
+        # 통계가 바뀌지 않았으면 304
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+        if f'"{etag}"' in request.headers.get('If-None-Match', ''):
+            return web.Response(status=304, headers=headers)
+        return json_response({'success': True, 'stats': result}, headers=headers)
+
+    except Exception as e:
+        logger.error(f"메뉴 통계 조회 중 오류: {e}")
+        return json_response({'error': str(e)}, 500)
+
+async def on_startup(app: web.Application):
+    """공유 스크래퍼(세션/DB 풀/파싱 실행기)와 작업 소비 태스크 시작"""
+    storage = os.environ.get('SCRAPER_STORAGE', 'asyncpg' if asyncpg else 'psycopg2')
+    scraper = NaverMenuScraper(
+        SCRAPE_DB_CONFIG,
+        pool_max=int(os.environ.get('SCRAPER_DB_POOL_MAX', '5')),
+        storage=storage,
+        # 여러 매장을 한 루프에서 동시에 스크래핑하므로 파싱은 프로세스 풀에서 (기본값 inline 대신 명시)
+        parse_executor=os.environ.get('SCRAPER_PARSE_EXECUTOR', 'process')
+    )
+    app['scraper'] = await scraper.__aenter__()
+    app['runner'] = AsyncTaskRunner(TASK_TYPE_LIMITS, {
+        'run-script': run_script_task,
+        'scrape-menu': make_scrape_task(app)
+    }, app['task_results'], app['server_metrics'])
+    app['runner'].start()
+    logger.info(f"asyncio 서버 시작 (저장소: {storage})")
+
+    # 메뉴 주기 갱신 (MENU_REFRESH_ENABLED=1일 때)
+    if app['refresh_scheduler']:
+        app['refresh_task'] = asyncio.create_task(app['refresh_scheduler'].run(
+            lambda: load_refresh_candidates(app['scraper']), make_refresh_submit(app)
+        ))
+
+async def on_cleanup(app: web.Application):
+    """갱신 스케줄러, 작업 소비 태스크와 공유 스크래퍼 종료"""
+    if app.get('refresh_task'):
+        app['refresh_task'].cancel()
+    await app['runner'].stop()
+    await app['scraper'].__aexit__(None, None, None)
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    """CORS 허용 (python_server의 flask_cors와 같은 동작)"""
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+def create_app() -> web.Application:
+    """aiohttp 애플리케이션 생성"""
+    app = web.Application(middlewares=[cors_middleware])
+    app['task_results'] = create_task_store()
+    app['menu_stats_cache'] = MenuStatsCache(MENU_STATS_CACHE_TTL)
+    app['scrape_coalescer'] = ScrapeCoalescer(SCRAPE_FRESHNESS_SEC)
+    app['server_metrics'] = ServerMetrics()
+    app['refresh_scheduler'] = create_refresh_scheduler()
+    app.add_routes(routes)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='Python 작업 처리 서버 (asyncio 모드)')
+    parser.add_argument('--host', default='0.0.0.0', help='바인드 주소')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8000')), help='포트')
+    args = parser.parse_args()
+
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+네이버 메뉴 파서 오프라인 벤치마크 (fixtures/menu_pages 코퍼스 사용)
+
+사용 예:
+    python bench_menu_parser.py                      # 정확도 검사 + 전략별 측정
+    python bench_menu_parser.py --save-baseline      # 현재 결과를 기준값으로 저장
+    python bench_menu_parser.py --threshold 0.2      # 기준값 대비 20% 넘게 느려지면 실패
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import logging
+import argparse
+import tracemalloc
+from dataclasses import asdict
+from typing import Dict, List, Any, Callable
+
+import naver_menu_scraper
+from naver_menu_scraper import MenuStreamDetector, NaverMenuScraper, ParsedPage
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'menu_pages')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(FIXTURE_DIR), 'parser_bench_baseline.json')
+
+# 기대 결과(*.expected.json)를 만들 때 사용한 네이버 가게 ID
+FIXTURE_STORE_ID = '1001'
+
+# 스트리밍 수신 검사에 쓰는 청크 크기(문자 수)
+STREAM_CHUNK_SIZES = (64, 512, 16384)
+
+def load_corpus(fixture_dir: str = FIXTURE_DIR) -> List[Dict[str, Any]]:
+    """픽스처 HTML과 기대 결과 로드"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.html'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+
+        expected = None
+        expected_path = os.path.join(fixture_dir, f"{name}.expected.json")
+        if os.path.exists(expected_path):
+            with open(expected_path, encoding='utf-8') as f:
+                expected = json.load(f)
+
+        corpus.append({'name': name, 'html': html, 'expected': expected})
+    return corpus
+
+def check_corpus(scraper: NaverMenuScraper, corpus: List[Dict[str, Any]]) -> List[str]:
+    """전체 파이프라인 결과가 기대 결과와 같은지 검사 (불일치 목록 반환)"""
+    mismatches = []
+    for entry in corpus:
+        if entry['expected'] is None:
+            continue
+        menus = [asdict(menu) for menu in scraper.parse_menu_from_html(entry['html'], FIXTURE_STORE_ID)]
+        if menus != entry['expected']:
+            mismatches.append(f"{entry['name']}: 기대 {len(entry['expected'])}개, 실제 {len(menus)}개 또는 필드 불일치")
+
+        # 스트리밍 수신 시 메뉴 영역에서 멈춘 본문으로도 같은 결과여야 함 (청크 경계 위치별로 확인)
+        for chunk_chars in STREAM_CHUNK_SIZES:
+            html = stream_cut(entry['html'], chunk_chars)
+            streamed = [asdict(menu) for menu in scraper.parse_menu_from_html(html, FIXTURE_STORE_ID)]
+            if streamed != entry['expected']:
+                mismatches.append(f"{entry['name']}: 스트리밍 수신({chunk_chars}자 청크) 시 기대 "
+                                  f"{len(entry['expected'])}개, 실제 {len(streamed)}개 또는 필드 불일치")
+                break
+    return mismatches
+
+def stream_cut(html: str, chunk_chars: int) -> str:
+    """read_menu_body처럼 청크 단위로 MenuStreamDetector에 넣어 멈춘 지점까지의 본문"""
+    detector = MenuStreamDetector()
+    for start in range(0, len(html), chunk_chars):
+        cut = detector.feed(html[start:start + chunk_chars])
+        if cut is not None:
+            return detector.buffer[:cut]
+    return detector.buffer
+
+def build_large_script(target_kb: int) -> str:
+    """대용량 Apollo 상태 스크립트 생성 (target_kb 이상, 문자열 안에 '};' 포함)"""
+    state = {'ROOT_QUERY': {'__typename': 'Query'}}
+    size = 0
+    i = 0
+    while size < target_kb * 1024:
+        entry = {
+            '__typename': 'Menu',
+            'name': f'메뉴 {i}',
+            'price': f'{(i % 30 + 5) * 500:,}',
+            'description': '오늘의 추천 };' * 4,
+            'options': [{'name': f'옵션 {j}', 'price': j * 500} for j in range(5)]
+        }
+        state[f'Menu:{i}'] = entry
+        size += len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        i += 1
+    return 'window.__APOLLO_STATE__ = ' + json.dumps(state, ensure_ascii=False) + ';\nwindow.__APP__ = {"menu": 1};'
+
+def build_strategies(scraper: NaverMenuScraper, corpus: List[Dict[str, Any]],
+                     large_script_kb: int = 2048) -> Dict[str, Dict[str, Any]]:
+    """전략별 측정 함수와 대상 페이지 구성 (파싱 비용과 전략 비용을 분리)"""
+    pages = []
+    for entry in corpus:
+        page = ParsedPage(entry['html'])
+        pages.append({
+            'name': entry['name'],
+            'html': entry['html'],
+            'page': page,
+            'items': page.soup.find_all('li', class_='E2jtL'),
+            'scripts': [
+                script.string for script in page.soup.find_all('script')
+                if script.string and 'menu' in script.string.lower()
+            ]
+        })
+
+    def parse_text(entry):
+        # 공유 텍스트 캐시를 비워 텍스트 추출 비용까지 포함
+        entry['page']._text = None
+        return scraper.parse_menu_from_text(entry['page'], FIXTURE_STORE_ID)
+
+    def extract_items(entry):
+        return [scraper.extract_menu_item_mobile(item) for item in entry['items']]
+
+    def extract_json(entry):
+        return [scraper.extract_json_from_script(script) for script in entry['scripts']]
+
+    return {
+        'parse_menu_from_html': {
+            'fn': lambda entry: scraper.parse_menu_from_html(entry['html'], FIXTURE_STORE_ID),
+            'pages': pages
+        },
+        'parse_document': {
+            'fn': lambda entry: ParsedPage(entry['html']),
+            'pages': pages
+        },
+        'extract_menu_item_mobile': {
+            'fn': extract_items,
+            'pages': [entry for entry in pages if entry['items']]
+        },
+        'parse_menu_from_text': {
+            'fn': parse_text,
+            'pages': pages
+        },
+        'parse_menu_alternative': {
+            'fn': lambda entry: scraper.parse_menu_alternative(entry['page'], FIXTURE_STORE_ID),
+            'pages': pages
+        },
+        'extract_json_from_script': {
+            'fn': extract_json,
+            'pages': [entry for entry in pages if entry['scripts']]
+        },
+        'extract_json_large_script': {
+            'fn': extract_json,
+            'pages': [{'name': 'large_script', 'scripts': [build_large_script(large_script_kb)]}] if large_script_kb else []
+        }
+    }
+
+def measure(fn: Callable, pages: List[Dict[str, Any]], min_time: float) -> Dict[str, Any]:
+    """처리량(pages/sec)과 페이지당 메모리(할당 피크, 잔존량) 측정"""
+    if not pages:
+        return {'pages': 0}
+
+    # 워밍업
+    for entry in pages:
+        fn(entry)
+
+    # 처리량: 최소 min_time초 동안 코퍼스를 반복
+    processed = 0
+    started = time.perf_counter()
+    while True:
+        for entry in pages:
+            fn(entry)
+        processed += len(pages)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+
+    # 메모리: tracemalloc으로 페이지별 추가 할당 피크와 잔존량 측정
+    tracemalloc.start()
+    peak_bytes = 0
+    retained_bytes = 0
+    for entry in pages:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = fn(entry)
+        after, peak = tracemalloc.get_traced_memory()
+        peak_bytes = max(peak_bytes, peak - before)
+        retained_bytes += max(0, after - before)
+        del result
+    tracemalloc.stop()
+
+    return {
+        'pages': len(pages),
+        'iterations': processed,
+        'pages_per_sec': round(processed / elapsed, 1),
+        'ms_per_page': round(elapsed * 1000 / processed, 4),
+        'peak_alloc_kb': round(peak_bytes / 1024, 1),
+        'retained_kb_per_page': round(retained_bytes / 1024 / len(pages), 1)
+    }
+
+def compare_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                     threshold: float) -> List[str]:
+    """기준값 대비 처리량 감소/메모리 증가가 threshold를 넘는 전략 목록"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not result.get('pages'):
+            continue
+        if result['pages_per_sec'] < base['pages_per_sec'] * (1 - threshold):
+            regressions.append(
+                f"{name}: 처리량 {base['pages_per_sec']} → {result['pages_per_sec']} pages/sec"
+            )
+        if base.get('peak_alloc_kb') and result['peak_alloc_kb'] > base['peak_alloc_kb'] * (1 + threshold):
+            regressions.append(
+                f"{name}: 할당 피크 {base['peak_alloc_kb']} → {result['peak_alloc_kb']} KB"
+            )
+    return regressions
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='네이버 메뉴 파서 벤치마크')
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='픽스처 디렉토리')
+    parser.add_argument('--strategy', action='append', help='측정할 전략 (여러 번 지정 가능, 기본: 전체)')
+    parser.add_argument('--min_time', type=float, default=1.0, help='전략별 최소 측정 시간(초)')
+    parser.add_argument('--parser', help='HTML 파서 백엔드 강제 (lxml, html.parser)')
+    parser.add_argument('--large_script_kb', type=int, default=2048, help='대용량 스크립트 추출 측정 크기(KB, 0이면 생략)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='기준값 JSON 파일')
+    parser.add_argument('--save-baseline', dest='save_baseline', action='store_true', help='현재 결과를 기준값으로 저장')
+    parser.add_argument('--threshold', type=float, default=0.2, help='허용 회귀 비율 (0.2 = 20%%)')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    # 파싱 로그는 측정에 방해되므로 경고 이상만 출력
+    naver_menu_scraper.logger.setLevel(logging.WARNING)
+    if args.parser:
+        naver_menu_scraper.HTML_PARSER = args.parser
+
+    scraper = NaverMenuScraper({})
+    corpus = load_corpus(args.fixtures)
+    if not corpus:
+        print(f"픽스처가 없습니다: {args.fixtures}", file=sys.stderr)
+        sys.exit(2)
+
+    mismatches = check_corpus(scraper, corpus)
+
+    strategies = build_strategies(scraper, corpus, args.large_script_kb)
+    selected = args.strategy or list(strategies)
+    unknown = [name for name in selected if name not in strategies]
+    if unknown:
+        parser.error(f"알 수 없는 전략: {', '.join(unknown)}")
+
+    results = {}
+    for name in selected:
+        results[name] = measure(strategies[name]['fn'], strategies[name]['pages'], args.min_time)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+    regressions = compare_baseline(results, baseline, args.threshold)
+
+    report = {
+        'parser': naver_menu_scraper.HTML_PARSER,
+        'python': sys.version.split()[0],
+        'corpus': [entry['name'] for entry in corpus],
+        'mismatches': mismatches,
+        'results': results,
+        'regressions': regressions
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"파서: {report['parser']}, 코퍼스: {len(corpus)}개 페이지")
+        print(f"{'전략':<28}{'pages':>7}{'pages/sec':>12}{'ms/page':>10}{'peak KB':>10}{'retained KB':>13}")
+        for name, result in results.items():
+            if not result.get('pages'):
+                print(f"{name:<28}{0:>7}  (대상 페이지 없음)")
+                continue
+            print(
+                f"{name:<28}{result['pages']:>7}{result['pages_per_sec']:>12}{result['ms_per_page']:>10}"
+                f"{result['peak_alloc_kb']:>10}{result['retained_kb_per_page']:>13}"
+            )
+        for mismatch in mismatches:
+            print(f"❌ 결과 불일치 - {mismatch}")
+        for regression in regressions:
+            print(f"❌ 성능 회귀 - {regression}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'parser': report['parser'], 'python': report['python'], 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"기준값 저장: {args.baseline}", file=sys.stderr)
+
+    if mismatches or regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
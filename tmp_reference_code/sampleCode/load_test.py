@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python_server 종단 간 부하 테스트 (로컬 네이버 대역 서버 + dry-run 저장소)
+
+대역 서버가 fixtures/menu_pages의 메뉴 페이지를 지연/오류율/페이지 크기를 조절해 응답하고,
+작업 서버(python_server 또는 async_server)를 자식 프로세스로 띄워 스크래퍼가 대역 서버를
+보게 한 뒤 /scrape-menu, /run-script 요청을 동시에 보내 완료까지의 지연과 서버 자원을 측정한다.
+네이버와 운영 DB에는 접속하지 않는다 (SCRAPER_STORAGE=dry-run, 가입 후처리는 대역 스크립트).
+
+사용 예:
+    python load_test.py --requests 200 --concurrency 20
+    python load_test.py --server async --latency_ms 300 --error_rate 0.05 --page_kb 400
+    python load_test.py --script_ratio 0.3 --stores 20      # 같은 가게 중복 요청(합치기) 포함
+"""
+
+import os
+import sys
+import json
+import glob
+import math
+import time
+import random
+import socket
+import signal
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Any
+
+import aiohttp
+from aiohttp import web
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BASE_DIR, 'fixtures', 'menu_pages')
+SERVER_SCRIPTS = {
+    'flask': os.path.join(BASE_DIR, 'python_server.py'),
+    'async': os.path.join(BASE_DIR, 'async_server.py')
+}
+
+# 가입 후처리 대역 스크립트 (LOAD_TEST_SCRIPT_MS만큼 대기 후 JSON 출력)
+STUB_SCRIPT = '''
+import os, sys, json, time, argparse
+parser = argparse.ArgumentParser()
+for name in ('--store_id', '--store_name', '--business_number', '--naver_url'):
+    parser.add_argument(name, default='')
+args = parser.parse_args()
+time.sleep(int(os.environ.get('LOAD_TEST_SCRIPT_MS', '100')) / 1000)
+print(json.dumps({'store_id': args.store_id, 'stub': True}))
+'''
+
+def free_port() -> int:
+    """사용 가능한 로컬 포트"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """최근접 순위 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 1)
+
+def latency_summary(values: List[float]) -> Dict[str, Any]:
+    """지연 요약 (ms)"""
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': round(max(values), 1) if values else None,
+        'mean': round(sum(values) / len(values), 1) if values else None
+    }
+
+class NaverStub:
+    """네이버 메뉴 페이지 대역 서버 (지연, 오류율, 최소 페이지 크기 설정)"""
+
+    def __init__(self, fixture_dir: str, latency_ms: float, jitter_ms: float, error_rate: float,
+                 error_status: int, page_kb: int, seed: int):
+        self.pages = []
+        for path in sorted(glob.glob(os.path.join(fixture_dir, '*.html'))):
+            with open(path, encoding='utf-8') as f:
+                self.pages.append(self._pad(f.read(), page_kb * 1024))
+        if not self.pages:
+            raise ValueError(f"메뉴 페이지 픽스처가 없습니다: {fixture_dir}")
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._runner = None
+        self.port = None
+        self.counters = {'requests': 0, 'errors_injected': 0, 'bytes_sent': 0}
+
+    @staticmethod
+    def _pad(html: str, size: int) -> str:
+        """메뉴 영역 뒤(</body> 앞)를 채워 페이지를 size 바이트 이상으로 만듦"""
+        missing = size - len(html.encode('utf-8'))
+        if missing <= 0:
+            return html
+        # 실제 페이지처럼 짧은 줄 단위로 채움 (한 줄짜리 긴 텍스트는 텍스트 패턴 파싱을 비정상적으로 느리게 함)
+        line = '<p class="load-test-padding">padding</p>\n'
+        padding = f'<div hidden>\n{line * (missing // len(line) + 1)}</div>'
+        index = html.rfind('</body>')
+        return html[:index] + padding + html[index:] if index >= 0 else html + padding
+
+    async def handle_menu(self, request: web.Request) -> web.Response:
+        """/restaurant/{naver_store_id}/menu/list"""
+        self.counters['requests'] += 1
+        delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+        await asyncio.sleep(delay / 1000)
+
+        if self._random.random() < self.error_rate:
+            self.counters['errors_injected'] += 1
+            return web.Response(status=self.error_status, text='injected error')
+
+        # 같은 가게는 항상 같은 페이지
+        naver_store_id = request.match_info['naver_store_id']
+        page = self.pages[sum(map(ord, naver_store_id)) % len(self.pages)]
+        self.counters['bytes_sent'] += len(page.encode('utf-8'))
+        return web.Response(text=page, content_type='text/html')
+
+    async def start(self) -> str:
+        """서버 시작 후 메뉴 URL 템플릿 반환"""
+        app = web.Application()
+        app.router.add_get('/restaurant/{naver_store_id}/menu/list', self.handle_menu)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        self.port = free_port()
+        await web.TCPSite(self._runner, '127.0.0.1', self.port).start()
+        return f"http://127.0.0.1:{self.port}/restaurant/{{naver_store_id}}/menu/list"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+class ProcessSampler:
+    """작업 서버 프로세스(와 자식 프로세스)의 RSS/스레드 수 최대값 기록"""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = {'rss_mb': 0.0, 'rss_mb_with_children': 0.0, 'threads': 0, 'threads_with_children': 0,
+                     'processes': 0}
+        self._task = None
+
+    @staticmethod
+    def _status(pid: int) -> Optional[Dict[str, int]]:
+        """/proc/<pid>/status의 RSS(kB), 스레드 수, 부모 PID"""
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+            return {
+                'rss_kb': int(fields.get('VmRSS', '0 kB').split()[0]),
+                'threads': int(fields['Threads']),
+                'ppid': int(fields['PPid'])
+            }
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _descendants(self) -> List[int]:
+        """서버 프로세스의 자손 PID (워커 풀, 파싱 풀, 서브프로세스)"""
+        children = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                status = self._status(int(entry))
+                if status:
+                    children.setdefault(status['ppid'], []).append(int(entry))
+        found, stack = [], [self.pid]
+        while stack:
+            for child in children.get(stack.pop(), []):
+                found.append(child)
+                stack.append(child)
+        return found
+
+    def sample(self):
+        """현재 값으로 최대값 갱신"""
+        own = self._status(self.pid)
+        if not own:
+            return
+        total_rss, total_threads, processes = own['rss_kb'], own['threads'], 1
+        for pid in self._descendants():
+            status = self._status(pid)
+            if status:
+                total_rss += status['rss_kb']
+                total_threads += status['threads']
+                processes += 1
+        self.peak['rss_mb'] = max(self.peak['rss_mb'], round(own['rss_kb'] / 1024, 1))
+        self.peak['rss_mb_with_children'] = max(self.peak['rss_mb_with_children'], round(total_rss / 1024, 1))
+        self.peak['threads'] = max(self.peak['threads'], own['threads'])
+        self.peak['threads_with_children'] = max(self.peak['threads_with_children'], total_threads)
+        self.peak['processes'] = max(self.peak['processes'], processes)
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.sample()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+def start_server(kind: str, port: int, env: Dict[str, str], workdir: str):
+    """작업 서버를 자식 프로세스로 시작 (로그는 workdir에 기록)"""
+    log = open(os.path.join(workdir, 'server.out'), 'w')
+    command = [sys.executable, SERVER_SCRIPTS[kind]]
+    if kind == 'async':
+        command += ['--host', '127.0.0.1', '--port', str(port)]
+    return subprocess.Popen(command, env=env, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+
+def stop_server(process):
+    """SIGINT로 정상 종료 요청 후 응답이 없으면 강제 종료"""
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+async def wait_ready(session: aiohttp.ClientSession, base_url: str, process, timeout: float):
+    """/health가 응답할 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"작업 서버가 종료되었습니다 (코드 {process.returncode})")
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError('작업 서버 시작 대기 시간 초과')
+
+async def run_request(session: aiohttp.ClientSession, base_url: str, spec: Dict[str, Any],
+                      wait_timeout: float) -> Dict[str, Any]:
+    """작업 하나를 보내고 완료될 때까지 롱폴링 (제출부터 완료까지의 지연 측정)"""
+    started = time.perf_counter()
+    record = {'kind': spec['kind'], 'success': False, 'coalesced': None, 'error': None}
+    try:
+        async with session.post(f"{base_url}/{spec['kind']}", json=spec['payload']) as response:
+            body = await response.json()
+            if response.status != 200:
+                record['error'] = f"HTTP {response.status}"
+                return record
+        task_id = body['task_id']
+        record['coalesced'] = body.get('coalesced')
+
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            wait = min(30, max(1, deadline - time.monotonic()))
+            async with session.get(f"{base_url}/task-status/{task_id}", params={'wait': str(int(wait))}) as response:
+                state = await response.json()
+            if state.get('status') == 'completed':
+                result = state.get('result') or {}
+                output = result.get('result')
+                record['success'] = bool(result.get('success')) and not (
+                    isinstance(output, dict) and output.get('status') == 'failed'
+                )
+                if not record['success']:
+                    record['error'] = result.get('error') or (output or {}).get('status')
+                return record
+            if state.get('status') == 'unknown' or time.monotonic() >= deadline:
+                record['error'] = f"작업 상태 {state.get('status')}"
+                return record
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+        return record
+    finally:
+        record['latency_ms'] = (time.perf_counter() - started) * 1000
+
+def build_requests(count: int, script_ratio: float, stores: int, seed: int) -> List[Dict[str, Any]]:
+    """요청 목록 (script_ratio 비율은 /run-script, 나머지는 stores개 가게를 돌아가며 /scrape-menu)"""
+    rng = random.Random(seed)
+    specs = []
+    for i in range(count):
+        store_id = 100000 + i % stores
+        if rng.random() < script_ratio:
+            specs.append({'kind': 'run-script', 'payload': {
+                'store_id': store_id, 'store_name': f'부하테스트 {store_id}', 'business_number': '000-00-00000'
+            }})
+        else:
+            specs.append({'kind': 'scrape-menu', 'payload': {
+                'store_id': store_id, 'naver_store_id': str(9000000 + i % stores)
+            }})
+    return specs
+
+async def run_load_test(args) -> Dict[str, Any]:
+    """대역 서버와 작업 서버를 띄우고 요청을 보낸 뒤 결과 요약"""
+    stub = NaverStub(args.fixture_dir, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+                     args.page_kb, args.seed)
+    menu_url_template = await stub.start()
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    stub_script = os.path.join(workdir, 'post_signup_stub.py')
+    with open(stub_script, 'w') as f:
+        f.write(STUB_SCRIPT)
+
+    port = args.port or free_port()
+    env = dict(os.environ,
+               NAVER_MENU_URL_TEMPLATE=menu_url_template,
+               SCRAPER_STORAGE='dry-run',
+               POST_SIGNUP_SCRIPT=stub_script,
+               LOAD_TEST_SCRIPT_MS=str(args.script_ms),
+               PORT=str(port))
+    if args.freshness_sec is not None:
+        env['SCRAPE_FRESHNESS_SEC'] = str(args.freshness_sec)
+
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_server(args.server, port, env, workdir)
+    sampler = ProcessSampler(process.pid)
+    records = []
+    try:
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=60)
+        connector = aiohttp.TCPConnector(limit=args.concurrency * 2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await wait_ready(session, base_url, process, args.startup_timeout)
+            logger.info(f"작업 서버 준비 완료 ({args.server}, {base_url}), 요청 {args.requests}개 시작")
+
+            queue = asyncio.Queue()
+            for spec in build_requests(args.requests, args.script_ratio, args.stores or args.requests, args.seed):
+                queue.put_nowait(spec)
+
+            async def client():
+                while not queue.empty():
+                    spec = queue.get_nowait()
+                    records.append(await run_request(session, base_url, spec, args.wait_timeout))
+
+            sampler.start()
+            started = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+            await sampler.stop()
+
+            async with session.get(f"{base_url}/health") as response:
+                health = await response.json()
+    finally:
+        stop_server(process)
+        await stub.stop()
+
+    latency = {'all': latency_summary([r['latency_ms'] for r in records])}
+    for kind in ('scrape-menu', 'run-script'):
+        values = [r['latency_ms'] for r in records if r['kind'] == kind]
+        if values:
+            latency[kind] = latency_summary(values)
+
+    errors = {}
+    for record in records:
+        if record['error']:
+            errors[record['error']] = errors.get(record['error'], 0) + 1
+
+    return {
+        'server': args.server,
+        'requests': len(records),
+        'concurrency': args.concurrency,
+        'succeeded': sum(1 for r in records if r['success']),
+        'failed': sum(1 for r in records if not r['success']),
+        'coalesced': sum(1 for r in records if r['coalesced']),
+        'elapsed_sec': round(elapsed, 3),
+        'throughput_rps': round(len(records) / elapsed, 2) if elapsed else None,
+        'latency_ms': latency,
+        'resources': sampler.peak,
+        'errors': errors,
+        'stub': {**stub.counters, 'latency_ms': args.latency_ms, 'error_rate': args.error_rate,
+                 'pages': len(stub.pages)},
+        'task_queue': health.get('task_queue'),
+        'server_log': os.path.join(workdir, 'server.out')
+    }
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='python_server 종단 간 부하 테스트')
+    parser.add_argument('--server', choices=sorted(SERVER_SCRIPTS), default='flask',
+                        help='작업 서버 (flask: python_server.py, async: async_server.py)')
+    parser.add_argument('--port', type=int, default=0, help='작업 서버 포트 (0이면 빈 포트)')
+    parser.add_argument('--requests', type=int, default=100, help='총 요청 수')
+    parser.add_argument('--concurrency', type=int, default=10, help='동시 요청 수')
+    parser.add_argument('--script_ratio', type=float, default=0.0, help='/run-script 요청 비율 (0~1)')
+    parser.add_argument('--stores', type=int, default=0, help='가게 수 (0이면 요청마다 다른 가게)')
+    parser.add_argument('--freshness_sec', type=float, help='SCRAPE_FRESHNESS_SEC 지정 (기본: 서버 설정)')
+    parser.add_argument('--latency_ms', type=float, default=200, help='대역 서버 평균 응답 지연(ms)')
+    parser.add_argument('--jitter_ms', type=float, default=50, help='대역 서버 지연 표준편차(ms)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='대역 서버 오류 응답 비율 (0~1)')
+    parser.add_argument('--error_status', type=int, default=500, help='오류 응답 상태 코드 (예: 429, 503)')
+    parser.add_argument('--page_kb', type=int, default=0, help='메뉴 페이지 최소 크기(KB, 메뉴 영역 뒤를 채움)')
+    parser.add_argument('--fixture_dir', default=FIXTURE_DIR, help='메뉴 페이지 픽스처 디렉토리')
+    parser.add_argument('--script_ms', type=int, default=100, help='가입 후처리 대역 스크립트 실행 시간(ms)')
+    parser.add_argument('--wait_timeout', type=float, default=300, help='요청별 완료 대기 최대 시간(초)')
+    parser.add_argument('--startup_timeout', type=float, default=60, help='작업 서버 시작 대기 시간(초)')
+    parser.add_argument('--seed', type=int, default=1, help='난수 시드')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
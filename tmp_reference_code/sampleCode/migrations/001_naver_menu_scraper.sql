@@ -0,0 +1,26 @@
+-- naver_menu_scraper.py 스키마 변경 (배포 전에 1회 적용)
+-- 요청 경로에서 DDL을 실행하면 ACCESS EXCLUSIVE 잠금을 잡고 실패해도 로그만 남으므로 여기서 적용한다.
+-- 적용: psql "$DATABASE_URL" -f migrations/001_naver_menu_scraper.sql
+
+BEGIN;
+
+-- 조건부 요청 상태 (ETag/Last-Modified/콘텐츠 해시)
+CREATE TABLE IF NOT EXISTS naver_menu_fetch_state (
+    naver_store_id VARCHAR(50) PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash CHAR(64),
+    menu_count INTEGER DEFAULT 0,
+    checked_at TIMESTAMP DEFAULT NOW(),
+    changed_at TIMESTAMP DEFAULT NOW()
+);
+
+-- 메뉴 이미지 캐시 키 (이미지 원본의 SHA-256, MenuImageCache 참고)
+ALTER TABLE naver_menus ADD COLUMN IF NOT EXISTS menu_image_key CHAR(64);
+
+-- 스크래핑 로그의 단계별 구간 시간(ms)과 메뉴를 찾은 파싱 전략
+ALTER TABLE naver_scraping_logs
+    ADD COLUMN IF NOT EXISTS phase_timings JSONB,
+    ADD COLUMN IF NOT EXISTS parse_strategy VARCHAR(32);
+
+COMMIT;
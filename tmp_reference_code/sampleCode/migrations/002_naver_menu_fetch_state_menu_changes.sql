@@ -0,0 +1,15 @@
+-- 메뉴 단위 변경 시각 (refresh_scheduler의 갱신 주기 계산용)
+-- changed_at은 페이지 해시가 바뀐 시각이라 동적 토큰만 바뀌어도 갱신되므로,
+-- 메뉴 추가/변경/삭제가 있었던 시각을 따로 기록한다.
+-- 적용: psql "$DATABASE_URL" -f migrations/002_naver_menu_fetch_state_menu_changes.sql
+
+BEGIN;
+
+ALTER TABLE naver_menu_fetch_state
+    ADD COLUMN IF NOT EXISTS menu_hash CHAR(64),
+    ADD COLUMN IF NOT EXISTS menus_changed_at TIMESTAMP;
+
+-- 기존 행은 페이지 변경 시각에서 시작
+UPDATE naver_menu_fetch_state SET menus_changed_at = changed_at WHERE menus_changed_at IS NULL;
+
+COMMIT;
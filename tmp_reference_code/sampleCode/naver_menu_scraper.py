@@ -6,21 +6,45 @@
 
 import os
 import sys
+import csv
+import glob
 import json
+import codecs
+import hashlib
 import logging
 import argparse
 import asyncio
 import aiohttp
 import psycopg2
+import psycopg2.pool
+import psycopg2.extensions
+import psycopg2.extras
 import pandas as pd
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, field, astuple
 from urllib.parse import urljoin, urlparse
 import re
 from bs4 import BeautifulSoup
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 import time
 import random
+import threading
+import itertools
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, asynccontextmanager
 
 # 로깅 설정
 logging.basicConfig(
@@ -33,6 +57,371 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 메뉴 페이지 URL (NAVER_MENU_URL_TEMPLATE로 부하 테스트용 대역 서버 등을 지정 가능)
+MENU_URL_TEMPLATE = os.environ.get('NAVER_MENU_URL_TEMPLATE',
+                                   'https://m.place.naver.com/restaurant/{naver_store_id}/menu/list')
+
+# 매장별 추적 결과 JSON 로그 (--trace_log로 별도 파일에 한 줄씩 기록 가능)
+trace_logger = logging.getLogger('naver_menu_scraper.trace')
+
+# HTML 파서 백엔드 선택 (lxml 설치 시 우선 사용, NAVER_HTML_PARSER로 강제 가능)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = os.environ.get('NAVER_HTML_PARSER', 'lxml')
+except ImportError:
+    HTML_PARSER = os.environ.get('NAVER_HTML_PARSER', 'html.parser')
+
+class ParsedPage:
+    """한 번만 파싱한 HTML 문서 (모든 파싱 전략이 트리와 텍스트를 공유)"""
+    
+    def __init__(self, html: str, parser: Optional[str] = None):
+        self.html = html
+        self.soup = BeautifulSoup(html, parser or HTML_PARSER)
+        self._text = None
+    
+    @property
+    def text(self) -> str:
+        """문서 전체 텍스트 (최초 접근 시 한 번만 추출)"""
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+def normalize_menu_html(html: str) -> str:
+    """콘텐츠 해시용 HTML 정규화 (주석, nonce 속성, 공백 차이 무시)"""
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.DOTALL)
+    html = re.sub(r'\snonce="[^"]*"', '', html)
+    return re.sub(r'\s+', ' ', html).strip()
+
+def ms_since(started: float) -> float:
+    """perf_counter 기준 경과 시간(ms)"""
+    return round((time.perf_counter() - started) * 1000, 3)
+
+def menu_content_hash(html: str) -> str:
+    """정규화한 메뉴 영역(menu_region)의 SHA-256 해시 (영역 밖의 요청별 토큰/타임스탬프/상태 스크립트는 무시)"""
+    return hashlib.sha256(normalize_menu_html(menu_region(html)).encode('utf-8')).hexdigest()
+
+# 스크립트 안의 상태 객체 할당 위치 (값은 JSONDecoder.raw_decode로 정확히 하나만 읽음)
+JSON_ASSIGNMENT_PATTERNS = [
+    re.compile(r'window\.__INITIAL_STATE__\s*=\s*'),
+    re.compile(r'window\.__NEXT_DATA__\s*=\s*'),
+    re.compile(r'window\.__APOLLO_STATE__\s*=\s*'),
+]
+JSON_SCRIPT_START_PATTERN = re.compile(r'<script\b[^>]*\btype="application/json"[^>]*>\s*', re.IGNORECASE)
+JSON_ARRAY_KEY_PATTERN = re.compile(r'"(menu|menus)"\s*:\s*(?=\[)')
+
+# 상태 객체 순회 시 메뉴 배열로 볼 키
+MENU_ARRAY_KEYS = ('menu', 'menus', 'items', 'products', 'menuList', 'menuItems')
+
+_json_decoder = json.JSONDecoder()
+
+def decode_json_at(text: str, pos: int) -> Optional[Any]:
+    """text[pos]에서 시작하는 JSON 값 하나를 선형 시간에 디코딩"""
+    try:
+        value, _ = _json_decoder.raw_decode(text, pos)
+        return value
+    except ValueError:
+        return None
+
+def _is_menu_dict(value: Any) -> bool:
+    """메뉴 항목처럼 보이는 객체인지 (이름 필드 보유)"""
+    return isinstance(value, dict) and ('name' in value or 'title' in value)
+
+def find_menu_arrays(data: Any, max_nodes: int = 500000) -> List[List[Dict]]:
+    """디코딩된 상태 객체를 순회해 메뉴 배열 후보 수집 (Apollo 정규화 캐시의 Menu 객체 포함)"""
+    candidates = []
+    typed_menus = []
+    stack = [data]
+    visited = 0
+    
+    while stack and visited < max_nodes:
+        node = stack.pop()
+        visited += 1
+        
+        if isinstance(node, dict):
+            typename = node.get('__typename')
+            if isinstance(typename, str) and 'Menu' in typename and _is_menu_dict(node):
+                typed_menus.append(node)
+            children = []
+            for key, value in node.items():
+                if isinstance(value, list) and key in MENU_ARRAY_KEYS and value and _is_menu_dict(value[0]):
+                    candidates.append(value)
+                if isinstance(value, (dict, list)):
+                    children.append(value)
+            # 문서 순서대로 방문하도록 역순으로 쌓음
+            stack.extend(reversed(children))
+        elif isinstance(node, list):
+            stack.extend(reversed([value for value in node if isinstance(value, (dict, list))]))
+    
+    if typed_menus:
+        candidates.append(typed_menus)
+    return candidates
+
+# 스트리밍 수신 중 메뉴 영역이 끝났는지 판단할 표식
+MENU_LIST_ITEM_PATTERN = re.compile(r'<li\b[^>]*\bE2jtL\b')
+MENU_SECTION_START_PATTERN = re.compile(r'<div\b[^>]*\bclass="(?:[^"]*\s)?place_section(?:\s[^"]*)?"')
+DIV_TAG_PATTERN = re.compile(r'<(/?)div[\s>/]', re.IGNORECASE)
+
+# 메뉴 목록/상태 JSON이 없는 페이지의 해시 대상 (<body>에서 스크립트/스타일 제외)
+BODY_START_PATTERN = re.compile(r'<body\b', re.IGNORECASE)
+SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+class MenuStreamDetector:
+    """스트리밍 수신 중 필요한 메뉴 영역(메뉴 목록)이 모두 도착했는지 판단
+    
+    메뉴 목록(li.E2jtL)은 파싱 우선순위가 가장 높으므로 목록을 감싼 메뉴 섹션(div.place_section)이 닫히면 바로 멈춘다.
+    카테고리별 <ul>이 여러 개이거나 메뉴 항목 안에 <ul>이 있어도 섹션 전체를 받는다.
+    메뉴 항목을 감싼 섹션을 찾지 못하면 끝까지 받는다.
+    상태 JSON 스크립트에서는 멈추지 않는다. 뒤에 메뉴 목록이 오면 우선순위가 높은 e2jtl 결과를 잃고
+    청크 경계에 따라 파싱 결과가 달라지기 때문이다.
+    """
+    
+    # 청크 경계에 걸친 태그를 놓치지 않기 위해 다시 검사하는 길이
+    OVERLAP = 256
+    
+    def __init__(self):
+        self.buffer = ''
+        self.reason = None
+        self.section_start = -1
+        self._scan_from = 0
+        self._first_item = -1
+        self._section_pos = -1
+        self._section_depth = 0
+    
+    def feed(self, text: str) -> Optional[int]:
+        """디코딩된 텍스트 추가 (메뉴 영역이 끝났으면 잘라낼 위치 반환)"""
+        self.buffer += text
+        buffer = self.buffer
+        scan_from = self._scan_from
+        self._scan_from = max(0, len(buffer) - self.OVERLAP)
+        
+        # 메뉴 목록: 첫 항목을 감싼 메뉴 섹션이 닫히면 종료
+        if self._first_item < 0:
+            match = MENU_LIST_ITEM_PATTERN.search(buffer, scan_from)
+            if match:
+                self._first_item = match.start()
+                self._find_menu_section()
+        if self._first_item >= 0 and self._section_pos >= 0:
+            return self._menu_section_end()
+        return None
+    
+    def _find_menu_section(self):
+        """첫 메뉴 항목을 감싼 가장 가까운 div.place_section 찾기 (없으면 끝까지 받음)"""
+        buffer = self.buffer
+        for start in reversed([match.start() for match in MENU_SECTION_START_PATTERN.finditer(buffer, 0, self._first_item)]):
+            depth = 0
+            for tag in DIV_TAG_PATTERN.finditer(buffer, start, self._first_item):
+                depth += -1 if tag.group(1) else 1
+                if depth == 0:
+                    break
+            if depth > 0:
+                self.section_start = start
+                self._section_pos = self._first_item
+                self._section_depth = depth
+                return
+    
+    def _menu_section_end(self) -> Optional[int]:
+        """메뉴 섹션의 닫는 태그 위치 (아직 안 닫혔으면 None)"""
+        buffer = self.buffer
+        for tag in DIV_TAG_PATTERN.finditer(buffer, self._section_pos):
+            if tag.group(1) and self._section_depth == 1:
+                close = buffer.find('>', tag.end() - 1)
+                if close < 0:
+                    return None
+                self._section_depth = 0
+                self.reason = 'menu_list'
+                return close + 1
+            self._section_depth += -1 if tag.group(1) else 1
+            self._section_pos = tag.end()
+        # 청크 끝에 걸친 태그는 다음 청크에서 다시 검사
+        self._section_pos = max(self._section_pos, len(buffer) - 8)
+        return None
+
+def menu_region(html: str) -> str:
+    """콘텐츠 해시 대상 메뉴 영역
+
+    메뉴 목록(li.E2jtL)이 있으면 MenuStreamDetector가 찾는 메뉴 섹션 HTML,
+    없으면 상태 JSON(window.__*_STATE__ 할당 또는 <script type="application/json">)에서 찾은 메뉴 배열,
+    둘 다 없으면 텍스트 패턴 파싱 대상인 <body>에서 스크립트/스타일을 뺀 부분을 쓴다.
+    """
+    detector = MenuStreamDetector()
+    end = detector.feed(html)
+    if end is not None:
+        return html[detector.section_start:end]
+    
+    for pattern in JSON_ASSIGNMENT_PATTERNS + [JSON_SCRIPT_START_PATTERN]:
+        for match in pattern.finditer(html):
+            data = decode_json_at(html, match.end())
+            menu_arrays = find_menu_arrays(data) if data is not None else []
+            if menu_arrays:
+                return json.dumps(menu_arrays, ensure_ascii=False, sort_keys=True)
+    
+    body = BODY_START_PATTERN.search(html)
+    return SCRIPT_STYLE_PATTERN.sub('', html[body.start():] if body else html)
+
+class ResponseTooLarge(Exception):
+    """응답 본문이 최대 크기를 넘음"""
+
+async def read_menu_body(response, max_bytes: Optional[int] = None, chunk_size: int = 16384,
+                         early_stop: bool = True) -> Tuple[str, Dict[str, Any]]:
+    """응답 본문을 청크 단위로 읽고 점진적으로 디코딩 (메뉴 영역을 받으면 나머지는 읽지 않음)"""
+    decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+    detector = MenuStreamDetector()
+    bytes_read = 0
+    cut = None
+    
+    async for chunk in response.content.iter_chunked(chunk_size):
+        bytes_read += len(chunk)
+        if max_bytes and bytes_read > max_bytes:
+            raise ResponseTooLarge(f"응답 크기 초과: {bytes_read:,}바이트 > {max_bytes:,}바이트")
+        
+        text = decoder.decode(chunk)
+        if not early_stop:
+            detector.buffer += text
+            continue
+        cut = detector.feed(text)
+        if cut is not None:
+            break
+    else:
+        detector.buffer += decoder.decode(b'', final=True)
+    
+    html = detector.buffer[:cut] if cut is not None else detector.buffer
+    
+    # 압축 전송이면 Content-Length가 압축 크기라 건너뛴 양을 알 수 없음
+    bytes_skipped = None
+    content_length = response.content_length
+    if content_length is not None and not response.headers.get('Content-Encoding'):
+        bytes_skipped = max(0, content_length - bytes_read)
+    elif cut is None:
+        bytes_skipped = 0
+    
+    return html, {
+        'bytes_read': bytes_read,
+        'bytes_skipped': bytes_skipped,
+        'stopped_early': cut is not None,
+        'stop_reason': detector.reason
+    }
+
+# naver_menu_fetch_state 테이블, naver_menus.menu_image_key, naver_scraping_logs.phase_timings/parse_strategy
+# 컬럼은 migrations/001_naver_menu_scraper.sql로 배포 전에 만든다 (요청 경로에서 DDL을 실행하지 않음)
+
+# naver_menus에서 SQL 집계로 계산하는 메뉴 통계 (가격 0/NULL 제외는 파이썬 계산과 동일)
+MENU_STATS_FROM_MENUS_SQL = """
+    INSERT INTO naver_menu_stats 
+    (store_id, naver_store_id, total_menus, avg_price, min_price, max_price,
+     popular_menu_count, signature_menu_count, last_scraped_at, scraped_success)
+    SELECT {store_id}, {naver_store_id}, COUNT(*),
+           AVG(menu_price) FILTER (WHERE menu_price > 0),
+           MIN(menu_price) FILTER (WHERE menu_price > 0),
+           MAX(menu_price) FILTER (WHERE menu_price > 0),
+           COUNT(*) FILTER (WHERE is_popular),
+           COUNT(*) FILTER (WHERE is_signature),
+           NOW(), TRUE
+    FROM naver_menus
+    WHERE store_id = {store_id} AND naver_store_id = {naver_store_id}
+    ON CONFLICT (store_id, naver_store_id) 
+    DO UPDATE SET
+        total_menus = EXCLUDED.total_menus,
+        avg_price = EXCLUDED.avg_price,
+        min_price = EXCLUDED.min_price,
+        max_price = EXCLUDED.max_price,
+        popular_menu_count = EXCLUDED.popular_menu_count,
+        signature_menu_count = EXCLUDED.signature_menu_count,
+        last_scraped_at = EXCLUDED.last_scraped_at,
+        scraped_success = EXCLUDED.scraped_success,
+        error_message = NULL
+"""
+
+def legacy_round_trips(menu_count: int) -> int:
+    """기존 단계별 저장(row 모드)의 매장당 왕복 횟수
+
+    persist_scrape_atomic과 같은 기준으로 트랜잭션마다 BEGIN과 COMMIT을 센다.
+    메뉴 upsert N개, 통계 1개(메뉴가 없으면 둘 다 생략), 로그 완료 1개가 각각 별도 트랜잭션이다.
+    """
+    menus = menu_count + 2 if menu_count else 0
+    stats = 3 if menu_count else 0
+    return menus + stats + 3
+
+def empty_menu_changes() -> Dict[str, Any]:
+    """빈 변경 요약"""
+    return {'added': [], 'removed': [], 'price_changed': [], 'updated': 0, 'unchanged': 0}
+
+def _comparable_menu_values(values) -> tuple:
+    """비교용 메뉴 값 (가격/평점은 DB 타입(Decimal 등)과 비교할 수 있도록 정규화)"""
+    price, description, category, image_url, rating, review_count, is_popular, is_signature = values
+    return (
+        int(price) if price is not None else None, description, category, image_url,
+        float(rating) if rating is not None else None, review_count,
+        bool(is_popular), bool(is_signature)
+    )
+
+# 삭제 동기화를 허용하는 파싱 전략 (실제 메뉴 목록/상태 JSON/텍스트 패턴에서 찾은 경우만)
+# 기본 메뉴 한 줄(placeholder)이나 전략을 모르는 결과로 기존 메뉴를 지우지 않음
+DELETE_SYNC_STRATEGIES = ('e2jtl', 'json', 'text_pattern')
+
+def diff_menu_rows(store_id: int, existing_rows, rows: List[tuple], parse_strategy: Optional[str] = None):
+    """기존 행(menu_name, 가격..is_signature)과 upsert 행을 비교해 (쓸 행, 변경 요약) 반환
+    
+    삭제 대상은 parse_strategy가 DELETE_SYNC_STRATEGIES일 때만 계산한다.
+    """
+    existing = {row[0]: _comparable_menu_values(tuple(row[1:])) for row in existing_rows}
+    changes = empty_menu_changes()
+    write_rows = []
+    
+    for row in rows:
+        name = row[2]
+        current = existing.get(name)
+        scraped = _comparable_menu_values(row[3:11])
+        if current is None:
+            changes['added'].append(name)
+            write_rows.append(row)
+        elif current != scraped:
+            if current[0] != scraped[0]:
+                changes['price_changed'].append({'menu_name': name, 'old_price': current[0], 'new_price': scraped[0]})
+            changes['updated'] += 1
+            write_rows.append(row)
+        else:
+            changes['unchanged'] += 1
+    
+    # 파싱 결과가 비었거나 실제 메뉴 전략이 아니면 매장 메뉴 전체 삭제를 막기 위해 삭제는 생략
+    scraped_names = {row[2] for row in rows}
+    if rows and parse_strategy in DELETE_SYNC_STRATEGIES:
+        changes['removed'] = [name for name in existing if name not in scraped_names]
+    elif existing:
+        logger.warning(f"⚠️ [매장 {store_id}] 파싱 결과({parse_strategy}, {len(rows)}개)로는 삭제 동기화를 생략합니다.")
+    
+    return write_rows, changes
+
+def menu_items_hash(menus: List['MenuItem']) -> str:
+    """메뉴 내용 해시 (메뉴명별 마지막 값, diff_menu_rows가 비교하는 값만, 순서 무관)"""
+    items = {
+        menu.name: _comparable_menu_values((menu.price, menu.description, menu.category, menu.image_url,
+                                            menu.rating, menu.review_count, menu.is_popular, menu.is_signature))
+        for menu in menus
+    }
+    return hashlib.sha256(json.dumps(sorted(items.items()), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def menus_changed(write_report: Dict[str, Any], menu_hash: str, fetch_state: Optional[Dict[str, Any]]) -> bool:
+    """메뉴 단위 변경 여부 (sync는 추가/변경/삭제 diff, 그 외 저장 방식은 이전 메뉴 해시와 비교)
+
+    메뉴 영역 해시(content_hash)는 마크업이나 이미지 URL만 바뀌어도 달라지므로 갱신 주기 계산에는 쓰지 않는다.
+    """
+    changes = write_report.get('changes')
+    if changes is not None:
+        return bool(changes['added'] or changes['removed'] or changes['updated'])
+    return not fetch_state or fetch_state.get('menu_hash') != menu_hash
+
+def compute_menu_stats(menus: List['MenuItem']) -> Dict[str, Any]:
+    """naver_menu_stats용 통계 계산"""
+    prices = [menu.price for menu in menus if menu.price]
+    return {
+        'total_menus': len(menus),
+        'avg_price': sum(prices) / len(prices) if prices else None,
+        'min_price': min(prices) if prices else None,
+        'max_price': max(prices) if prices else None,
+        'popular_menu_count': sum(1 for menu in menus if menu.is_popular),
+        'signature_menu_count': sum(1 for menu in menus if menu.is_signature)
+    }
+
 @dataclass
 class MenuItem:
     """메뉴 아이템 데이터 클래스"""
@@ -47,12 +436,1068 @@ class MenuItem:
     is_signature: bool = False
     naver_menu_id: Optional[str] = None
 
+@dataclass
+class ScrapeResult:
+    """매장 단위 스크래핑 결과 데이터 클래스"""
+    store_id: int
+    naver_store_id: str
+    success: bool
+    status: str = 'success'
+    menus: List[MenuItem] = field(default_factory=list)
+    menu_count: Optional[int] = None
+    saved_count: int = 0
+    error: Optional[str] = None
+    elapsed_ms: int = 0
+    write_report: Dict[str, Any] = field(default_factory=dict)
+    fetch_report: Dict[str, Any] = field(default_factory=dict)
+    images_cached: int = 0
+    http_status: Optional[int] = None
+    http_statuses: List[int] = field(default_factory=list)
+    phase_ms: Dict[str, float] = field(default_factory=dict)
+    parse_strategy: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 출력용 딕셔너리 변환"""
+        return {
+            'store_id': self.store_id,
+            'naver_store_id': self.naver_store_id,
+            'success': self.success,
+            'status': self.status,
+            'menu_count': self.menu_count if self.menu_count is not None else len(self.menus),
+            'saved_count': self.saved_count,
+            'save_mode': self.write_report.get('mode'),
+            'save_ms': self.write_report.get('elapsed_ms'),
+            'save_failures': self.write_report.get('failures', []),
+            'changes': self.write_report.get('changes'),
+            'db_round_trips': self.write_report.get('round_trips'),
+            'db_round_trips_saved': self.write_report.get('round_trips_saved'),
+            'bytes_read': self.fetch_report.get('bytes_read'),
+            'bytes_skipped': self.fetch_report.get('bytes_skipped'),
+            'stopped_early': self.fetch_report.get('stopped_early'),
+            'images_cached': self.images_cached,
+            'http_status': self.http_status,
+            'http_statuses': self.http_statuses,
+            'phase_ms': self.phase_ms,
+            'parse_strategy': self.parse_strategy,
+            'error': self.error,
+            'elapsed_ms': self.elapsed_ms
+        }
+
+class ScrapeTrace:
+    """매장 단위 스크래핑 추적 (단계별 구간 시간, 메뉴를 찾은 파싱 전략, 네이버 응답 코드)"""
+    
+    def __init__(self, store_id: int, naver_store_id: str):
+        self.store_id = store_id
+        self.naver_store_id = naver_store_id
+        self.started_at = datetime.now()
+        self.spans: Dict[str, float] = {}  # 구간 이름 → ms (fetch/parse/save/stats/images)
+        self.strategy: Optional[str] = None
+        self.http_statuses: List[int] = []
+        self.status: Optional[str] = None
+        self.menu_count = 0
+        self.error: Optional[str] = None
+        self.elapsed_ms = 0
+    
+    @contextmanager
+    def span(self, name: str):
+        """구간 시간 측정 (같은 이름이 반복되면 합산)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = round(self.spans.get(name, 0.0) + ms_since(started), 3)
+    
+    def finish(self, result: 'ScrapeResult'):
+        """스크래핑 결과 반영"""
+        self.status = result.status
+        self.menu_count = result.to_dict()['menu_count']
+        self.error = result.error
+        self.elapsed_ms = result.elapsed_ms
+    
+    def log_fields(self) -> Tuple[str, Optional[str]]:
+        """naver_scraping_logs 저장 값 (phase_timings JSON, parse_strategy)"""
+        return json.dumps(self.spans), self.strategy
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 로그용 딕셔너리 변환"""
+        return {
+            'event': 'menu_scrape',
+            'store_id': self.store_id,
+            'naver_store_id': self.naver_store_id,
+            'status': self.status,
+            'parse_strategy': self.strategy,
+            'menu_count': self.menu_count,
+            'http_statuses': self.http_statuses,
+            'spans_ms': self.spans,
+            'elapsed_ms': self.elapsed_ms,
+            'error': self.error,
+            'started_at': self.started_at.isoformat()
+        }
+
+class DBConnectionPool:
+    """스크래핑 간 공유하는 PostgreSQL 연결 풀 (사용량 지표 포함)"""
+    
+    def __init__(self, db_config: Dict[str, str], minconn: int = 1, maxconn: int = 5,
+                 acquire_timeout: Optional[float] = 30.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"잘못된 연결 풀 크기: min={minconn}, max={maxconn}")
+        
+        self.db_config = db_config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        
+        # 지표
+        self.connections_created = 0
+        self.acquire_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        
+        for _ in range(minconn):
+            self._idle.append(self._connect())
+    
+    def _connect(self):
+        """새 물리 연결 생성"""
+        conn = psycopg2.connect(**self.db_config)
+        with self._cond:
+            self.connections_created += 1
+        return conn
+    
+    def _record_wait(self, started: float):
+        """연결 대기 시간 기록 (락 보유 상태에서 호출)"""
+        waited = time.perf_counter() - started
+        self.acquire_count += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+    
+    def getconn(self):
+        """풀에서 연결 획득 (최대 크기 도달 시 반환될 때까지 대기)"""
+        started = time.perf_counter()
+        deadline = started + self.acquire_timeout if self.acquire_timeout else None
+        
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.pool.PoolError("연결 풀이 종료되었습니다.")
+                
+                while self._idle:
+                    conn = self._idle.pop()
+                    if conn.closed:
+                        continue
+                    self._in_use += 1
+                    self._record_wait(started)
+                    return conn
+                
+                if self._in_use < self.maxconn:
+                    # 자리를 먼저 확보하고 연결은 락 밖에서 생성
+                    self._in_use += 1
+                    break
+                
+                remaining = deadline - time.perf_counter() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    raise psycopg2.pool.PoolError(f"연결 대기 시간 초과 ({self.acquire_timeout}초)")
+                self._cond.wait(remaining)
+        
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        
+        with self._cond:
+            self._record_wait(started)
+        return conn
+    
+    def putconn(self, conn, discard: bool = False):
+        """연결을 풀에 반환 (열린 트랜잭션은 롤백)"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                if not conn.closed:
+                    conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+    
+    @contextmanager
+    def connection(self):
+        """with 블록 동안 연결을 빌려 쓰는 컨텍스트 매니저"""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.InterfaceError, psycopg2.OperationalError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """연결 풀 지표"""
+        with self._cond:
+            return {
+                'backend': 'psycopg2',
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'connections_created': self.connections_created,
+                'acquire_count': self.acquire_count,
+                'wait_time_total_ms': round(self.wait_time_total * 1000, 3),
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 3)
+            }
+    
+    def closeall(self):
+        """모든 유휴 연결 종료 (사용 중인 연결은 반환 시 종료)"""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                if not conn.closed:
+                    conn.close()
+            self._idle = []
+            self._cond.notify_all()
+
+class AsyncMenuStorage:
+    """asyncpg 기반 비동기 저장소 (자체 연결 풀, psycopg2 경로와 같은 스키마/충돌 처리)"""
+    
+    MENU_UPSERT_SQL = """
+        INSERT INTO naver_menus 
+        (store_id, naver_store_id, menu_name, menu_price, menu_description, 
+         menu_category, menu_image_url, menu_rating, menu_review_count,
+         is_popular, is_signature, naver_menu_id, scraped_at)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+        ON CONFLICT (store_id, naver_store_id, menu_name) 
+        DO UPDATE SET
+            menu_price = EXCLUDED.menu_price,
+            menu_description = EXCLUDED.menu_description,
+            menu_category = EXCLUDED.menu_category,
+            menu_image_url = EXCLUDED.menu_image_url,
+            menu_rating = EXCLUDED.menu_rating,
+            menu_review_count = EXCLUDED.menu_review_count,
+            is_popular = EXCLUDED.is_popular,
+            is_signature = EXCLUDED.is_signature,
+            updated_at = NOW()
+    """
+    
+    def __init__(self, db_config: Dict[str, str], min_size: int = 1, max_size: int = 10,
+                 save_mode: str = 'row'):
+        if asyncpg is None:
+            raise RuntimeError("asyncpg가 설치되어 있지 않습니다. (pip install asyncpg)")
+        
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.save_mode = save_mode
+        self.pool = None
+        self._pool_lock = None
+        
+        # 지표
+        self.connections_created = 0
+        self.acquire_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+    
+    async def open(self):
+        """연결 풀 생성 (최초 사용 시 한 번만)"""
+        if self.pool is not None:
+            return self.pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self.pool is None:
+                self.pool = await asyncpg.create_pool(
+                    host=self.db_config.get('host'),
+                    port=int(self.db_config.get('port', 5432)),
+                    database=self.db_config.get('database'),
+                    user=self.db_config.get('user'),
+                    password=self.db_config.get('password'),
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    init=self._on_connect
+                )
+        return self.pool
+    
+    async def _on_connect(self, conn):
+        """새 물리 연결 생성 시 호출"""
+        self.connections_created += 1
+    
+    async def close(self):
+        """연결 풀 종료"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+    
+    @asynccontextmanager
+    async def connection(self):
+        """풀에서 연결을 빌리는 비동기 컨텍스트 매니저"""
+        pool = await self.open()
+        started = time.perf_counter()
+        async with pool.acquire() as conn:
+            waited = time.perf_counter() - started
+            self.acquire_count += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+            yield conn
+    
+    def metrics(self) -> Dict[str, Any]:
+        """연결 풀 지표"""
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        return {
+            'backend': 'asyncpg',
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'in_use': size - idle,
+            'idle': idle,
+            'connections_created': self.connections_created,
+            'acquire_count': self.acquire_count,
+            'wait_time_total_ms': round(self.wait_time_total * 1000, 3),
+            'wait_time_max_ms': round(self.wait_time_max * 1000, 3)
+        }
+    
+    async def start_scraping_log(self, store_id: int, naver_store_id: str) -> int:
+        """스크래핑 로그 시작"""
+        try:
+            async with self.connection() as conn:
+                return await conn.fetchval("""
+                    INSERT INTO naver_scraping_logs 
+                    (store_id, naver_store_id, scraping_type, status, started_at)
+                    VALUES ($1, $2, $3, $4, $5)
+                    RETURNING id
+                """, store_id, naver_store_id, 'menu', 'pending', datetime.now())
+            
+        except Exception as e:
+            logger.error(f"❌ 스크래핑 로그 시작 오류: {e}")
+            return 0
+    
+    async def complete_scraping_log(self, log_id: int, menu_count: int, success: bool,
+                                    error_message: str = None, status: Optional[str] = None,
+                                    trace: Optional[ScrapeTrace] = None):
+        """스크래핑 로그 완료 (trace가 있으면 구간 시간과 파싱 전략 기록)"""
+        phase_timings, parse_strategy = trace.log_fields() if trace else (None, None)
+        try:
+            async with self.connection() as conn:
+                await conn.execute("""
+                    UPDATE naver_scraping_logs 
+                    SET status = $1, menu_count = $2, completed_at = $3, 
+                        processing_time_ms = EXTRACT(EPOCH FROM (NOW() - started_at)) * 1000,
+                        error_message = $4, phase_timings = $5::jsonb, parse_strategy = $6
+                    WHERE id = $7
+                """, status or ('success' if success else 'failed'), menu_count, datetime.now(), error_message,
+                    phase_timings, parse_strategy, log_id)
+            
+        except Exception as e:
+            logger.error(f"❌ 스크래핑 로그 완료 오류: {e}")
+    
+    async def load_fetch_state(self, naver_store_id: str) -> Optional[Dict[str, Any]]:
+        """이전 수집의 ETag/Last-Modified/콘텐츠 해시 조회"""
+        try:
+            async with self.connection() as conn:
+                row = await conn.fetchrow("""
+                    SELECT etag, last_modified, content_hash, menu_hash, menu_count
+                    FROM naver_menu_fetch_state
+                    WHERE naver_store_id = $1
+                """, naver_store_id)
+            return dict(row) if row else None
+            
+        except Exception as e:
+            logger.error(f"❌ 수집 상태 조회 오류: {e}")
+            return None
+    
+    async def save_fetch_state(self, naver_store_id: str, etag: Optional[str], last_modified: Optional[str],
+                               content_hash: Optional[str], menu_count: int, menu_hash: Optional[str] = None,
+                               menus_changed: bool = False):
+        """수집 상태 저장 (해시가 바뀐 경우에만 changed_at, 메뉴가 바뀐 경우에만 menus_changed_at 갱신)"""
+        try:
+            async with self.connection() as conn:
+                await conn.execute("""
+                    INSERT INTO naver_menu_fetch_state
+                    (naver_store_id, etag, last_modified, content_hash, menu_hash, menu_count,
+                     checked_at, changed_at, menus_changed_at)
+                    VALUES ($1, $2, $3, $4, $5, $6, NOW(), NOW(), NOW())
+                    ON CONFLICT (naver_store_id)
+                    DO UPDATE SET
+                        etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        menu_count = EXCLUDED.menu_count,
+                        checked_at = NOW(),
+                        changed_at = CASE
+                            WHEN naver_menu_fetch_state.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                            THEN NOW() ELSE naver_menu_fetch_state.changed_at
+                        END,
+                        menus_changed_at = CASE
+                            WHEN $7::boolean THEN NOW() ELSE naver_menu_fetch_state.menus_changed_at
+                        END,
+                        content_hash = EXCLUDED.content_hash,
+                        menu_hash = COALESCE(EXCLUDED.menu_hash, naver_menu_fetch_state.menu_hash)
+                """, naver_store_id, etag, last_modified, content_hash, menu_hash, menu_count, menus_changed)
+            
+        except Exception as e:
+            logger.error(f"❌ 수집 상태 저장 오류: {e}")
+    
+    async def write_menus(self, store_id: int, naver_store_id: str, menus: List['MenuItem'],
+                          parse_strategy: Optional[str] = None) -> Dict[str, Any]:
+        """메뉴 저장 (row/bulk는 파이프라인 executemany, sync는 변경분만 반영)"""
+        started = time.perf_counter()
+        rows = NaverMenuScraper._menu_upsert_rows(store_id, naver_store_id, menus)
+        report = {'saved': 0, 'failures': [], 'duplicates': len(menus) - len(rows)}
+        if self.save_mode == 'sync':
+            report['changes'] = empty_menu_changes()
+        
+        try:
+            async with self.connection() as conn:
+                async with conn.transaction():
+                    write_rows = rows
+                    removed = []
+                    if self.save_mode == 'sync':
+                        existing = await conn.fetch("""
+                            SELECT menu_name, menu_price, menu_description, menu_category, menu_image_url,
+                                   menu_rating, menu_review_count, is_popular, is_signature
+                            FROM naver_menus
+                            WHERE store_id = $1 AND naver_store_id = $2
+                        """, store_id, naver_store_id)
+                        write_rows, report['changes'] = diff_menu_rows(store_id, existing, rows, parse_strategy)
+                        removed = report['changes']['removed']
+                    
+                    try:
+                        async with conn.transaction():
+                            await conn.executemany(self.MENU_UPSERT_SQL, write_rows)
+                        report['saved'] = len(write_rows)
+                    except asyncpg.PostgresError as e:
+                        # 일괄 저장 실패 시 행 단위(세이브포인트)로 나눠 실패한 행만 골라냄
+                        logger.warning(f"⚠️ 일괄 저장 실패, 행 단위 재시도: {e}")
+                        for row in write_rows:
+                            try:
+                                async with conn.transaction():
+                                    await conn.execute(self.MENU_UPSERT_SQL, *row)
+                                report['saved'] += 1
+                            except asyncpg.PostgresError as row_error:
+                                report['failures'].append({'menu_name': row[2], 'error': str(row_error)})
+                                logger.error(f"❌ 메뉴 저장 오류 ({row[2]}): {row_error}")
+                    
+                    if removed:
+                        await conn.execute("""
+                            DELETE FROM naver_menus
+                            WHERE store_id = $1 AND naver_store_id = $2 AND menu_name = ANY($3::text[])
+                        """, store_id, naver_store_id, removed)
+            
+        except Exception as e:
+            logger.error(f"❌ 메뉴 저장 오류: {e}")
+            report['saved'] = 0
+            report['failures'].append({'menu_name': None, 'error': str(e)})
+            if self.save_mode == 'sync':
+                report['changes'] = empty_menu_changes()
+        
+        report['mode'] = self.save_mode
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        logger.info(f"💾 [asyncpg/{self.save_mode}] {report['saved']}개 메뉴 저장 {report['elapsed_ms']}ms")
+        return report
+    
+    async def persist_scrape_atomic(self, log_id: int, store_id: int, naver_store_id: str,
+                                    menus: List['MenuItem'], trace: Optional[ScrapeTrace] = None) -> Dict[str, Any]:
+        """메뉴 upsert, 서버 측 통계 집계, 로그 완료를 한 트랜잭션으로 저장 (실패 시 전체 롤백 후 예외)"""
+        rows = NaverMenuScraper._menu_upsert_rows(store_id, naver_store_id, menus)
+        phase_timings, parse_strategy = trace.log_fields() if trace else (None, None)
+        round_trips = 0
+        
+        async with self.connection() as conn:
+            async with conn.transaction():
+                round_trips += 1  # BEGIN
+                if rows:
+                    # executemany는 한 번의 파이프라인으로 전송
+                    await conn.executemany(self.MENU_UPSERT_SQL, rows)
+                    round_trips += 1
+                    await conn.execute(MENU_STATS_FROM_MENUS_SQL.format(store_id='$1', naver_store_id='$2'),
+                                       store_id, naver_store_id)
+                    round_trips += 1
+                
+                await conn.execute("""
+                    UPDATE naver_scraping_logs 
+                    SET status = $1, menu_count = $2, completed_at = $3, 
+                        processing_time_ms = EXTRACT(EPOCH FROM (NOW() - started_at)) * 1000,
+                        error_message = NULL, phase_timings = $4::jsonb, parse_strategy = $5
+                    WHERE id = $6
+                """, 'success', len(menus), datetime.now(), phase_timings, parse_strategy, log_id)
+                round_trips += 1
+            round_trips += 1  # COMMIT
+        
+        report = {
+            'saved': len(rows),
+            'failures': [],
+            'duplicates': len(menus) - len(rows),
+            'round_trips': round_trips,
+            'round_trips_saved': legacy_round_trips(len(menus)) - round_trips
+        }
+        logger.info(f"💾 [asyncpg] 메뉴/통계/로그 단일 트랜잭션 저장: 왕복 {round_trips}회 (기존 대비 {report['round_trips_saved']}회 절감)")
+        return report
+    
+    async def save_image_keys(self, store_id: int, naver_store_id: str, image_keys: Dict[str, str]):
+        """메뉴별 이미지 캐시 키 기록"""
+        async with self.connection() as conn:
+            await conn.executemany("""
+                UPDATE naver_menus SET menu_image_key = $4
+                WHERE store_id = $1 AND naver_store_id = $2 AND menu_name = $3
+            """, [(store_id, naver_store_id, name, key) for name, key in image_keys.items()])
+    
+    async def update_menu_stats(self, store_id: int, naver_store_id: str, menus: List['MenuItem']):
+        """메뉴 통계 업데이트"""
+        try:
+            if not menus:
+                return
+            
+            stats = compute_menu_stats(menus)
+            async with self.connection() as conn:
+                await conn.execute("""
+                    INSERT INTO naver_menu_stats 
+                    (store_id, naver_store_id, total_menus, avg_price, min_price, max_price,
+                     popular_menu_count, signature_menu_count, last_scraped_at, scraped_success)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                    ON CONFLICT (store_id, naver_store_id) 
+                    DO UPDATE SET
+                        total_menus = EXCLUDED.total_menus,
+                        avg_price = EXCLUDED.avg_price,
+                        min_price = EXCLUDED.min_price,
+                        max_price = EXCLUDED.max_price,
+                        popular_menu_count = EXCLUDED.popular_menu_count,
+                        signature_menu_count = EXCLUDED.signature_menu_count,
+                        last_scraped_at = EXCLUDED.last_scraped_at,
+                        scraped_success = EXCLUDED.scraped_success,
+                        error_message = NULL
+                """, store_id, naver_store_id, stats['total_menus'], stats['avg_price'], stats['min_price'],
+                    stats['max_price'], stats['popular_menu_count'], stats['signature_menu_count'], datetime.now(), True)
+            
+            logger.info(f"📊 메뉴 통계 업데이트 완료: {len(menus)}개 메뉴")
+            
+        except Exception as e:
+            logger.error(f"❌ 메뉴 통계 업데이트 오류: {e}")
+
+class DryRunMenuStorage:
+    """DB 없이 스크래핑 경로만 실행하는 저장소 (부하 테스트/로컬 점검용, 저장 결과는 버림)"""
+    
+    def __init__(self, save_mode: str = 'row'):
+        self.save_mode = save_mode
+        self._log_ids = itertools.count(1)
+        self.counters = {'logs': 0, 'menus_discarded': 0}
+    
+    async def close(self):
+        pass
+    
+    def metrics(self) -> Dict[str, Any]:
+        """저장소 지표"""
+        return {'backend': 'dry-run', **self.counters}
+    
+    async def start_scraping_log(self, store_id: int, naver_store_id: str) -> int:
+        self.counters['logs'] += 1
+        return next(self._log_ids)
+    
+    async def complete_scraping_log(self, log_id: int, menu_count: int, success: bool,
+                                    error_message: str = None, status: Optional[str] = None,
+                                    trace: Optional[ScrapeTrace] = None):
+        pass
+    
+    async def load_fetch_state(self, naver_store_id: str) -> Optional[Dict[str, Any]]:
+        # 매번 전체 수집 경로를 타도록 이전 상태는 없는 것으로 처리
+        return None
+    
+    async def save_fetch_state(self, naver_store_id: str, etag: Optional[str], last_modified: Optional[str],
+                               content_hash: Optional[str], menu_count: int, menu_hash: Optional[str] = None,
+                               menus_changed: bool = False):
+        pass
+    
+    async def write_menus(self, store_id: int, naver_store_id: str, menus: List['MenuItem'],
+                          parse_strategy: Optional[str] = None) -> Dict[str, Any]:
+        self.counters['menus_discarded'] += len(menus)
+        return {'saved': len(menus), 'failures': [], 'duplicates': 0, 'mode': 'dry-run', 'elapsed_ms': 0.0}
+    
+    async def persist_scrape_atomic(self, log_id: int, store_id: int, naver_store_id: str,
+                                    menus: List['MenuItem'], trace: Optional[ScrapeTrace] = None) -> Dict[str, Any]:
+        self.counters['menus_discarded'] += len(menus)
+        return {'saved': len(menus), 'failures': [], 'duplicates': 0, 'round_trips': 0, 'round_trips_saved': 0}
+    
+    async def save_image_keys(self, store_id: int, naver_store_id: str, image_keys: Dict[str, str]):
+        pass
+    
+    async def update_menu_stats(self, store_id: int, naver_store_id: str, menus: List['MenuItem']):
+        pass
+
+class TokenBucket:
+    """토큰 버킷 레이트 리미터 (초당 rate개, 최대 burst개 누적)"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> float:
+        """토큰 1개 획득 (대기한 시간(초) 반환)"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+class NaverTransport:
+    """네이버 요청 전송 계층 (호스트별 레이트 리밋, 재시도/백오프, 커넥터 튜닝)"""
+    
+    # 재시도 대상 상태 코드
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, headers: Dict[str, str], rate_per_host: float = 2.0, burst: int = 4,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 limit: int = 100, limit_per_host: int = 8, dns_ttl: int = 300,
+                 keepalive_timeout: float = 30.0, timeout: float = 30.0):
+        self.headers = headers
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.session = None
+        self._buckets = {}
+        
+        # 지표
+        self.counters = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'rate_limited': 0,
+            'rate_limit_wait_ms': 0.0,
+            'errors': 0,
+            'body_bytes_read': 0,
+            'body_bytes_skipped': 0,
+            'streams_stopped_early': 0,
+            'bodies_too_large': 0
+        }
+        self.status_counts = {}
+    
+    async def open(self) -> aiohttp.ClientSession:
+        """튜닝된 커넥터로 공유 세션 생성"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+    
+    async def close(self):
+        """세션 종료"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+    
+    def _bucket(self, url: str) -> TokenBucket:
+        """URL 호스트의 토큰 버킷"""
+        host = urlparse(url).hostname or ''
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return bucket
+    
+    def _backoff(self, attempt: int) -> float:
+        """지수 백오프 + 전체 지터"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _retry_after(self, response) -> Optional[float]:
+        """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 시간(초)으로 변환"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(self.backoff_max, max(0.0, delay))
+    
+    @asynccontextmanager
+    async def request(self, method: str, url: str, status_log: Optional[List[int]] = None, **kwargs):
+        """레이트 리밋과 재시도를 적용한 요청 (최종 응답을 컨텍스트로 반환, status_log에 재시도 포함 응답 코드 기록)"""
+        session = await self.open()
+        bucket = self._bucket(url)
+        attempt = 0
+        
+        while True:
+            waited = await bucket.acquire()
+            if waited > 0:
+                self.counters['rate_limited'] += 1
+                self.counters['rate_limit_wait_ms'] += waited * 1000
+            
+            self.counters['requests'] += 1
+            try:
+                response = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.counters['errors'] += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"🔁 요청 오류 재시도 {attempt + 1}/{self.max_retries} ({delay:.2f}초 후): {e!r}")
+            else:
+                self.status_counts[response.status] = self.status_counts.get(response.status, 0) + 1
+                if status_log is not None:
+                    status_log.append(response.status)
+                if response.status not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    try:
+                        yield response
+                    finally:
+                        response.release()
+                    return
+                
+                if response.status == 429:
+                    self.counters['throttled'] += 1
+                retry_after = self._retry_after(response)
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                response.release()
+                logger.warning(f"🔁 HTTP {response.status} 재시도 {attempt + 1}/{self.max_retries} ({delay:.2f}초 후)")
+            
+            self.counters['retries'] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    def get(self, url: str, **kwargs):
+        """GET 요청"""
+        return self.request('GET', url, **kwargs)
+    
+    async def read_body(self, response, max_bytes: Optional[int] = None, stream: bool = True) -> Tuple[str, Dict[str, Any]]:
+        """응답 본문 수신 (stream이면 메뉴 영역까지만 읽음) 후 바이트 지표 기록"""
+        try:
+            html, report = await read_menu_body(response, max_bytes, early_stop=stream)
+        except ResponseTooLarge:
+            self.counters['bodies_too_large'] += 1
+            raise
+        
+        self.counters['body_bytes_read'] += report['bytes_read']
+        self.counters['body_bytes_skipped'] += report['bytes_skipped'] or 0
+        if report['stopped_early']:
+            self.counters['streams_stopped_early'] += 1
+        return html, report
+    
+    def metrics(self) -> Dict[str, Any]:
+        """전송 계층 지표"""
+        return {
+            **self.counters,
+            'rate_limit_wait_ms': round(self.counters['rate_limit_wait_ms'], 3),
+            'status_counts': {str(status): count for status, count in sorted(self.status_counts.items())}
+        }
+
+class MenuImageCache:
+    """메뉴 이미지 로컬 캐시 (내용 해시로 주소 지정, 매장 간 중복 제거, 크기 제한 LRU 제거)
+    
+    원본은 objects/<키 앞 2자리>/<키>, 썸네일은 thumbs/<키 앞 2자리>/<키>.jpg에 저장하고
+    이미지 URL → 키 색인은 index.json에 유지한다. 썸네일은 Pillow가 설치된 경우에만 만든다.
+    """
+    
+    INDEX_FILE = 'index.json'
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, thumb_size: int = 240,
+                 concurrency: int = 8, max_image_bytes: int = 5 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.thumb_size = thumb_size
+        self.concurrency = concurrency
+        self.max_image_bytes = max_image_bytes
+        self._entries = OrderedDict()  # 키 → 원본+썸네일 크기 (오래 안 쓴 순)
+        self._url_index = {}
+        self._inflight = {}
+        self.total_bytes = 0
+        self.counters = {
+            'hits': 0,
+            'fetched': 0,
+            'deduplicated': 0,
+            'bytes_fetched': 0,
+            'thumbnails': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+        
+        if Image is None:
+            logger.warning("⚠️ Pillow가 설치되어 있지 않아 썸네일을 만들지 않습니다. (pip install Pillow)")
+    
+    def object_path(self, key: str) -> str:
+        """원본 이미지 경로"""
+        return os.path.join(self.cache_dir, 'objects', key[:2], key)
+    
+    def thumb_path(self, key: str) -> str:
+        """썸네일 경로"""
+        return os.path.join(self.cache_dir, 'thumbs', key[:2], f"{key}.jpg")
+    
+    def _entry_size(self, key: str) -> int:
+        """원본과 썸네일의 디스크 크기"""
+        size = 0
+        for path in (self.object_path(key), self.thumb_path(key)):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+        return size
+    
+    def _load(self):
+        """디스크의 캐시 항목을 마지막 사용 시각 순으로 읽고 URL 색인 복원"""
+        objects = []
+        for path in glob.glob(os.path.join(self.cache_dir, 'objects', '*', '*')):
+            key = os.path.basename(path)
+            if len(key) == 64:
+                objects.append((os.path.getmtime(path), key))
+        for _, key in sorted(objects):
+            size = self._entry_size(key)
+            self._entries[key] = size
+            self.total_bytes += size
+        
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, encoding='utf-8') as f:
+                    index = json.load(f)
+                self._url_index = {url: key for url, key in index.items() if key in self._entries}
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 이미지 캐시 색인을 읽을 수 없어 새로 만듭니다: {e}")
+    
+    def save_index(self):
+        """URL 색인 저장 (임시 파일에 쓴 뒤 교체)"""
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._url_index, f)
+        os.replace(tmp_path, index_path)
+    
+    def _touch(self, key: str):
+        """LRU 순서 갱신 (재시작 후에도 유지되도록 파일 mtime도 갱신)"""
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self.object_path(key))
+        except OSError:
+            pass
+    
+    def _write_object(self, key: str, data: bytes) -> int:
+        """원본과 썸네일 기록 (실행기 스레드에서 호출, 기록한 바이트 수 반환)"""
+        path = self.object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+        if Image is not None:
+            try:
+                thumb = self.thumb_path(key)
+                os.makedirs(os.path.dirname(thumb), exist_ok=True)
+                with Image.open(path) as image:
+                    image = image.convert('RGB')
+                    # 비율을 유지해 축소한 뒤 정사각형으로 가운데 맞춤
+                    image.thumbnail((self.thumb_size, self.thumb_size))
+                    canvas = Image.new('RGB', (self.thumb_size, self.thumb_size), (255, 255, 255))
+                    canvas.paste(image, ((self.thumb_size - image.width) // 2, (self.thumb_size - image.height) // 2))
+                    canvas.save(thumb, 'JPEG', quality=85)
+                self.counters['thumbnails'] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ 썸네일 생성 실패 ({key[:12]}): {e}")
+        
+        return self._entry_size(key)
+    
+    def evict(self):
+        """최대 크기를 넘으면 가장 오래 안 쓴 항목부터 제거"""
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            for path in (self.object_path(key), self.thumb_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._url_index = {url: value for url, value in self._url_index.items() if value != key}
+            self.counters['evictions'] += 1
+    
+    async def _fetch(self, transport: 'NaverTransport', url: str) -> Optional[str]:
+        """이미지 한 장을 받아 캐시에 저장 (캐시 키 반환)"""
+        key = self._url_index.get(url)
+        if key and key in self._entries:
+            self.counters['hits'] += 1
+            self._touch(key)
+            return key
+        
+        async with transport.get(url) as response:
+            if response.status != 200:
+                raise Exception(f"HTTP {response.status}")
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and not content_type.startswith('image/'):
+                raise Exception(f"이미지가 아님: {content_type}")
+            if response.content_length and response.content_length > self.max_image_bytes:
+                raise ResponseTooLarge(f"이미지 크기 초과: {response.content_length:,}바이트")
+            data = await response.read()
+        
+        self.counters['fetched'] += 1
+        self.counters['bytes_fetched'] += len(data)
+        if len(data) > self.max_image_bytes:
+            raise ResponseTooLarge(f"이미지 크기 초과: {len(data):,}바이트")
+        
+        key = hashlib.sha256(data).hexdigest()
+        if key in self._entries:
+            # 다른 URL(다른 매장)에서 이미 받은 같은 이미지
+            self.counters['deduplicated'] += 1
+            self._touch(key)
+        else:
+            loop = asyncio.get_running_loop()
+            size = await loop.run_in_executor(None, self._write_object, key, data)
+            # 같은 내용을 다른 URL에서 동시에 받은 경우 한 번만 계산
+            if key in self._entries:
+                self.counters['deduplicated'] += 1
+                self._touch(key)
+            else:
+                self._entries[key] = size
+                self.total_bytes += size
+        
+        self._url_index[url] = key
+        return key
+    
+    async def fetch(self, transport: 'NaverTransport', url: str) -> Optional[str]:
+        """이미지 캐시 키 조회 (같은 URL 동시 요청은 한 번만 받음, 실패 시 None)"""
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.ensure_future(self._fetch(transport, url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.warning(f"⚠️ 메뉴 이미지 캐시 실패 ({url}): {e}")
+            return None
+    
+    async def fetch_all(self, transport: 'NaverTransport', urls: List[str]) -> Dict[str, str]:
+        """여러 이미지를 동시에 받아 URL → 캐시 키 반환 (끝나면 LRU 제거와 색인 저장)"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def fetch_one(url: str):
+            async with semaphore:
+                return url, await self.fetch(transport, url)
+        
+        results = await asyncio.gather(*(fetch_one(url) for url in dict.fromkeys(urls)))
+        self.evict()
+        try:
+            self.save_index()
+        except OSError as e:
+            logger.warning(f"⚠️ 이미지 캐시 색인 저장 실패: {e}")
+        return {url: key for url, key in results if key and key in self._entries}
+    
+    def metrics(self) -> Dict[str, Any]:
+        """이미지 캐시 지표"""
+        return {
+            **self.counters,
+            'entries': len(self._entries),
+            'total_bytes': self.total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
 class NaverMenuScraper:
     """네이버 메뉴 스크래핑 클래스"""
     
-    def __init__(self, db_config: Dict[str, str]):
+    # 메뉴 저장 방식: row(메뉴별 INSERT), bulk(다중 행 VALUES 일괄 upsert),
+    # sync(기존 행과 비교해 추가/변경/삭제분만 반영),
+    # atomic(일괄 upsert + 서버 측 통계 + 로그 완료를 한 트랜잭션으로)
+    SAVE_MODES = ('row', 'bulk', 'sync', 'atomic')
+    
+    # DB 저장소: psycopg2(동기, 기본), asyncpg(비동기, 이벤트 루프를 막지 않음)
+    STORAGE_BACKENDS = ('psycopg2', 'asyncpg', 'dry-run')
+    
+    # 파싱 실행기: process(프로세스 풀), thread(스레드 풀), inline(이벤트 루프에서 직접)
+    PARSE_EXECUTORS = ('process', 'thread', 'inline')
+    
+    # 다중 행 VALUES upsert (execute_values용)
+    MENU_UPSERT_SQL = """
+        INSERT INTO naver_menus 
+        (store_id, naver_store_id, menu_name, menu_price, menu_description, 
+         menu_category, menu_image_url, menu_rating, menu_review_count,
+         is_popular, is_signature, naver_menu_id, scraped_at)
+        VALUES %s
+        ON CONFLICT (store_id, naver_store_id, menu_name) 
+        DO UPDATE SET
+            menu_price = EXCLUDED.menu_price,
+            menu_description = EXCLUDED.menu_description,
+            menu_category = EXCLUDED.menu_category,
+            menu_image_url = EXCLUDED.menu_image_url,
+            menu_rating = EXCLUDED.menu_rating,
+            menu_review_count = EXCLUDED.menu_review_count,
+            is_popular = EXCLUDED.is_popular,
+            is_signature = EXCLUDED.is_signature,
+            updated_at = NOW()
+    """
+    
+    def __init__(self, db_config: Dict[str, str], pool_min: int = 1, pool_max: int = 5,
+                 db_pool: Optional[DBConnectionPool] = None, save_mode: str = 'row',
+                 conditional_fetch: bool = True, transport: Optional[NaverTransport] = None,
+                 transport_options: Optional[Dict[str, Any]] = None,
+                 parse_executor: str = 'inline', parse_workers: Optional[int] = None,
+                 storage: str = 'psycopg2', stream_fetch: bool = True,
+                 max_body_bytes: Optional[int] = 5 * 1024 * 1024,
+                 image_cache: Optional[MenuImageCache] = None,
+                 trace_hooks: Optional[List[Callable[[ScrapeTrace], None]]] = None,
+                 menu_url_template: Optional[str] = None):
+        if save_mode not in self.SAVE_MODES:
+            raise ValueError(f"지원하지 않는 저장 방식: {save_mode}")
+        if parse_executor not in self.PARSE_EXECUTORS:
+            raise ValueError(f"지원하지 않는 파싱 실행기: {parse_executor}")
+        if storage not in self.STORAGE_BACKENDS:
+            raise ValueError(f"지원하지 않는 저장소: {storage}")
+        
         self.db_config = db_config
+        self.save_mode = save_mode
+        self.conditional_fetch = conditional_fetch
+        self.stream_fetch = stream_fetch
+        self.max_body_bytes = max_body_bytes
+        self.image_cache = image_cache
+        self.trace_hooks = list(trace_hooks or [])
+        self.menu_url_template = menu_url_template or MENU_URL_TEMPLATE
         self.session = None
+        self.pool_min = pool_min
+        self.pool_max = pool_max
+        self.db_pool = db_pool
+        self._owns_pool = db_pool is None
+        self._pool_lock = threading.Lock()
+        self.storage = storage
+        if storage == 'asyncpg':
+            self.async_storage = AsyncMenuStorage(db_config, pool_min, pool_max, save_mode)
+        elif storage == 'dry-run':
+            self.async_storage = DryRunMenuStorage(save_mode)
+        else:
+            self.async_storage = None
+        self.parse_executor = parse_executor
+        self.parse_workers = parse_workers
+        self._executor = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -61,99 +1506,392 @@ class NaverMenuScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
+        self.transport = transport or NaverTransport(self.headers, **(transport_options or {}))
+        self._owns_transport = transport is None
         
     async def __aenter__(self):
         """비동기 컨텍스트 매니저 진입"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = await self.transport.open()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """비동기 컨텍스트 매니저 종료"""
-        if self.session:
-            await self.session.close()
+        if self._owns_transport:
+            await self.transport.close()
+        self.session = None
+        if self._owns_pool and self.db_pool:
+            self.db_pool.closeall()
+            self.db_pool = None
+        if self.async_storage:
+            await self.async_storage.close()
+        self.shutdown_parse_executor()
+    
+    async def _db(self, method: str, *args, **kwargs):
+        """선택한 저장소로 DB 작업 위임 (asyncpg면 await, psycopg2면 기본 스레드 풀에서 실행)
+
+        psycopg2 호출과 연결 풀 대기는 블로킹이므로 이벤트 루프에서 직접 부르면 같은 루프의
+        다른 스크래핑/요청이 모두 멈춘다 (async_server에서 SCRAPER_STORAGE=psycopg2일 때).
+        """
+        if self.async_storage:
+            return await getattr(self.async_storage, method)(*args, **kwargs)
+        return await asyncio.to_thread(getattr(self, method), *args, **kwargs)
+    
+    def get_parse_executor(self) -> Optional[Executor]:
+        """파싱 실행기 (최초 사용 시 생성, inline이면 None)"""
+        if self._executor is None and self.parse_executor != 'inline':
+            if self.parse_executor == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix='menu-parse')
+        return self._executor
+    
+    def shutdown_parse_executor(self):
+        """파싱 실행기 종료"""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    async def parse_menus(self, html: str, naver_store_id: str, trace: Optional[ScrapeTrace] = None) -> List[MenuItem]:
+        """실행기에서 메뉴 파싱 (CPU 작업이 이벤트 루프와 다른 요청의 I/O를 막지 않도록, trace에 파싱 전략 기록)"""
+        executor = self.get_parse_executor()
+        if executor is None:
+            menus, strategy = self.parse_menu_page(html, naver_store_id)
+            if trace:
+                trace.strategy = strategy
+            return menus
+        
+        loop = asyncio.get_running_loop()
+        try:
+            rows, strategy = await loop.run_in_executor(executor, parse_menu_html_worker, html, naver_store_id)
+        except BrokenProcessPool as e:
+            # 워커가 비정상 종료되면 풀을 다시 만들도록 비우고 이번 페이지는 직접 파싱
+            logger.error(f"❌ 파싱 프로세스 풀 오류, 직접 파싱으로 대체: {e}")
+            executor.shutdown(wait=False)
+            self._executor = None
+            menus, strategy = self.parse_menu_page(html, naver_store_id)
+        else:
+            menus = [MenuItem(*row) for row in rows]
+        
+        if trace:
+            trace.strategy = strategy
+        return menus
     
     def get_db_connection(self):
         """데이터베이스 연결"""
         return psycopg2.connect(**self.db_config)
     
+    def get_db_pool(self) -> DBConnectionPool:
+        """공유 연결 풀 (최초 사용 시 생성)"""
+        if self.db_pool is None:
+            with self._pool_lock:
+                if self.db_pool is None:
+                    self.db_pool = DBConnectionPool(self.db_config, self.pool_min, self.pool_max)
+        return self.db_pool
+    
+    def db_connection(self):
+        """풀에서 연결을 빌리는 컨텍스트 매니저"""
+        return self.get_db_pool().connection()
+    
+    def pool_metrics(self) -> Dict[str, Any]:
+        """연결 풀 지표 (풀이 아직 없으면 빈 딕셔너리)"""
+        if self.async_storage:
+            return self.async_storage.metrics()
+        return self.db_pool.metrics() if self.db_pool else {}
+    
     async def scrape_menu(self, naver_store_id: str, store_id: int) -> List[MenuItem]:
         """네이버 가게 ID로 메뉴 정보 스크래핑"""
+        result = await self.scrape_store(naver_store_id, store_id)
+        return result.menus
+    
+    async def scrape_store(self, naver_store_id: str, store_id: int) -> ScrapeResult:
+        """네이버 가게 ID로 메뉴 정보 스크래핑 (매장 단위 결과 반환, 완료 시 추적 훅 호출)"""
+        trace = ScrapeTrace(store_id, naver_store_id)
+        result = await self._scrape_store(naver_store_id, store_id, trace)
+        trace.finish(result)
+        self._emit_trace(trace)
+        return result
+    
+    async def _scrape_store(self, naver_store_id: str, store_id: int, trace: 'ScrapeTrace') -> ScrapeResult:
+        """매장 단위 스크래핑 본체 (단계별 구간 시간과 파싱 전략을 trace에 기록)"""
+        started = time.perf_counter()
+        log_id = 0
+        http_status = None
         try:
             logger.info(f"🍽️ [매장 {store_id}] 메뉴 스크래핑 시작 - 네이버 ID: {naver_store_id}")
             
             # 스크래핑 로그 시작
-            log_id = self.start_scraping_log(store_id, naver_store_id)
+            log_id = await self._db('start_scraping_log', store_id, naver_store_id)
             
             # 네이버 메뉴 URL 생성 (모바일 플레이스)
-            url = f"https://m.place.naver.com/restaurant/{naver_store_id}/menu/list"
+            url = self.menu_url_template.format(naver_store_id=naver_store_id)
+            
+            # 이전 수집 상태가 있으면 조건부 요청
+            fetch_state = await self._db('load_fetch_state', naver_store_id) if self.conditional_fetch else None
+            request_headers = {}
+            if fetch_state:
+                if fetch_state.get('etag'):
+                    request_headers['If-None-Match'] = fetch_state['etag']
+                if fetch_state.get('last_modified'):
+                    request_headers['If-Modified-Since'] = fetch_state['last_modified']
             
             # 페이지 요청
-            async with self.session.get(url, timeout=30) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}: {response.reason}")
-                
-                html = await response.text()
-                
-
-                
+            with trace.span('fetch'):
+                async with self.transport.get(url, headers=request_headers, status_log=trace.http_statuses) as response:
+                    http_status = response.status
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    
+                    if response.status == 304 and fetch_state:
+                        unchanged = True
+                    elif response.status != 200:
+                        raise Exception(f"HTTP {response.status}: {response.reason}")
+                    else:
+                        unchanged = False
+                        # 스트리밍이면 메뉴 영역까지만 읽음 (최대 크기 초과 시 실패)
+                        html, fetch_report = await self.transport.read_body(response, self.max_body_bytes,
+                                                                            stream=self.stream_fetch)
+            
+            # 내용이 이전과 같으면 파싱/저장 생략
+            if not unchanged:
+                content_hash = menu_content_hash(html)
+                unchanged = bool(fetch_state and fetch_state.get('content_hash') == content_hash)
+            if unchanged:
+                return await self._finish_unchanged(store_id, naver_store_id, log_id, fetch_state,
+                                                    etag, last_modified, started, trace)
+            
             # 메뉴 정보 파싱
-            menus = self.parse_menu_from_html(html, naver_store_id)
+            with trace.span('parse'):
+                menus = await self.parse_menus(html, naver_store_id, trace)
             
-            # 데이터베이스에 저장
-            saved_count = self.save_menus_to_db(store_id, naver_store_id, menus)
+            if self.save_mode == 'atomic':
+                # 메뉴/통계/로그 완료를 한 트랜잭션으로 저장 (통계 갱신 시간은 save에 포함)
+                with trace.span('save'):
+                    write_report = await self._db('persist_scrape_atomic', log_id, store_id, naver_store_id, menus,
+                                                  trace=trace)
+                write_report['mode'] = 'atomic'
+                write_report['elapsed_ms'] = trace.spans['save']
+                saved_count = write_report['saved']
+            else:
+                # 데이터베이스에 저장
+                with trace.span('save'):
+                    write_report = await self._db('write_menus', store_id, naver_store_id, menus,
+                                                  parse_strategy=trace.strategy)
+                saved_count = write_report['saved']
+                
+                # 통계 업데이트
+                with trace.span('stats'):
+                    await self._db('update_menu_stats', store_id, naver_store_id, menus)
+                
+                # 스크래핑 로그 완료
+                await self._db('complete_scraping_log', log_id, len(menus), True, trace=trace)
             
-            # 통계 업데이트
-            self.update_menu_stats(store_id, naver_store_id, menus)
+            # 메뉴 이미지 캐시 (선택, 실패해도 스크래핑은 성공)
+            images_cached = 0
+            if self.image_cache:
+                with trace.span('images'):
+                    images_cached = await self.cache_menu_images(store_id, naver_store_id, menus)
             
-            # 스크래핑 로그 완료
-            self.complete_scraping_log(log_id, len(menus), True)
+            # 다음 조건부 요청을 위한 수집 상태 기록 (메뉴를 찾고 모두 저장된 경우에만)
+            # 저장이 실패했는데 해시를 남기면 이후 요청이 모두 "변경 없음"으로 끝나 메뉴가 영영 저장되지 않음
+            # 갱신 주기용 메뉴 변경 시각은 페이지 해시가 아니라 메뉴 추가/변경/삭제 기준
+            if self.conditional_fetch and menus and not write_report['failures']:
+                menu_hash = menu_items_hash(menus)
+                await self._db('save_fetch_state', naver_store_id, etag, last_modified, content_hash, len(menus),
+                               menu_hash=menu_hash, menus_changed=menus_changed(write_report, menu_hash, fetch_state))
             
             logger.info(f"✅ [매장 {store_id}] 메뉴 스크래핑 완료 - {len(menus)}개 메뉴, {saved_count}개 저장")
-            return menus
+            return ScrapeResult(
+                store_id=store_id,
+                naver_store_id=naver_store_id,
+                success=True,
+                menus=menus,
+                saved_count=saved_count,
+                write_report=write_report,
+                fetch_report=fetch_report,
+                images_cached=images_cached,
+                http_status=http_status,
+                http_statuses=trace.http_statuses,
+                phase_ms=trace.spans,
+                parse_strategy=trace.strategy,
+                elapsed_ms=int((time.perf_counter() - started) * 1000)
+            )
             
         except Exception as e:
             logger.error(f"❌ [매장 {store_id}] 메뉴 스크래핑 실패: {e}")
-            self.complete_scraping_log(log_id, 0, False, str(e))
-            return []
+            await self._db('complete_scraping_log', log_id, 0, False, str(e), trace=trace)
+            return ScrapeResult(
+                store_id=store_id,
+                naver_store_id=naver_store_id,
+                success=False,
+                status='failed',
+                error=str(e),
+                http_status=http_status,
+                http_statuses=trace.http_statuses,
+                phase_ms=trace.spans,
+                parse_strategy=trace.strategy,
+                elapsed_ms=int((time.perf_counter() - started) * 1000)
+            )
+    
+    def add_trace_hook(self, hook: Callable[['ScrapeTrace'], None]):
+        """매장 스크래핑이 끝날 때마다 ScrapeTrace를 받는 훅 등록 (훅의 예외는 기록만 하고 무시)"""
+        self.trace_hooks.append(hook)
+    
+    def _emit_trace(self, trace: 'ScrapeTrace'):
+        """추적 결과를 JSON 로그 한 줄로 남기고 훅 호출"""
+        trace_logger.info(json.dumps(trace.to_dict(), ensure_ascii=False))
+        for hook in self.trace_hooks:
+            try:
+                hook(trace)
+            except Exception as e:
+                logger.error(f"❌ 추적 훅 오류: {e}")
+    
+    async def cache_menu_images(self, store_id: int, naver_store_id: str, menus: List[MenuItem]) -> int:
+        """메뉴 이미지를 공유 세션으로 동시에 받아 캐시하고 naver_menus에 캐시 키 기록"""
+        urls = {menu.name: menu.image_url for menu in menus if menu.image_url}
+        if not urls:
+            return 0
+        
+        try:
+            keys_by_url = await self.image_cache.fetch_all(self.transport, list(urls.values()))
+            image_keys = {name: keys_by_url[url] for name, url in urls.items() if url in keys_by_url}
+            if image_keys:
+                await self._db('save_image_keys', store_id, naver_store_id, image_keys)
+            logger.info(f"🖼️ [매장 {store_id}] 메뉴 이미지 {len(image_keys)}/{len(urls)}개 캐시")
+            return len(image_keys)
+            
+        except Exception as e:
+            logger.error(f"❌ [매장 {store_id}] 메뉴 이미지 캐시 오류: {e}")
+            return 0
     
-    def parse_menu_from_html(self, html: str, naver_store_id: str) -> List[MenuItem]:
+    async def _finish_unchanged(self, store_id: int, naver_store_id: str, log_id: int, fetch_state: Dict[str, Any],
+                                etag: Optional[str], last_modified: Optional[str], started: float,
+                                trace: 'ScrapeTrace') -> ScrapeResult:
+        """변경 없는 페이지 처리 (파싱/저장/통계 생략, 로그는 unchanged로 기록)"""
+        menu_count = fetch_state.get('menu_count') or 0
+        await self._db('complete_scraping_log', log_id, menu_count, True, status='unchanged', trace=trace)
+        await self._db(
+            'save_fetch_state',
+            naver_store_id,
+            etag or fetch_state.get('etag'),
+            last_modified or fetch_state.get('last_modified'),
+            fetch_state.get('content_hash'),
+            menu_count,
+            menu_hash=fetch_state.get('menu_hash')
+        )
+        
+        logger.info(f"⏭️ [매장 {store_id}] 메뉴 변경 없음 - 저장 생략")
+        return ScrapeResult(
+            store_id=store_id,
+            naver_store_id=naver_store_id,
+            success=True,
+            status='unchanged',
+            menu_count=menu_count,
+            http_status=trace.http_statuses[-1] if trace.http_statuses else None,
+            http_statuses=trace.http_statuses,
+            phase_ms=trace.spans,
+            elapsed_ms=int((time.perf_counter() - started) * 1000)
+        )
+    
+    async def scrape_many(self, stores: List[Dict[str, Any]], concurrency: int = 5) -> Dict[str, Any]:
+        """여러 매장을 하나의 세션으로 동시 스크래핑 (동시 실행 수 제한)"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        started = time.perf_counter()
+        
+        async def run_one(store: Dict[str, Any]) -> ScrapeResult:
+            async with semaphore:
+                return await self.scrape_store(str(store['naver_store_id']), int(store['store_id']))
+        
+        logger.info(f"🚚 [일괄 스크래핑] 시작 - {len(stores)}개 매장, 동시 실행 {concurrency}")
+        results = await asyncio.gather(*(run_one(store) for store in stores))
+        elapsed = time.perf_counter() - started
+        
+        succeeded = sum(1 for result in results if result.success)
+        unchanged = sum(1 for result in results if result.status == 'unchanged')
+        total_menus = sum(len(result.menus) for result in results)
+        summary = {
+            'store_count': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'unchanged': unchanged,
+            'menu_count': total_menus,
+            'concurrency': concurrency,
+            'elapsed_sec': round(elapsed, 3),
+            'stores_per_sec': round(len(results) / elapsed, 3) if elapsed > 0 else None,
+            'menus_per_sec': round(total_menus / elapsed, 3) if elapsed > 0 else None,
+            'save_mode': self.save_mode,
+            'save_ms_total': sum(result.write_report.get('elapsed_ms', 0) for result in results),
+            'db_round_trips_saved': sum(result.write_report.get('round_trips_saved', 0) for result in results),
+            'db_pool': self.pool_metrics(),
+            'transport': self.transport.metrics(),
+            'image_cache': self.image_cache.metrics() if self.image_cache else None,
+            'results': [result.to_dict() for result in results]
+        }
+        
+        logger.info(
+            f"✅ [일괄 스크래핑] 완료 - 성공 {succeeded}/{len(results)}, "
+            f"{summary['elapsed_sec']}초, {summary['stores_per_sec']}매장/초"
+        )
+        return summary
+    
+    @staticmethod
+    def _as_page(source: Union[str, ParsedPage]) -> ParsedPage:
+        """HTML 문자열이면 파싱하고, 이미 파싱된 문서면 그대로 반환"""
+        return source if isinstance(source, ParsedPage) else ParsedPage(source)
+    
+    def parse_menu_from_html(self, html: Union[str, ParsedPage], naver_store_id: str) -> List[MenuItem]:
         """HTML에서 메뉴 정보 파싱 (모바일 네이버 플레이스)"""
+        return self.parse_menu_page(html, naver_store_id)[0]
+    
+    def parse_menu_page(self, html: Union[str, ParsedPage], naver_store_id: str) -> Tuple[List[MenuItem], str]:
+        """HTML에서 메뉴 정보 파싱 후 (메뉴 목록, 메뉴를 찾은 전략) 반환
+        
+        전략: e2jtl(li.E2jtL), string_pattern(이름_가격_원 요소), text_pattern(본문 텍스트),
+        json(스크립트 상태 객체), placeholder(기본 메뉴), none(못 찾음), error(파싱 오류)
+        """
         menus = []
-        soup = BeautifulSoup(html, 'html.parser')
+        strategy = 'none'
         
         try:
+            # 문서는 한 번만 파싱하고 모든 대체 전략이 공유
+            page = self._as_page(html)
+            soup = page.soup
+            
             # 모바일 네이버 플레이스 메뉴 패턴 파싱
             # CSS 선택자: li.E2jtL (메뉴 항목)
             menu_items = soup.find_all('li', class_='E2jtL')
+            item_strategy = 'e2jtl'
             
             if not menu_items:
                 # 다른 패턴 시도
                 menu_items = soup.find_all(['li', 'div'], string=re.compile(r'.*_.*_원.*'))
+                item_strategy = 'string_pattern'
             
             for item in menu_items:
                 menu = self.extract_menu_item_mobile(item)
                 if menu:
                     menu.naver_menu_id = f"{naver_store_id}_{len(menus)}"
                     menus.append(menu)
+            if menus:
+                strategy = item_strategy
             
             # 메뉴가 없으면 텍스트 기반 파싱 시도
             if not menus:
-                menus = self.parse_menu_from_text(html, naver_store_id)
-            
-            # 메뉴가 없으면 텍스트 기반 파싱 시도
-            if not menus:
-                menus = self.parse_menu_from_text(html, naver_store_id)
+                menus = self.parse_menu_from_text(page, naver_store_id)
+                if menus:
+                    strategy = 'text_pattern'
             
             # 메뉴가 없으면 다른 패턴 시도
             if not menus:
-                menus = self.parse_menu_alternative(html, naver_store_id)
+                menus = self.parse_menu_alternative(page, naver_store_id)
+                if menus:
+                    strategy = 'placeholder' if menus[0].naver_menu_id == f"{naver_store_id}_default" else 'json'
             
-            logger.info(f"📋 메뉴 파싱 완료: {len(menus)}개 메뉴 발견")
-            return menus
+            logger.info(f"📋 메뉴 파싱 완료: {len(menus)}개 메뉴 발견 ({strategy})")
+            return menus, strategy
             
         except Exception as e:
             logger.error(f"❌ 메뉴 파싱 오류: {e}")
-            return []
+            return [], 'error'
     
     def extract_menu_item_mobile(self, item_element) -> Optional[MenuItem]:
         """모바일 네이버 플레이스 메뉴 아이템 요소에서 정보 추출"""
@@ -284,14 +2022,13 @@ class NaverMenuScraper:
             logger.error(f"❌ 메뉴 아이템 추출 오류: {e}")
             return None
     
-    def parse_menu_from_text(self, html: str, naver_store_id: str) -> List[MenuItem]:
+    def parse_menu_from_text(self, html: Union[str, ParsedPage], naver_store_id: str) -> List[MenuItem]:
         """텍스트 기반 메뉴 파싱 (모바일 네이버 플레이스)"""
         menus = []
         
         try:
-            # HTML에서 텍스트 추출
-            soup = BeautifulSoup(html, 'html.parser')
-            text_content = soup.get_text()
+            # HTML에서 텍스트 추출 (파싱된 문서의 텍스트 재사용)
+            text_content = self._as_page(html).text
             
             # 모바일 네이버 플레이스 메뉴 패턴 찾기
             # "메뉴명_가격_원설명" 패턴
@@ -326,12 +2063,13 @@ class NaverMenuScraper:
             logger.error(f"❌ 텍스트 기반 메뉴 파싱 오류: {e}")
             return []
     
-    def parse_menu_alternative(self, html: str, naver_store_id: str) -> List[MenuItem]:
+    def parse_menu_alternative(self, html: Union[str, ParsedPage], naver_store_id: str) -> List[MenuItem]:
         """대체 메뉴 파싱 방법"""
         menus = []
-        soup = BeautifulSoup(html, 'html.parser')
         
         try:
+            soup = self._as_page(html).soup
+            
             # JSON 데이터에서 메뉴 정보 찾기
             scripts = soup.find_all('script')
             for script in scripts:
@@ -364,20 +2102,28 @@ class NaverMenuScraper:
         return menus
     
     def extract_json_from_script(self, script_content: str) -> Optional[Dict]:
-        """스크립트에서 JSON 데이터 추출"""
-        try:
-            # JSON 패턴 찾기
-            json_patterns = [
-                r'window\.__INITIAL_STATE__\s*=\s*({.*?});',
-                r'window\.__NEXT_DATA__\s*=\s*({.*?});',
-                r'"menu":\s*(\[.*?\])',
-                r'"menus":\s*(\[.*?\])'
-            ]
-            
-            for pattern in json_patterns:
-                match = re.search(pattern, script_content, re.DOTALL)
+        """스크립트에서 JSON 데이터 추출 (할당 위치를 찾아 값 하나만 선형 시간에 디코딩)"""
+        try:
+            # window.__INITIAL_STATE__ = {...}; 형태의 상태 할당
+            for pattern in JSON_ASSIGNMENT_PATTERNS:
+                match = pattern.search(script_content)
                 if match:
-                    return json.loads(match.group(1))
+                    value = decode_json_at(script_content, match.end())
+                    if isinstance(value, dict):
+                        return value
+            
+            # <script type="application/json"> 처럼 스크립트 전체가 JSON인 경우
+            start = len(script_content) - len(script_content.lstrip())
+            if script_content[start:start + 1] == '{':
+                value = decode_json_at(script_content, start)
+                if isinstance(value, dict):
+                    return value
+            
+            # "menu": [...] 배열만 있는 경우
+            for match in JSON_ARRAY_KEY_PATTERN.finditer(script_content):
+                value = decode_json_at(script_content, match.end())
+                if isinstance(value, list):
+                    return {match.group(1): value}
             
             return None
             
@@ -399,12 +2145,22 @@ class NaverMenuScraper:
                 []
             )
             
+            # 최상위에 없으면 중첩된 상태(__NEXT_DATA__ props, Apollo 캐시)를 순회해 가장 큰 메뉴 배열 사용
+            if not isinstance(menu_data, list) or not menu_data:
+                candidates = find_menu_arrays(json_data)
+                menu_data = max(candidates, key=len) if candidates else []
+            
             if isinstance(menu_data, list):
                 for i, item in enumerate(menu_data):
                     if isinstance(item, dict):
+                        price = item.get('price')
+                        if isinstance(price, str):
+                            price_match = re.search(r'(\d+(?:,\d{3})*)', price)
+                            price = int(price_match.group(1).replace(',', '')) if price_match else None
+                        
                         menu = MenuItem(
                             name=item.get('name', item.get('title', f'메뉴 {i+1}')),
-                            price=item.get('price'),
+                            price=price,
                             description=item.get('description', item.get('desc')),
                             category=item.get('category'),
                             image_url=item.get('image', item.get('imageUrl')),
@@ -424,20 +2180,19 @@ class NaverMenuScraper:
     def start_scraping_log(self, store_id: int, naver_store_id: str) -> int:
         """스크래핑 로그 시작"""
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO naver_scraping_logs 
-                (store_id, naver_store_id, scraping_type, status, started_at)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            """, (store_id, naver_store_id, 'menu', 'pending', datetime.now()))
-            
-            log_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    INSERT INTO naver_scraping_logs 
+                    (store_id, naver_store_id, scraping_type, status, started_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING id
+                """, (store_id, naver_store_id, 'menu', 'pending', datetime.now()))
+                
+                log_id = cursor.fetchone()[0]
+                conn.commit()
+                cursor.close()
             
             return log_id
             
@@ -445,134 +2200,469 @@ class NaverMenuScraper:
             logger.error(f"❌ 스크래핑 로그 시작 오류: {e}")
             return 0
     
-    def complete_scraping_log(self, log_id: int, menu_count: int, success: bool, error_message: str = None):
-        """스크래핑 로그 완료"""
+    def complete_scraping_log(self, log_id: int, menu_count: int, success: bool, error_message: str = None,
+                              status: Optional[str] = None, trace: Optional[ScrapeTrace] = None):
+        """스크래핑 로그 완료 (trace가 있으면 구간 시간과 파싱 전략 기록)"""
+        phase_timings, parse_strategy = trace.log_fields() if trace else (None, None)
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE naver_scraping_logs 
-                SET status = %s, menu_count = %s, completed_at = %s, 
-                    processing_time_ms = EXTRACT(EPOCH FROM (NOW() - started_at)) * 1000,
-                    error_message = %s
-                WHERE id = %s
-            """, ('success' if success else 'failed', menu_count, datetime.now(), error_message, log_id))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    UPDATE naver_scraping_logs 
+                    SET status = %s, menu_count = %s, completed_at = %s, 
+                        processing_time_ms = EXTRACT(EPOCH FROM (NOW() - started_at)) * 1000,
+                        error_message = %s, phase_timings = %s::jsonb, parse_strategy = %s
+                    WHERE id = %s
+                """, (status or ('success' if success else 'failed'), menu_count, datetime.now(), error_message,
+                      phase_timings, parse_strategy, log_id))
+                
+                conn.commit()
+                cursor.close()
             
         except Exception as e:
             logger.error(f"❌ 스크래핑 로그 완료 오류: {e}")
     
-    def save_menus_to_db(self, store_id: int, naver_store_id: str, menus: List[MenuItem]) -> int:
-        """메뉴 정보를 데이터베이스에 저장"""
+    def load_fetch_state(self, naver_store_id: str) -> Optional[Dict[str, Any]]:
+        """이전 수집의 ETag/Last-Modified/콘텐츠 해시 조회"""
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT etag, last_modified, content_hash, menu_hash, menu_count
+                    FROM naver_menu_fetch_state
+                    WHERE naver_store_id = %s
+                """, (naver_store_id,))
+                
+                row = cursor.fetchone()
+                cursor.close()
             
-            saved_count = 0
-            for menu in menus:
-                try:
-                    cursor.execute("""
-                        INSERT INTO naver_menus 
-                        (store_id, naver_store_id, menu_name, menu_price, menu_description, 
-                         menu_category, menu_image_url, menu_rating, menu_review_count,
-                         is_popular, is_signature, naver_menu_id, scraped_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (store_id, naver_store_id, menu_name) 
-                        DO UPDATE SET
-                            menu_price = EXCLUDED.menu_price,
-                            menu_description = EXCLUDED.menu_description,
-                            menu_category = EXCLUDED.menu_category,
-                            menu_image_url = EXCLUDED.menu_image_url,
-                            menu_rating = EXCLUDED.menu_rating,
-                            menu_review_count = EXCLUDED.menu_review_count,
-                            is_popular = EXCLUDED.is_popular,
-                            is_signature = EXCLUDED.is_signature,
-                            updated_at = NOW()
-                    """, (
-                        store_id, naver_store_id, menu.name, menu.price, menu.description,
-                        menu.category, menu.image_url, menu.rating, menu.review_count,
-                        menu.is_popular, menu.is_signature, menu.naver_menu_id, datetime.now()
-                    ))
-                    saved_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"❌ 메뉴 저장 오류 ({menu.name}): {e}")
+            if not row:
+                return None
+            return {'etag': row[0], 'last_modified': row[1], 'content_hash': row[2], 'menu_hash': row[3],
+                    'menu_count': row[4]}
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+        except Exception as e:
+            logger.error(f"❌ 수집 상태 조회 오류: {e}")
+            return None
+    
+    def save_fetch_state(self, naver_store_id: str, etag: Optional[str], last_modified: Optional[str],
+                         content_hash: Optional[str], menu_count: int, menu_hash: Optional[str] = None,
+                         menus_changed: bool = False):
+        """수집 상태 저장 (해시가 바뀐 경우에만 changed_at, 메뉴가 바뀐 경우에만 menus_changed_at 갱신)"""
+        try:
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    INSERT INTO naver_menu_fetch_state
+                    (naver_store_id, etag, last_modified, content_hash, menu_hash, menu_count,
+                     checked_at, changed_at, menus_changed_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW())
+                    ON CONFLICT (naver_store_id)
+                    DO UPDATE SET
+                        etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        menu_count = EXCLUDED.menu_count,
+                        checked_at = NOW(),
+                        changed_at = CASE
+                            WHEN naver_menu_fetch_state.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                            THEN NOW() ELSE naver_menu_fetch_state.changed_at
+                        END,
+                        menus_changed_at = CASE
+                            WHEN %s THEN NOW() ELSE naver_menu_fetch_state.menus_changed_at
+                        END,
+                        content_hash = EXCLUDED.content_hash,
+                        menu_hash = COALESCE(EXCLUDED.menu_hash, naver_menu_fetch_state.menu_hash)
+                """, (naver_store_id, etag, last_modified, content_hash, menu_hash, menu_count, menus_changed))
+                
+                conn.commit()
+                cursor.close()
+            
+        except Exception as e:
+            logger.error(f"❌ 수집 상태 저장 오류: {e}")
+    
+    def save_menus_to_db(self, store_id: int, naver_store_id: str, menus: List[MenuItem],
+                         failures: Optional[List[Dict[str, Any]]] = None) -> int:
+        """메뉴 정보를 데이터베이스에 저장 (failures를 넘기면 실패한 메뉴와 오류를 추가)"""
+        try:
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                saved_count = 0
+                for menu in menus:
+                    try:
+                        cursor.execute("""
+                            INSERT INTO naver_menus 
+                            (store_id, naver_store_id, menu_name, menu_price, menu_description, 
+                             menu_category, menu_image_url, menu_rating, menu_review_count,
+                             is_popular, is_signature, naver_menu_id, scraped_at)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            ON CONFLICT (store_id, naver_store_id, menu_name) 
+                            DO UPDATE SET
+                                menu_price = EXCLUDED.menu_price,
+                                menu_description = EXCLUDED.menu_description,
+                                menu_category = EXCLUDED.menu_category,
+                                menu_image_url = EXCLUDED.menu_image_url,
+                                menu_rating = EXCLUDED.menu_rating,
+                                menu_review_count = EXCLUDED.menu_review_count,
+                                is_popular = EXCLUDED.is_popular,
+                                is_signature = EXCLUDED.is_signature,
+                                updated_at = NOW()
+                        """, (
+                            store_id, naver_store_id, menu.name, menu.price, menu.description,
+                            menu.category, menu.image_url, menu.rating, menu.review_count,
+                            menu.is_popular, menu.is_signature, menu.naver_menu_id, datetime.now()
+                        ))
+                        saved_count += 1
+                        
+                    except Exception as e:
+                        logger.error(f"❌ 메뉴 저장 오류 ({menu.name}): {e}")
+                        if failures is not None:
+                            failures.append({'menu_name': menu.name, 'error': str(e).strip()})
+                
+                conn.commit()
+                cursor.close()
             
             logger.info(f"💾 {saved_count}개 메뉴 저장 완료")
             return saved_count
             
         except Exception as e:
             logger.error(f"❌ 메뉴 저장 오류: {e}")
+            if failures is not None:
+                failures.append({'menu_name': None, 'error': str(e)})
             return 0
     
-    def update_menu_stats(self, store_id: int, naver_store_id: str, menus: List[MenuItem]):
-        """메뉴 통계 업데이트"""
+    def write_menus(self, store_id: int, naver_store_id: str, menus: List[MenuItem],
+                    parse_strategy: Optional[str] = None) -> Dict[str, Any]:
+        """설정된 저장 방식으로 메뉴 저장 (저장 결과 리포트 반환, sync의 삭제는 parse_strategy로 판단)"""
+        started = time.perf_counter()
+        
+        if self.save_mode == 'bulk':
+            report = self.save_menus_bulk(store_id, naver_store_id, menus)
+        elif self.save_mode == 'sync':
+            report = self.sync_menus_to_db(store_id, naver_store_id, menus, parse_strategy=parse_strategy)
+        else:
+            report = {'failures': []}
+            report['saved'] = self.save_menus_to_db(store_id, naver_store_id, menus, report['failures'])
+        
+        report['mode'] = self.save_mode
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        logger.info(f"💾 [{self.save_mode}] 메뉴 저장 {report['elapsed_ms']}ms")
+        return report
+    
+    @staticmethod
+    def _menu_upsert_rows(store_id: int, naver_store_id: str, menus: List[MenuItem]) -> List[tuple]:
+        """MENU_UPSERT_SQL용 행 목록 (메뉴명 기준 중복 병합)"""
+        # 같은 메뉴명이 여러 번 나오면 행 단위 저장과 같게 마지막 값으로 덮어쓰되
+        # naver_menu_id는 최초 INSERT 값을 유지 (한 문장에서 같은 키를 두 번 갱신할 수 없음)
+        rows_by_name = {}
+        scraped_at = datetime.now()
+        for menu in menus:
+            first = rows_by_name.get(menu.name)
+            rows_by_name[menu.name] = (
+                store_id, naver_store_id, menu.name, menu.price, menu.description,
+                menu.category, menu.image_url, menu.rating, menu.review_count,
+                menu.is_popular, menu.is_signature,
+                first[11] if first else menu.naver_menu_id, scraped_at
+            )
+        return list(rows_by_name.values())
+    
+    def save_menus_bulk(self, store_id: int, naver_store_id: str, menus: List[MenuItem],
+                        page_size: int = 500) -> Dict[str, Any]:
+        """메뉴 정보를 다중 행 VALUES로 일괄 upsert (실패 시 행 단위로 재시도해 실패 행 보고)"""
+        rows = self._menu_upsert_rows(store_id, naver_store_id, menus)
+        report = {'saved': 0, 'failures': [], 'duplicates': len(menus) - len(rows)}
+        
+        if not rows:
+            return report
+        
         try:
-            if not menus:
-                return
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
                 
-            conn = self.get_db_connection()
+                cursor.execute("SAVEPOINT bulk_upsert")
+                try:
+                    psycopg2.extras.execute_values(cursor, self.MENU_UPSERT_SQL, rows, page_size=page_size)
+                    report['saved'] = len(rows)
+                except psycopg2.Error as e:
+                    # 일괄 저장 실패 시 행 단위로 나눠 실패한 행만 골라냄
+                    logger.warning(f"⚠️ 일괄 저장 실패, 행 단위 재시도: {e}")
+                    cursor.execute("ROLLBACK TO SAVEPOINT bulk_upsert")
+                    for row in rows:
+                        cursor.execute("SAVEPOINT bulk_row")
+                        try:
+                            psycopg2.extras.execute_values(cursor, self.MENU_UPSERT_SQL, [row])
+                            cursor.execute("RELEASE SAVEPOINT bulk_row")
+                            report['saved'] += 1
+                        except psycopg2.Error as row_error:
+                            cursor.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                            report['failures'].append({'menu_name': row[2], 'error': str(row_error).strip()})
+                            logger.error(f"❌ 메뉴 저장 오류 ({row[2]}): {row_error}")
+                
+                conn.commit()
+                cursor.close()
+            
+            logger.info(f"💾 {report['saved']}개 메뉴 일괄 저장 완료 (실패 {len(report['failures'])}개)")
+            return report
+            
+        except Exception as e:
+            logger.error(f"❌ 메뉴 일괄 저장 오류: {e}")
+            report['saved'] = 0
+            report['failures'].append({'menu_name': None, 'error': str(e)})
+            return report
+    
+    def sync_menus_to_db(self, store_id: int, naver_store_id: str, menus: List[MenuItem],
+                         page_size: int = 500, parse_strategy: Optional[str] = None) -> Dict[str, Any]:
+        """기존 메뉴와 비교해 추가/변경/삭제된 행만 반영 (변경 요약 반환, 삭제는 실제 메뉴 파싱 전략일 때만)"""
+        rows = self._menu_upsert_rows(store_id, naver_store_id, menus)
+        report = {'saved': 0, 'failures': [], 'duplicates': len(menus) - len(rows)}
+        report['changes'] = empty_menu_changes()
+        
+        try:
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("""
+                    SELECT menu_name, menu_price, menu_description, menu_category, menu_image_url,
+                           menu_rating, menu_review_count, is_popular, is_signature
+                    FROM naver_menus
+                    WHERE store_id = %s AND naver_store_id = %s
+                """, (store_id, naver_store_id))
+                write_rows, changes = diff_menu_rows(store_id, cursor.fetchall(), rows, parse_strategy)
+                report['changes'] = changes
+                
+                if write_rows:
+                    psycopg2.extras.execute_values(cursor, self.MENU_UPSERT_SQL, write_rows, page_size=page_size)
+                if changes['removed']:
+                    cursor.execute("""
+                        DELETE FROM naver_menus
+                        WHERE store_id = %s AND naver_store_id = %s AND menu_name = ANY(%s)
+                    """, (store_id, naver_store_id, changes['removed']))
+                
+                conn.commit()
+                cursor.close()
+            
+            report['saved'] = len(write_rows)
+            logger.info(
+                f"🔄 메뉴 동기화 완료: 추가 {len(changes['added'])}, 변경 {changes['updated']} "
+                f"(가격 {len(changes['price_changed'])}), 삭제 {len(changes['removed'])}, 유지 {changes['unchanged']}"
+            )
+            return report
+            
+        except Exception as e:
+            logger.error(f"❌ 메뉴 동기화 오류: {e}")
+            report['failures'].append({'menu_name': None, 'error': str(e)})
+            report['changes'] = empty_menu_changes()
+            return report
+    
+    def persist_scrape_atomic(self, log_id: int, store_id: int, naver_store_id: str, menus: List[MenuItem],
+                              page_size: int = 500, trace: Optional[ScrapeTrace] = None) -> Dict[str, Any]:
+        """메뉴 upsert, 서버 측 통계 집계, 로그 완료를 한 트랜잭션으로 저장 (실패 시 전체 롤백 후 예외)"""
+        started = time.perf_counter()
+        phase_timings, parse_strategy = trace.log_fields() if trace else (None, None)
+        rows = self._menu_upsert_rows(store_id, naver_store_id, menus)
+        round_trips = 0
+        
+        with self.db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # psycopg2는 첫 문장 전에 BEGIN을 따로 보냄 (asyncpg의 conn.transaction()과 같은 1회)
+                round_trips += 1
+                if rows:
+                    psycopg2.extras.execute_values(cursor, self.MENU_UPSERT_SQL, rows, page_size=page_size)
+                    round_trips += (len(rows) + page_size - 1) // page_size
+                    
+                    cursor.execute(MENU_STATS_FROM_MENUS_SQL.format(store_id='%(store_id)s', naver_store_id='%(naver_store_id)s'),
+                                   {'store_id': store_id, 'naver_store_id': naver_store_id})
+                    round_trips += 1
+                
+                cursor.execute("""
+                    UPDATE naver_scraping_logs 
+                    SET status = %s, menu_count = %s, completed_at = %s, 
+                        processing_time_ms = EXTRACT(EPOCH FROM (NOW() - started_at)) * 1000,
+                        error_message = NULL, phase_timings = %s::jsonb, parse_strategy = %s
+                    WHERE id = %s
+                """, ('success', len(menus), datetime.now(), phase_timings, parse_strategy, log_id))
+                round_trips += 1
+                
+                conn.commit()
+                round_trips += 1  # COMMIT
+            finally:
+                cursor.close()
+        
+        report = {
+            'saved': len(rows),
+            'failures': [],
+            'duplicates': len(menus) - len(rows),
+            'round_trips': round_trips,
+            'round_trips_saved': legacy_round_trips(len(menus)) - round_trips
+        }
+        logger.info(f"💾 메뉴/통계/로그 단일 트랜잭션 저장: 왕복 {round_trips}회 (기존 대비 {report['round_trips_saved']}회 절감)")
+        return report
+    
+    def save_image_keys(self, store_id: int, naver_store_id: str, image_keys: Dict[str, str]):
+        """메뉴별 이미지 캐시 키 기록"""
+        with self.db_connection() as conn:
             cursor = conn.cursor()
             
-            # 통계 계산
-            prices = [menu.price for menu in menus if menu.price]
-            avg_price = sum(prices) / len(prices) if prices else None
-            min_price = min(prices) if prices else None
-            max_price = max(prices) if prices else None
-            popular_count = sum(1 for menu in menus if menu.is_popular)
-            signature_count = sum(1 for menu in menus if menu.is_signature)
-            
-            cursor.execute("""
-                INSERT INTO naver_menu_stats 
-                (store_id, naver_store_id, total_menus, avg_price, min_price, max_price,
-                 popular_menu_count, signature_menu_count, last_scraped_at, scraped_success)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (store_id, naver_store_id) 
-                DO UPDATE SET
-                    total_menus = EXCLUDED.total_menus,
-                    avg_price = EXCLUDED.avg_price,
-                    min_price = EXCLUDED.min_price,
-                    max_price = EXCLUDED.max_price,
-                    popular_menu_count = EXCLUDED.popular_menu_count,
-                    signature_menu_count = EXCLUDED.signature_menu_count,
-                    last_scraped_at = EXCLUDED.last_scraped_at,
-                    scraped_success = EXCLUDED.scraped_success,
-                    error_message = NULL
-            """, (
-                store_id, naver_store_id, len(menus), avg_price, min_price, max_price,
-                popular_count, signature_count, datetime.now(), True
-            ))
+            psycopg2.extras.execute_values(cursor, """
+                UPDATE naver_menus AS m
+                SET menu_image_key = v.menu_image_key
+                FROM (VALUES %s) AS v(store_id, naver_store_id, menu_name, menu_image_key)
+                WHERE m.store_id = v.store_id AND m.naver_store_id = v.naver_store_id
+                  AND m.menu_name = v.menu_name
+            """, [(store_id, naver_store_id, name, key) for name, key in image_keys.items()])
             
             conn.commit()
             cursor.close()
-            conn.close()
+    
+    def update_menu_stats(self, store_id: int, naver_store_id: str, menus: List[MenuItem]):
+        """메뉴 통계 업데이트"""
+        try:
+            if not menus:
+                return
+                
+            with self.db_connection() as conn:
+                cursor = conn.cursor()
+                
+                # 통계 계산
+                stats = compute_menu_stats(menus)
+                
+                cursor.execute("""
+                    INSERT INTO naver_menu_stats 
+                    (store_id, naver_store_id, total_menus, avg_price, min_price, max_price,
+                     popular_menu_count, signature_menu_count, last_scraped_at, scraped_success)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (store_id, naver_store_id) 
+                    DO UPDATE SET
+                        total_menus = EXCLUDED.total_menus,
+                        avg_price = EXCLUDED.avg_price,
+                        min_price = EXCLUDED.min_price,
+                        max_price = EXCLUDED.max_price,
+                        popular_menu_count = EXCLUDED.popular_menu_count,
+                        signature_menu_count = EXCLUDED.signature_menu_count,
+                        last_scraped_at = EXCLUDED.last_scraped_at,
+                        scraped_success = EXCLUDED.scraped_success,
+                        error_message = NULL
+                """, (
+                    store_id, naver_store_id, stats['total_menus'], stats['avg_price'], stats['min_price'],
+                    stats['max_price'], stats['popular_menu_count'], stats['signature_menu_count'], datetime.now(), True
+                ))
+                
+                conn.commit()
+                cursor.close()
             
             logger.info(f"📊 메뉴 통계 업데이트 완료: {len(menus)}개 메뉴")
             
         except Exception as e:
             logger.error(f"❌ 메뉴 통계 업데이트 오류: {e}")
 
+# 파싱 워커용 스크래퍼 (프로세스/스레드 풀 워커마다 한 번 생성)
+_worker_scraper = None
+
+def parse_menu_html_worker(html: str, naver_store_id: str) -> Tuple[List[tuple], str]:
+    """실행기 워커에서 메뉴 파싱 (피클 비용이 작은 튜플 목록과 파싱 전략으로 반환)"""
+    global _worker_scraper
+    if _worker_scraper is None:
+        _worker_scraper = NaverMenuScraper({}, parse_executor='inline')
+    menus, strategy = _worker_scraper.parse_menu_page(html, naver_store_id)
+    return [astuple(menu) for menu in menus], strategy
+
+def load_stores_file(path: str) -> List[Dict[str, Any]]:
+    """일괄 스크래핑 대상 매장 목록 로드 (CSV 또는 NDJSON)"""
+    stores = []
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith(('.ndjson', '.jsonl')):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                if 'store_id' not in row or 'naver_store_id' not in row:
+                    raise ValueError(f"{path}:{line_no} store_id, naver_store_id 필드가 필요합니다.")
+                stores.append({'store_id': int(row['store_id']), 'naver_store_id': str(row['naver_store_id'])})
+        else:
+            reader = csv.DictReader(f)
+            for line_no, row in enumerate(reader, 2):
+                if not row.get('store_id') or not row.get('naver_store_id'):
+                    raise ValueError(f"{path}:{line_no} store_id, naver_store_id 컬럼이 필요합니다.")
+                stores.append({'store_id': int(row['store_id']), 'naver_store_id': row['naver_store_id'].strip()})
+    return stores
+
+def scrape_output(scrape_result: ScrapeResult) -> Dict[str, Any]:
+    """단일 매장 스크래핑 결과 출력 형식 (CLI stdout, 서버 워커 풀 공통)"""
+    return {
+        'store_id': scrape_result.store_id,
+        'naver_store_id': scrape_result.naver_store_id,
+        'status': scrape_result.status,
+        'menu_count': scrape_result.to_dict()['menu_count'],
+        'http_status': scrape_result.http_status,
+        'http_statuses': scrape_result.http_statuses,
+        'phase_ms': scrape_result.phase_ms,
+        'parse_strategy': scrape_result.parse_strategy,
+        'menus': [
+            {
+                'name': menu.name,
+                'price': menu.price,
+                'description': menu.description,
+                'category': menu.category,
+                'is_popular': menu.is_popular,
+                'is_signature': menu.is_signature
+            }
+            for menu in scrape_result.menus
+        ],
+        'scraped_at': datetime.now().isoformat()
+    }
+
 async def main():
     """메인 함수"""
     parser = argparse.ArgumentParser(description='네이버 메뉴 스크래핑')
-    parser.add_argument('--store_id', required=True, type=int, help='매장 ID')
-    parser.add_argument('--naver_store_id', required=True, help='네이버 가게 ID')
+    parser.add_argument('--store_id', type=int, help='매장 ID')
+    parser.add_argument('--naver_store_id', help='네이버 가게 ID')
+    parser.add_argument('--stores-file', dest='stores_file', help='일괄 스크래핑 매장 목록 파일 (CSV/NDJSON: store_id, naver_store_id)')
+    parser.add_argument('--concurrency', type=int, default=5, help='일괄 스크래핑 동시 실행 수')
     parser.add_argument('--db_host', default='localhost', help='데이터베이스 호스트')
     parser.add_argument('--db_port', default='5432', help='데이터베이스 포트')
     parser.add_argument('--db_name', default='burnana_dev', help='데이터베이스 이름')
     parser.add_argument('--db_user', default='dev_user', help='데이터베이스 사용자')
     parser.add_argument('--db_pass', default='dev_password', help='데이터베이스 비밀번호')
+    parser.add_argument('--db_pool_min', type=int, default=1, help='DB 연결 풀 최소 크기')
+    parser.add_argument('--db_pool_max', type=int, default=5, help='DB 연결 풀 최대 크기')
+    parser.add_argument('--save_mode', choices=NaverMenuScraper.SAVE_MODES, default='row',
+                        help='메뉴 저장 방식 (row: 메뉴별 INSERT, bulk: 일괄 upsert, sync: 변경분만 동기화, '
+                             'atomic: 메뉴/통계/로그를 한 트랜잭션으로)')
+    parser.add_argument('--force', action='store_true', help='조건부 요청/변경 감지 없이 항상 다시 수집')
+    parser.add_argument('--rate_per_host', type=float, default=2.0, help='호스트별 초당 요청 수 제한')
+    parser.add_argument('--limit_per_host', type=int, default=8, help='호스트별 동시 연결 수 제한')
+    parser.add_argument('--max_retries', type=int, default=3, help='429/5xx/네트워크 오류 재시도 횟수')
+    parser.add_argument('--parse_executor', choices=NaverMenuScraper.PARSE_EXECUTORS,
+                        help='HTML 파싱 실행기 (process: 프로세스 풀, thread: 스레드 풀, inline: 직접, '
+                             '기본: --stores-file 일괄 스크래핑은 process, 단일 매장은 inline)')
+    parser.add_argument('--parse_workers', type=int, help='파싱 워커 수 (기본: CPU 수)')
+    parser.add_argument('--storage', choices=NaverMenuScraper.STORAGE_BACKENDS,
+                        default=os.environ.get('SCRAPER_STORAGE', 'psycopg2'),
+                        help='DB 저장소 (psycopg2: 동기, asyncpg: 비동기, dry-run: 저장 안 함)')
+    parser.add_argument('--no-stream', dest='stream_fetch', action='store_false',
+                        help='응답 본문을 끝까지 받은 뒤 파싱 (기본: 메뉴 영역까지만 스트리밍 수신)')
+    parser.add_argument('--max_body_kb', type=int, default=5120, help='응답 본문 최대 크기(KB, 0이면 제한 없음)')
+    parser.add_argument('--image_cache_dir', default=os.environ.get('NAVER_IMAGE_CACHE_DIR'),
+                        help='메뉴 이미지 캐시 디렉토리 (지정 시 이미지와 썸네일 캐시)')
+    parser.add_argument('--image_cache_mb', type=int, default=512, help='이미지 캐시 최대 크기(MB)')
+    parser.add_argument('--thumb_size', type=int, default=240, help='썸네일 한 변 크기(px)')
+    parser.add_argument('--trace_log', default=os.environ.get('NAVER_TRACE_LOG'),
+                        help='매장별 추적 결과(구간 시간, 파싱 전략) JSON 줄 로그 파일')
     
     args = parser.parse_args()
     
+    if not args.stores_file and (args.store_id is None or not args.naver_store_id):
+        parser.error('--store_id와 --naver_store_id 또는 --stores-file이 필요합니다.')
+    
+    # 프로세스 풀은 시작 비용이 커서 여러 매장을 동시에 스크래핑할 때만 사용
+    if args.parse_executor is None:
+        args.parse_executor = 'process' if args.stores_file else 'inline'
+    
     # 데이터베이스 설정
     db_config = {
         'host': args.db_host,
@@ -582,30 +2672,42 @@ async def main():
         'password': args.db_pass
     }
     
+    # 추적 결과는 지정한 파일에 JSON 한 줄씩만 기록
+    if args.trace_log:
+        trace_handler = logging.FileHandler(args.trace_log)
+        trace_handler.setFormatter(logging.Formatter('%(message)s'))
+        trace_logger.addHandler(trace_handler)
+        trace_logger.propagate = False
+    
     try:
-        async with NaverMenuScraper(db_config) as scraper:
-            menus = await scraper.scrape_menu(args.naver_store_id, args.store_id)
+        transport_options = {
+            'rate_per_host': args.rate_per_host,
+            'limit_per_host': args.limit_per_host,
+            'max_retries': args.max_retries
+        }
+        image_cache = None
+        if args.image_cache_dir:
+            image_cache = MenuImageCache(args.image_cache_dir, max_bytes=args.image_cache_mb * 1024 * 1024,
+                                         thumb_size=args.thumb_size)
+        
+        async with NaverMenuScraper(db_config, pool_min=args.db_pool_min, pool_max=args.db_pool_max,
+                                    save_mode=args.save_mode, conditional_fetch=not args.force,
+                                    transport_options=transport_options, parse_executor=args.parse_executor,
+                                    parse_workers=args.parse_workers, storage=args.storage,
+                                    stream_fetch=args.stream_fetch,
+                                    max_body_bytes=args.max_body_kb * 1024 or None,
+                                    image_cache=image_cache) as scraper:
+            if args.stores_file:
+                stores = load_stores_file(args.stores_file)
+                summary = await scraper.scrape_many(stores, concurrency=args.concurrency)
+                summary['scraped_at'] = datetime.now().isoformat()
+                print(json.dumps(summary, ensure_ascii=False, indent=2))
+                return
             
-            # 결과 출력
-            result = {
-                'store_id': args.store_id,
-                'naver_store_id': args.naver_store_id,
-                'menu_count': len(menus),
-                'menus': [
-                    {
-                        'name': menu.name,
-                        'price': menu.price,
-                        'description': menu.description,
-                        'category': menu.category,
-                        'is_popular': menu.is_popular,
-                        'is_signature': menu.is_signature
-                    }
-                    for menu in menus
-                ],
-                'scraped_at': datetime.now().isoformat()
-            }
+            scrape_result = await scraper.scrape_store(args.naver_store_id, args.store_id)
             
-            print(json.dumps(result, ensure_ascii=False, indent=2))
+            # 결과 출력
+            print(json.dumps(scrape_output(scrape_result), ensure_ascii=False, indent=2))
             
     except Exception as e:
         logger.error(f"❌ 스크래핑 실패: {e}")
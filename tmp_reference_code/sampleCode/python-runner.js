@@ -110,10 +110,10 @@ async function runPostSignupScript(storeData, naverUrl) {
     if (result.success) {
       console.log(`🎯 [후처리 요청 완료] 매장 ${storeData.id}: 작업 ID ${result.task_id}`);
       
-      // 백그라운드에서 작업 상태 확인 (선택사항)
-      setTimeout(async () => {
+      // 백그라운드에서 작업 완료 대기 (롱폴링: 완료되면 바로 응답, 최대 30초)
+      (async () => {
         try {
-          const statusResponse = await fetch(`${pythonUrl}/task-status/${result.task_id}`);
+          const statusResponse = await fetch(`${pythonUrl}/task-status/${result.task_id}?wait=30`);
           if (statusResponse.ok) {
             const statusResult = await statusResponse.json();
             if (statusResult.status === 'completed') {
@@ -123,7 +123,7 @@ async function runPostSignupScript(storeData, naverUrl) {
         } catch (statusError) {
           console.error(`❌ [후처리 상태 확인 실패] 매장 ${storeData.id}:`, statusError.message);
         }
-      }, 5000); // 5초 후 상태 확인
+      })();
       
       return { success: true, task_id: result.task_id };
     } else {
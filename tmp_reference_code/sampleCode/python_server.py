@@ -11,10 +11,28 @@ import logging
 import subprocess
 import asyncio
 from datetime import datetime
-from flask import Flask, request, jsonify
+from contextlib import contextmanager
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
+import psycopg2
+import psycopg2.pool
+from scrape_worker_pool import WorkerPool, WorkerUnavailable, WorkerTimeout
+from server_metrics import ServerMetrics, refresh_gauges, task_gauges
+from server_common import (
+    SCRAPE_DB_CONFIG, MENU_STATS_CACHE_TTL, TASK_TYPE_LIMITS, TASK_TRANSITIONS,
+    RUN_SCRIPT_TIMEOUT, SCRAPE_MENU_TIMEOUT, SCRAPE_FRESHNESS_SEC, TASK_PRIORITIES, MenuStatsCache,
+    ScrapeCoalescer, build_script_result, create_refresh_scheduler, create_task_store, format_sse,
+    TaskRejected, new_task_id, parse_priority, parse_store_ids, stats_etag
+)
+from refresh_scheduler import (
+    REFRESH_CANDIDATES_SQL, REFRESH_CANDIDATES_WITHOUT_FETCH_STATE_SQL, FETCH_STATE_EXISTS_SQL
+)
+import re
+import time
+import heapq
+import itertools
 import threading
-import queue
+from collections import deque
 
 # 로깅 설정
 logging.basicConfig(
@@ -30,15 +48,34 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # CORS 허용
 
-# 작업 큐 (비동기 처리용)
-task_queue = queue.Queue()
-task_results = {}
+# 메뉴 이미지 캐시 디렉토리 (naver_menu_scraper.py --image_cache_dir와 같은 위치)
+IMAGE_CACHE_DIR = os.environ.get('NAVER_IMAGE_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'image_cache'))
+IMAGE_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# 상주 작업 프로세스 풀 (PYTHON_WORKER_POOL_SIZE=0이면 작업마다 서브프로세스 실행)
+WORKER_POOL_SIZE = int(os.environ.get('PYTHON_WORKER_POOL_SIZE', str(sum(TASK_TYPE_LIMITS.values()))))
+worker_pool = WorkerPool(
+    size=WORKER_POOL_SIZE,
+    max_jobs=int(os.environ.get('PYTHON_WORKER_MAX_JOBS', '200')),
+    max_rss_mb=int(os.environ.get('PYTHON_WORKER_MAX_RSS_MB', '512')),
+    cwd=os.path.dirname(os.path.abspath(__file__))
+) if WORKER_POOL_SIZE > 0 else None
+
+def run_in_worker_pool(kind: str, payload: dict, timeout: float) -> dict:
+    """작업 프로세스 풀에서 실행 (풀이 없거나 모두 사용 중이면 WorkerUnavailable)"""
+    if worker_pool is None:
+        raise WorkerUnavailable('작업 프로세스 풀이 비활성화되어 있습니다.')
+    worker_pool.ensure_started()
+    return worker_pool.run(kind, payload, timeout)
+
+# 작업 결과 (개수/크기 한도와 TTL 적용, TASK_RESULT_DB 지정 시 SQLite에 영속화)
+task_results = create_task_store()
 
 class PythonScriptRunner:
     """Python 스크립트 실행 관리자"""
     
     def __init__(self):
-        self.script_path = os.path.join(os.path.dirname(__file__), 'post_signup.py')
+        self.script_path = os.environ.get('POST_SIGNUP_SCRIPT') or os.path.join(os.path.dirname(__file__), 'post_signup.py')
         self.output_dir = os.path.join(os.path.dirname(__file__), 'output')
         
         # 출력 디렉토리 생성
@@ -50,65 +87,42 @@ class PythonScriptRunner:
             logger.info(f"작업 {task_id}: Python 스크립트 실행 시작")
             
             # 명령어 인자 구성
-            cmd_args = [
-                sys.executable,
-                self.script_path,
+            script_args = [
                 '--store_id', str(args['store_id']),
                 '--store_name', args['store_name'],
                 '--business_number', args['business_number'],
                 '--naver_url', args.get('naver_url', '')
             ]
             
-            logger.info(f"작업 {task_id}: 명령어 실행 - {' '.join(cmd_args)}")
-            
-            # 스크립트 실행
-            result = subprocess.run(
-                cmd_args,
-                capture_output=True,
-                text=True,
-                timeout=60,  # 60초 타임아웃
-                cwd=os.path.dirname(__file__)
-            )
+            try:
+                # 상주 작업 프로세스에서 실행 (임포트/초기화 재사용)
+                result = subprocess.CompletedProcess(
+                    script_args, **run_in_worker_pool('run-script', {
+                        'script_path': self.script_path,
+                        'argv': script_args
+                    }, timeout=RUN_SCRIPT_TIMEOUT)
+                )
+            except WorkerUnavailable as e:
+                cmd_args = [sys.executable, self.script_path] + script_args
+                logger.info(f"작업 {task_id}: 명령어 실행 - {' '.join(cmd_args)} ({e})")
+                
+                # 스크립트 실행
+                result = subprocess.run(
+                    cmd_args,
+                    capture_output=True,
+                    text=True,
+                    timeout=RUN_SCRIPT_TIMEOUT,
+                    cwd=os.path.dirname(__file__)
+                )
             
-            if result.returncode == 0:
-                # 성공 시 JSON 결과 파싱
-                try:
-                    output_data = json.loads(result.stdout)
-                    logger.info(f"작업 {task_id}: 스크립트 실행 성공")
-                    return {
-                        'success': True,
-                        'task_id': task_id,
-                        'result': output_data,
-                        'stdout': result.stdout,
-                        'stderr': result.stderr,
-                        'completed_at': datetime.now().isoformat()
-                    }
-                except json.JSONDecodeError:
-                    logger.warning(f"작업 {task_id}: JSON 파싱 실패, stdout 반환")
-                    return {
-                        'success': True,
-                        'task_id': task_id,
-                        'result': {'raw_output': result.stdout},
-                        'stdout': result.stdout,
-                        'stderr': result.stderr,
-                        'completed_at': datetime.now().isoformat()
-                    }
-            else:
-                logger.error(f"작업 {task_id}: 스크립트 실행 실패 (코드: {result.returncode})")
-                return {
-                    'success': False,
-                    'task_id': task_id,
-                    'error': f"스크립트 실행 실패 (코드: {result.returncode})",
-                    'stdout': result.stdout,
-                    'stderr': result.stderr,
-                    'completed_at': datetime.now().isoformat()
-                }
+            return build_script_result(task_id, result.returncode, result.stdout, result.stderr)
                 
-        except subprocess.TimeoutExpired:
+        except (subprocess.TimeoutExpired, WorkerTimeout):
             logger.error(f"작업 {task_id}: 실행 시간 초과")
             return {
                 'success': False,
                 'task_id': task_id,
+                'timed_out': True,
                 'error': '실행 시간 초과',
                 'completed_at': datetime.now().isoformat()
             }
@@ -128,26 +142,41 @@ script_runner = PythonScriptRunner()
 async def scrape_naver_menu(store_id: int, naver_store_id: str):
     """네이버 메뉴 스크래핑 실행"""
     try:
+        logger.info(f"🍽️ [메뉴 스크래핑] 시작 - 매장 {store_id}, 네이버 ID {naver_store_id}")
+        
+        try:
+            # 상주 작업 프로세스에서 실행 (세션/DB 연결 재사용)
+            output_data = await asyncio.to_thread(run_in_worker_pool, 'scrape-menu', {
+                'store_id': store_id,
+                'naver_store_id': naver_store_id,
+                'db_config': SCRAPE_DB_CONFIG
+            }, SCRAPE_MENU_TIMEOUT)
+            logger.info(f"🍽️ [메뉴 스크래핑] 완료 - {output_data.get('menu_count', 0)}개 메뉴")
+            return {
+                'success': True,
+                'result': output_data
+            }
+        except WorkerUnavailable as e:
+            logger.info(f"🍽️ [메뉴 스크래핑] 서브프로세스로 실행 - {e}")
+        
         # 메뉴 스크래핑 스크립트 실행
         cmd_args = [
             sys.executable,
             'naver_menu_scraper.py',
             '--store_id', str(store_id),
             '--naver_store_id', naver_store_id,
-            '--db_host', 'postgres',
-            '--db_port', '5432',
-            '--db_name', 'burnana_dev',
-            '--db_user', 'dev_user',
-            '--db_pass', 'dev_password'
+            '--db_host', SCRAPE_DB_CONFIG['host'],
+            '--db_port', SCRAPE_DB_CONFIG['port'],
+            '--db_name', SCRAPE_DB_CONFIG['database'],
+            '--db_user', SCRAPE_DB_CONFIG['user'],
+            '--db_pass', SCRAPE_DB_CONFIG['password']
         ]
         
-        logger.info(f"🍽️ [메뉴 스크래핑] 시작 - 매장 {store_id}, 네이버 ID {naver_store_id}")
-        
         result = subprocess.run(
             cmd_args,
             capture_output=True,
             text=True,
-            timeout=120,  # 2분 타임아웃
+            timeout=SCRAPE_MENU_TIMEOUT,
             cwd=os.path.dirname(__file__)
         )
         
@@ -173,10 +202,11 @@ async def scrape_naver_menu(store_id: int, naver_store_id: str):
                 'stderr': result.stderr
             }
             
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, WorkerTimeout):
         logger.error(f"🍽️ [메뉴 스크래핑] 시간 초과")
         return {
             'success': False,
+            'timed_out': True,
             'error': '스크래핑 시간 초과'
         }
     except Exception as e:
@@ -186,32 +216,295 @@ async def scrape_naver_menu(store_id: int, naver_store_id: str):
             'error': str(e)
         }
 
-def process_task_queue():
-    """작업 큐 처리 (백그라운드 스레드)"""
-    while True:
-        try:
-            task_data = task_queue.get(timeout=1)
-            task_id = task_data['task_id']
-            args = task_data['args']
+# 메뉴 통계 조회용 공유 연결 풀 (최초 조회 시 생성)
+_stats_pool = None
+_stats_pool_lock = threading.Lock()
+
+@contextmanager
+def stats_db_connection():
+    """공유 풀에서 연결을 빌리는 컨텍스트 매니저 (오류 시 연결 폐기)"""
+    global _stats_pool
+    if _stats_pool is None:
+        with _stats_pool_lock:
+            if _stats_pool is None:
+                _stats_pool = psycopg2.pool.ThreadedConnectionPool(
+                    int(os.environ.get('STATS_DB_POOL_MIN', '1')),
+                    int(os.environ.get('STATS_DB_POOL_MAX', '5')),
+                    **SCRAPE_DB_CONFIG
+                )
+    
+    conn = _stats_pool.getconn()
+    broken = False
+    try:
+        yield conn
+        conn.rollback()
+    except Exception:
+        broken = True
+        raise
+    finally:
+        _stats_pool.putconn(conn, close=broken or conn.closed)
+
+menu_stats_cache = MenuStatsCache(MENU_STATS_CACHE_TTL)
+
+# 같은 네이버 가게의 중복 스크래핑 요청 합치기
+scrape_coalescer = ScrapeCoalescer(SCRAPE_FRESHNESS_SEC)
+
+def run_scrape_task(task_id: str, args: dict) -> dict:
+    """메뉴 스크래핑 작업 실행 후 해당 매장의 통계 캐시 무효화"""
+    result = None
+    try:
+        result = asyncio.run(scrape_naver_menu(args['store_id'], args['naver_store_id']))
+        return result
+    finally:
+        menu_stats_cache.invalidate(args['store_id'], args['naver_store_id'])
+        scrape_coalescer.finish(args['store_id'], args['naver_store_id'], task_id, result)
+
+class TaskEventBus:
+    """작업 상태 전이 이벤트 (최근 이벤트 보관, 롱폴링/SSE 대기자 깨움)"""
+    
+    def __init__(self, max_events: int = 1000):
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+    
+    def publish(self, event: dict):
+        """이벤트 발행 (순번 부여 후 대기자 모두 깨움)"""
+        with self._cond:
+            self._seq += 1
+            self._events.append({**event, 'seq': self._seq})
+            self._cond.notify_all()
+    
+    def last_seq(self) -> int:
+        """마지막 이벤트 순번"""
+        with self._cond:
+            return self._seq
+    
+    def wait_for(self, predicate, timeout: float) -> bool:
+        """조건이 참이 될 때까지 이벤트마다 다시 확인하며 대기"""
+        with self._cond:
+            return self._cond.wait_for(predicate, timeout)
+    
+    def events_since(self, seq: int, timeout: float) -> list:
+        """seq 이후 이벤트 (없으면 timeout까지 대기)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+            return [event for event in self._events if event['seq'] > seq]
+
+class TaskScheduler:
+    """작업 종류별 동시 실행 제한이 있는 우선순위 작업 큐 (스레드 워커 풀)"""
+    
+    def __init__(self, limits: dict, handlers: dict, events: TaskEventBus):
+        self.limits = limits
+        self.handlers = handlers
+        self.events = events
+        self._active = {}  # task_id → 대기/실행 중 작업 상태
+        self._queues = {task_type: [] for task_type in limits}
+        self._running = {task_type: 0 for task_type in limits}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self.stats = {
+            task_type: {'completed': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+                        'service_ms_total': 0.0, 'service_ms_max': 0.0}
+            for task_type in limits
+        }
+    
+    def start(self):
+        """종류별 제한의 합만큼 워커 스레드 시작"""
+        for i in range(sum(self.limits.values())):
+            thread = threading.Thread(target=self._worker, name=f"task-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def _transition(self, task: dict, status: str, **extra):
+        """작업 상태 전이 기록과 이벤트 발행 (허용되지 않은 전이는 경고 후 무시하고 False 반환)"""
+        with self._cond:
+            current = self._active.get(task['task_id'], {}).get('status')
+            if status not in TASK_TRANSITIONS.get(current, ()):
+                logger.warning(f"작업 {task['task_id']}: 잘못된 상태 전이 {current} → {status}")
+                return False
+            if status == 'completed':
+                self._active.pop(task['task_id'], None)
+            else:
+                self._active[task['task_id']] = {
+                    'status': status,
+                    'task_type': task['type'],
+                    'store_id': task['args'].get('store_id'),
+                    'priority': task['priority'],
+                    'enqueued_at': task['enqueued_at'],
+                    'started_at': task.get('started_at')
+                }
+        
+        self.events.publish({
+            'task_id': task['task_id'],
+            'status': status,
+            'task_type': task['type'],
+            'store_id': task['args'].get('store_id'),
+            'at': datetime.now().isoformat(),
+            **extra
+        })
+        return True
+    
+    def submit(self, task_type: str, task_id: str, args: dict, priority: int):
+        """작업 추가 (같은 우선순위는 먼저 들어온 순서대로, 같은 ID가 대기/실행 중이면 TaskRejected)"""
+        task = {
+            'task_id': task_id,
+            'type': task_type,
+            'args': args,
+            'priority': priority,
+            'enqueued_at': time.time()
+        }
+        if not self._transition(task, 'queued', priority=priority):
+            raise TaskRejected(f"작업 {task_id}: 이미 대기/실행 중인 작업 ID입니다.")
+        with self._cond:
+            heapq.heappush(self._queues[task_type], (priority, next(self._seq), task))
+            self._cond.notify()
+    
+    def active_state(self, task_id: str):
+        """대기/실행 중인 작업 상태 (없으면 None)"""
+        with self._cond:
+            state = self._active.get(task_id)
+            return dict(state) if state else None
+    
+    def qsize(self) -> int:
+        """대기 중인 작업 수"""
+        with self._cond:
+            return sum(len(tasks) for tasks in self._queues.values())
+    
+    def _next_task(self) -> dict:
+        """실행 가능한 종류 중 우선순위가 가장 높은 작업 (없으면 대기)"""
+        with self._cond:
+            while True:
+                candidates = [
+                    tasks[0] for task_type, tasks in self._queues.items()
+                    if tasks and self._running[task_type] < self.limits[task_type]
+                ]
+                if candidates:
+                    _, _, task = min(candidates, key=lambda entry: entry[:2])
+                    heapq.heappop(self._queues[task['type']])
+                    self._running[task['type']] += 1
+                    task['started_at'] = time.time()
+                    return task
+                self._cond.wait()
+    
+    def _worker(self):
+        """작업 처리 (백그라운드 스레드)"""
+        while True:
+            task = self._next_task()
+            task_id = task['task_id']
+            started_at = task['started_at']
+            self._transition(task, 'running')
+            wait_ms = (started_at - task['enqueued_at']) * 1000
             
-            logger.info(f"작업 {task_id}: 큐에서 처리 시작")
+            logger.info(f"작업 {task_id}: 큐에서 처리 시작 ({task['type']}, 대기 {wait_ms:.0f}ms)")
+            
+            try:
+                result = self.handlers[task['type']](task_id, task['args'])
+            except Exception as e:
+                logger.error(f"작업 큐 처리 중 오류: {e}")
+                result = {
+                    'success': False,
+                    'task_id': task_id,
+                    'error': str(e),
+                    'completed_at': datetime.now().isoformat()
+                }
             
-            # 스크립트 실행
-            result = script_runner.run_script(task_id, args)
+            service_ms = (time.time() - started_at) * 1000
+            result['task_type'] = task['type']
+            result['priority'] = task['priority']
+            result['queue_wait_ms'] = round(wait_ms, 1)
+            result['service_ms'] = round(service_ms, 1)
             
             # 결과 저장
-            task_results[task_id] = result
+            task_results.put(task_id, result, store_id=task['args'].get('store_id'))
+            server_metrics.observe_task(task['type'], wait_ms, service_ms, result)
+            self._transition(task, 'completed', success=result.get('success', False))
             
-            logger.info(f"작업 {task_id}: 처리 완료")
+            with self._cond:
+                self._running[task['type']] -= 1
+                stats = self.stats[task['type']]
+                stats['completed'] += 1
+                stats['wait_ms_total'] += wait_ms
+                stats['wait_ms_max'] = max(stats['wait_ms_max'], wait_ms)
+                stats['service_ms_total'] += service_ms
+                stats['service_ms_max'] = max(stats['service_ms_max'], service_ms)
+                self._cond.notify_all()
             
-        except queue.Empty:
-            continue
-        except Exception as e:
-            logger.error(f"작업 큐 처리 중 오류: {e}")
+            logger.info(f"작업 {task_id}: 처리 완료 (처리 {service_ms:.0f}ms)")
+    
+    def metrics(self) -> dict:
+        """종류별 대기/실행 수와 평균/최대 대기·처리 시간"""
+        with self._cond:
+            result = {}
+            for task_type, stats in self.stats.items():
+                completed = stats['completed']
+                result[task_type] = {
+                    'queued': len(self._queues[task_type]),
+                    'running': self._running[task_type],
+                    'limit': self.limits[task_type],
+                    'completed': completed,
+                    'wait_ms_avg': round(stats['wait_ms_total'] / completed, 1) if completed else 0.0,
+                    'wait_ms_max': round(stats['wait_ms_max'], 1),
+                    'service_ms_avg': round(stats['service_ms_total'] / completed, 1) if completed else 0.0,
+                    'service_ms_max': round(stats['service_ms_max'], 1)
+                }
+            return result
+
+def task_state(task_id: str) -> dict:
+    """작업 상태 조회 (queued/running/completed, 모르는 작업이면 unknown)"""
+    # 완료 시 결과 저장 후 활성 목록에서 빼므로 활성 목록을 먼저 확인
+    state = task_scheduler.active_state(task_id)
+    if state:
+        return {'task_id': task_id, **state}
+    result = task_results.get(task_id)
+    if result is not None:
+        return {'task_id': task_id, 'status': 'completed', 'result': result}
+    return {'task_id': task_id, 'status': 'unknown'}
+
+# 상태 전이 이벤트
+task_events = TaskEventBus()
+
+# /metrics 지표 (작업 완료 시 집계)
+server_metrics = ServerMetrics()
+
+# 백그라운드 작업 처리 워커 시작
+task_scheduler = TaskScheduler(TASK_TYPE_LIMITS, {
+    'run-script': script_runner.run_script,
+    'scrape-menu': run_scrape_task
+}, task_events)
+task_scheduler.start()
 
-# 백그라운드 작업 처리 스레드 시작
-task_thread = threading.Thread(target=process_task_queue, daemon=True)
-task_thread.start()
+# 메뉴 주기 갱신 (MENU_REFRESH_ENABLED=1이면 서버 실행 시 시작)
+refresh_scheduler = create_refresh_scheduler()
+
+def load_refresh_candidates() -> list:
+    """갱신 대상 매장과 마지막 확인/변경 이후 경과 시간 조회 (공유 연결 풀)"""
+    with stats_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(FETCH_STATE_EXISTS_SQL)
+        has_fetch_state = cursor.fetchone()[0]
+        cursor.execute(REFRESH_CANDIDATES_SQL if has_fetch_state else REFRESH_CANDIDATES_WITHOUT_FETCH_STATE_SQL)
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.close()
+    return rows
+
+def submit_refresh(row: dict) -> str:
+    """갱신 스크래핑을 일괄(bulk) 우선순위로 큐에 추가 (같은 가게의 진행 중/최근 작업이 있으면 합침)"""
+    store_id, naver_store_id = row['store_id'], row['naver_store_id']
+    task_id = new_task_id('menu_refresh', store_id)
+    claimed_id, coalesced = scrape_coalescer.claim(store_id, naver_store_id, task_id)
+    if coalesced == 'new':
+        try:
+            task_scheduler.submit('scrape-menu', task_id, {
+                'store_id': store_id,
+                'naver_store_id': naver_store_id
+            }, TASK_PRIORITIES['bulk'])
+        except Exception:
+            scrape_coalescer.forget(store_id, naver_store_id, task_id)
+            raise
+    server_metrics.observe_refresh_submit(coalesced)
+    return coalesced
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -219,9 +512,29 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'service': 'python-processor'
+        'service': 'python-processor',
+        'worker_pool': worker_pool.metrics() if worker_pool else None,
+        'task_queue': task_scheduler.metrics(),
+        'task_results': task_results.metrics(),
+        'menu_stats_cache': menu_stats_cache.metrics(),
+        'scrape_coalescing': scrape_coalescer.metrics(),
+        'menu_refresh': refresh_scheduler.metrics() if refresh_scheduler else None
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 텍스트 형식 지표"""
+    gauges = task_gauges(task_scheduler.metrics(), task_results.metrics())
+    gauges.append(('scrape_inflight', 'Menu scrapes in flight after coalescing', (),
+                   {(): scrape_coalescer.metrics()['inflight']}))
+    if worker_pool:
+        pool = worker_pool.metrics()
+        gauges.append(('worker_pool_workers', 'Worker processes by state', ('state',),
+                       {('idle',): pool['idle'], ('busy',): pool['workers'] - pool['idle']}))
+    if refresh_scheduler:
+        gauges.extend(refresh_gauges(refresh_scheduler.metrics()))
+    return Response(server_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
 @app.route('/run-script', methods=['POST'])
 def run_script():
     """스크립트 실행 API"""
@@ -237,14 +550,16 @@ def run_script():
             if field not in data:
                 return jsonify({'error': f'필수 필드가 없습니다: {field}'}), 400
         
+        # 가입 직후 요청은 기본적으로 일괄 작업보다 먼저 처리
+        priority = parse_priority(data, 'interactive')
+        if priority is None:
+            return jsonify({'error': f"잘못된 우선순위입니다: {data.get('priority')}"}), 400
+        
         # 작업 ID 생성
-        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{data['store_id']}"
+        task_id = new_task_id('task', data['store_id'])
         
         # 작업을 큐에 추가
-        task_queue.put({
-            'task_id': task_id,
-            'args': data
-        })
+        task_scheduler.submit('run-script', task_id, data, priority)
         
         logger.info(f"작업 {task_id}: 큐에 추가됨")
         
@@ -252,7 +567,8 @@ def run_script():
             'success': True,
             'task_id': task_id,
             'message': '작업이 큐에 추가되었습니다.',
-            'status': 'queued'
+            'status': 'queued',
+            'priority': priority
         })
         
     except Exception as e:
@@ -261,46 +577,89 @@ def run_script():
 
 @app.route('/task-status/<task_id>', methods=['GET'])
 def get_task_status(task_id):
-    """작업 상태 조회 API"""
+    """작업 상태 조회 API (?wait=초 지정 시 완료될 때까지 최대 그 시간 동안 대기)"""
     try:
-        if task_id in task_results:
-            result = task_results[task_id]
-            return jsonify({
-                'task_id': task_id,
-                'status': 'completed',
-                'result': result
-            })
-        else:
-            # 큐에서 작업 확인
-            queue_size = task_queue.qsize()
-            return jsonify({
-                'task_id': task_id,
-                'status': 'processing',
-                'queue_size': queue_size,
-                'message': '작업이 처리 중입니다.'
-            })
-            
+        try:
+            wait = min(max(float(request.args.get('wait', 0)), 0), 60)
+        except ValueError:
+            return jsonify({'error': 'wait는 초 단위 숫자여야 합니다.'}), 400
+        
+        state = task_state(task_id)
+        if wait and state['status'] in ('queued', 'running'):
+            # 롱폴링: 상태 전이 이벤트마다 완료 여부 확인
+            task_events.wait_for(lambda: task_state(task_id)['status'] not in ('queued', 'running'), wait)
+            state = task_state(task_id)
+        
+        if state['status'] == 'unknown':
+            return jsonify({**state, 'message': '알 수 없는 작업입니다.'}), 404
+        if state['status'] != 'completed':
+            state['queue_size'] = task_scheduler.qsize()
+        return jsonify(state)
+        
     except Exception as e:
         logger.error(f"작업 상태 조회 중 오류: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/task-events', methods=['GET'])
+def stream_task_events():
+    """작업 상태 전이 SSE 스트림 (?task_id= 지정 시 해당 작업이 완료되면 종료, Last-Event-ID로 이어 받기)"""
+    task_id = request.args.get('task_id')
+    store_id = request.args.get('store_id')
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID') or task_events.last_seq())
+    except ValueError:
+        last_seq = task_events.last_seq()
+    
+    def matches(event: dict) -> bool:
+        if task_id and event['task_id'] != task_id:
+            return False
+        if store_id and str(event.get('store_id')) != store_id:
+            return False
+        return True
+    
+    @stream_with_context
+    def generate():
+        seq = last_seq
+        
+        # 특정 작업 구독 시 현재 상태를 먼저 보냄 (이미 끝난 작업이면 바로 종료)
+        if task_id:
+            state = task_state(task_id)
+            result = state.pop('result', None)
+            if result is not None:
+                state['success'] = result.get('success', False)
+            yield format_sse({'seq': seq, **state})
+            if state['status'] in ('completed', 'unknown'):
+                return
+        
+        while True:
+            events = task_events.events_since(seq, timeout=15)
+            if not events:
+                # 연결 유지용 주석
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                seq = event['seq']
+                if matches(event):
+                    yield format_sse(event)
+                    if task_id and event['status'] == 'completed':
+                        return
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/tasks', methods=['GET'])
 def list_tasks():
-    """완료된 작업 목록 조회"""
+    """완료된 작업 목록 조회 (최근 순, ?store_id=&limit=&offset= 페이지 단위)"""
     try:
-        completed_tasks = []
-        for task_id, result in task_results.items():
-            completed_tasks.append({
-                'task_id': task_id,
-                'success': result.get('success', False),
-                'completed_at': result.get('completed_at'),
-                'store_id': result.get('result', {}).get('store_id')
-            })
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError:
+            return jsonify({'error': 'limit/offset은 정수여야 합니다.'}), 400
         
-        return jsonify({
-            'tasks': completed_tasks,
-            'total': len(completed_tasks)
-        })
+        return jsonify(task_results.list(store_id=request.args.get('store_id'), limit=limit, offset=offset))
         
     except Exception as e:
         logger.error(f"작업 목록 조회 중 오류: {e}")
@@ -310,8 +669,7 @@ def list_tasks():
 def clear_tasks():
     """완료된 작업 결과 정리"""
     try:
-        count = len(task_results)
-        task_results.clear()
+        count = task_results.clear()
         
         return jsonify({
             'success': True,
@@ -337,44 +695,94 @@ def scrape_menu():
             if field not in data:
                 return jsonify({'error': f'필수 필드가 없습니다: {field}'}), 400
         
-        store_id = data['store_id']
-        naver_store_id = data['naver_store_id']
+        store_ids = parse_store_ids(data)
+        if store_ids is None:
+            return jsonify({'error': f"잘못된 가게 ID입니다: store_id={data['store_id']!r}, "
+                                     f"naver_store_id={data['naver_store_id']!r}"}), 400
+        store_id, naver_store_id = store_ids
         
-        # 작업 ID 생성
-        task_id = f"menu_scrape_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{store_id}"
+        # 일괄 갱신은 priority: 'bulk'로 요청
+        priority = parse_priority(data, 'normal')
+        if priority is None:
+            return jsonify({'error': f"잘못된 우선순위입니다: {data.get('priority')}"}), 400
         
-        # 비동기로 메뉴 스크래핑 실행
-        def run_scraping():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(scrape_naver_menu(store_id, naver_store_id))
-                task_results[task_id] = result
-                loop.close()
-            except Exception as e:
-                task_results[task_id] = {
-                    'success': False,
-                    'error': str(e)
-                }
+        # 작업 ID 생성
+        task_id = new_task_id('menu_scrape', store_id)
+        
+        # 같은 가게의 진행 중 작업이나 최근 성공 결과가 있으면 그 작업 ID 반환 (force: true면 최근 결과 무시)
+        force = bool(data.get('force'))
+        claimed_id, coalesced = scrape_coalescer.claim(store_id, naver_store_id, task_id, allow_fresh=not force)
+        if coalesced == 'fresh' and task_state(claimed_id)['status'] == 'unknown':
+            # 결과가 저장소에서 밀려났으면 새로 스크래핑
+            claimed_id, coalesced = scrape_coalescer.claim(store_id, naver_store_id, task_id, allow_fresh=False)
+        if coalesced != 'new':
+            status = task_state(claimed_id)['status']
+            logger.info(f"🍽️ [메뉴 스크래핑] 기존 작업 재사용 ({coalesced}) - {claimed_id}")
+            return jsonify({
+                'success': True,
+                'task_id': claimed_id,
+                'message': '진행 중이거나 최근 완료된 같은 가게의 스크래핑 작업을 반환합니다.',
+                'status': 'queued' if status == 'unknown' else status,
+                'coalesced': coalesced
+            })
         
-        # 백그라운드 스레드에서 실행
-        thread = threading.Thread(target=run_scraping)
-        thread.daemon = True
-        thread.start()
+        # 메뉴 스크래핑 작업을 큐에 추가
+        try:
+            task_scheduler.submit('scrape-menu', task_id, {
+                'store_id': store_id,
+                'naver_store_id': naver_store_id
+            }, priority)
+        except Exception:
+            scrape_coalescer.forget(store_id, naver_store_id, task_id)
+            raise
         
-        logger.info(f"🍽️ [메뉴 스크래핑] 작업 시작 - {task_id}")
+        logger.info(f"🍽️ [메뉴 스크래핑] 작업 추가 - {task_id}")
         
         return jsonify({
             'success': True,
             'task_id': task_id,
-            'message': '메뉴 스크래핑이 시작되었습니다.',
-            'status': 'processing'
+            'message': '메뉴 스크래핑이 큐에 추가되었습니다.',
+            'status': 'queued',
+            'priority': priority
         })
         
     except Exception as e:
         logger.error(f"메뉴 스크래핑 요청 처리 중 오류: {e}")
         return jsonify({'error': str(e)}), 500
 
+def guess_image_mimetype(path: str) -> str:
+    """파일 앞부분 시그니처로 이미지 MIME 타입 추정 (캐시 원본은 확장자가 없음)"""
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+@app.route('/menu-image/<key>', methods=['GET'])
+def get_menu_image(key):
+    """캐시된 메뉴 이미지 조회 API (?thumb=1이면 썸네일)"""
+    if not IMAGE_KEY_PATTERN.match(key):
+        return jsonify({'error': '잘못된 이미지 키입니다.'}), 400
+    
+    if request.args.get('thumb'):
+        path = os.path.join(IMAGE_CACHE_DIR, 'thumbs', key[:2], f"{key}.jpg")
+    else:
+        path = os.path.join(IMAGE_CACHE_DIR, 'objects', key[:2], key)
+    
+    if not os.path.exists(path):
+        return jsonify({'error': '이미지를 찾을 수 없습니다.'}), 404
+    
+    # 내용 해시가 키이므로 같은 키의 내용은 바뀌지 않음
+    response = send_file(path, mimetype=guess_image_mimetype(path), conditional=True, etag=key)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/menu-stats', methods=['GET'])
 def get_menu_stats():
     """메뉴 통계 조회 API"""
@@ -385,52 +793,54 @@ def get_menu_stats():
         if not store_id and not naver_store_id:
             return jsonify({'error': 'store_id 또는 naver_store_id가 필요합니다.'}), 400
         
-        # 데이터베이스에서 메뉴 통계 조회
-        import psycopg2
-        
-        conn = psycopg2.connect(
-            host='postgres',
-            port='5432',
-            database='burnana_dev',
-            user='dev_user',
-            password='dev_password'
-        )
-        
-        cursor = conn.cursor()
-        
-        if store_id and naver_store_id:
-            cursor.execute("""
-                SELECT * FROM naver_menu_stats 
-                WHERE store_id = %s AND naver_store_id = %s
-            """, (store_id, naver_store_id))
-        elif store_id:
-            cursor.execute("""
-                SELECT * FROM naver_menu_stats 
-                WHERE store_id = %s
-            """, (store_id,))
+        key = (store_id, naver_store_id)
+        cached = menu_stats_cache.get(key)
+        if cached:
+            result, etag = cached
         else:
-            cursor.execute("""
-                SELECT * FROM naver_menu_stats 
-                WHERE naver_store_id = %s
-            """, (naver_store_id,))
-        
-        stats = cursor.fetchall()
-        
-        # 컬럼명 가져오기
-        columns = [desc[0] for desc in cursor.description]
-        
-        # 결과를 딕셔너리로 변환
-        result = []
-        for row in stats:
-            result.append(dict(zip(columns, row)))
-        
-        cursor.close()
-        conn.close()
+            # 데이터베이스에서 메뉴 통계 조회 (공유 연결 풀)
+            with stats_db_connection() as conn:
+                cursor = conn.cursor()
+                
+                if store_id and naver_store_id:
+                    cursor.execute("""
+                        SELECT * FROM naver_menu_stats 
+                        WHERE store_id = %s AND naver_store_id = %s
+                    """, (store_id, naver_store_id))
+                elif store_id:
+                    cursor.execute("""
+                        SELECT * FROM naver_menu_stats 
+                        WHERE store_id = %s
+                    """, (store_id,))
+                else:
+                    cursor.execute("""
+                        SELECT * FROM naver_menu_stats 
+                        WHERE naver_store_id = %s
+                    """, (naver_store_id,))
+                
+                stats = cursor.fetchall()
+                
+                # 컬럼명 가져오기
+                columns = [desc[0] for desc in cursor.description]
+                
+                cursor.close()
+            
+            # 결과를 딕셔너리로 변환
+            result = []
+            for row in stats:
+                result.append(dict(zip(columns, row)))
+            
+            etag = stats_etag(result)
+            menu_stats_cache.put(key, result, etag)
         
-        return jsonify({
+        # 통계가 바뀌지 않았으면 304
+        response = jsonify({
             'success': True,
             'stats': result
         })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"메뉴 통계 조회 중 오류: {e}")
@@ -441,9 +851,16 @@ if __name__ == '__main__':
     logger.info(f"스크립트 경로: {script_runner.script_path}")
     logger.info(f"출력 디렉토리: {script_runner.output_dir}")
     
+    # 첫 요청 전에 작업 프로세스를 미리 띄워 임포트를 끝내 둠
+    if worker_pool:
+        worker_pool.start()
+    
+    if refresh_scheduler:
+        refresh_scheduler.start(load_refresh_candidates, submit_refresh)
+    
     app.run(
         host='0.0.0.0',
-        port=8000,
+        port=int(os.environ.get('PORT', '8000')),
         debug=False,
         threaded=True
     )
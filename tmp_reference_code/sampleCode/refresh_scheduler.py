@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python_server/async_server의 메뉴 주기 갱신 스케줄러
+
+naver_menu_stats에 있는 모든 매장을 마지막 확인 이후 경과 시간과 메뉴 변경 빈도로 정렬해
+갱신 창(window)마다 필요한 매장만 골라 창 전체에 고르게 나눠 큐에 넣는다.
+한 창에 넣는 수는 전체 분당 한도(rate budget)를 넘지 않으므로 야간 일괄 갱신처럼 네이버에 몰리지 않는다.
+
+매장별 갱신 주기는 HTTP 휴리스틱 신선도와 같은 방식으로 "메뉴가 마지막으로 바뀐 뒤 지난 시간 × 계수"를
+[최소, 최대] 범위로 자른 값이다. 자주 바뀌는 매장은 최소 주기 가까이, 오래 그대로인 매장은 최대 주기까지 늘어난다.
+"""
+
+import time
+import math
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# 갱신 대상 매장과 경과 시간(초) 조회
+# 조건부 요청으로 변경 없음(304/같은 해시)이면 naver_menu_stats는 그대로이므로 fetch_state의 checked_at도 확인 시각으로 본다
+# 변경 빈도는 메뉴 영역 해시가 바뀐 시각(changed_at, 마크업만 바뀌어도 갱신)이 아니라 메뉴 추가/변경/삭제 시각(menus_changed_at) 기준
+REFRESH_CANDIDATES_SQL = """
+    SELECT s.store_id, s.naver_store_id, s.scraped_success,
+           EXTRACT(EPOCH FROM NOW() - GREATEST(s.last_scraped_at, f.checked_at)) AS checked_age_sec,
+           EXTRACT(EPOCH FROM NOW() - f.menus_changed_at) AS unchanged_sec
+    FROM naver_menu_stats s
+    LEFT JOIN naver_menu_fetch_state f ON f.naver_store_id = s.naver_store_id
+"""
+
+# 조건부 요청을 한 번도 쓰지 않아 naver_menu_fetch_state가 없는 DB용 (변경 시각 없이 기본 주기 사용)
+REFRESH_CANDIDATES_WITHOUT_FETCH_STATE_SQL = """
+    SELECT store_id, naver_store_id, scraped_success,
+           EXTRACT(EPOCH FROM NOW() - last_scraped_at) AS checked_age_sec,
+           NULL AS unchanged_sec
+    FROM naver_menu_stats
+"""
+
+FETCH_STATE_EXISTS_SQL = "SELECT to_regclass('naver_menu_fetch_state') IS NOT NULL"
+
+class RefreshScheduler:
+    """경과 시간/변경 빈도 기반 메뉴 갱신 계획과 분산 실행"""
+
+    def __init__(self, window_seconds: float = 3600, rate_per_minute: float = 30,
+                 min_interval: float = 6 * 3600, max_interval: float = 7 * 86400,
+                 default_interval: float = 86400, change_factor: float = 0.1):
+        self.window_seconds = window_seconds
+        self.rate_per_minute = rate_per_minute
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.change_factor = change_factor
+        self._dispatched = {}  # (store_id, naver_store_id) → 마지막 큐 추가 시각 (실패가 DB에 남지 않아도 최소 주기 보장)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.counters = {'windows': 0, 'dispatched': 0, 'coalesced': 0, 'errors': 0}
+        self.last_plan = {'candidates': 0, 'due': 0, 'planned': 0, 'deferred': 0, 'planned_at': None}
+
+    @property
+    def budget(self) -> int:
+        """한 창에 큐에 넣을 수 있는 최대 매장 수"""
+        return int(self.rate_per_minute * self.window_seconds / 60)
+
+    def interval_for(self, row: Dict[str, Any]) -> float:
+        """매장의 갱신 주기(초)"""
+        if row.get('scraped_success') is False:
+            return self.min_interval
+        unchanged = row.get('unchanged_sec')
+        if unchanged is None:
+            return self.default_interval
+        return min(self.max_interval, max(self.min_interval, float(unchanged) * self.change_factor))
+
+    def plan(self, rows: List[Dict[str, Any]], now: Optional[float] = None) -> List[tuple]:
+        """이번 창에 갱신할 매장 목록 [(창 시작 기준 지연 초, row)] (오래된 정도 순, 창 안에 균등 배치)"""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            for row in rows:
+                last_dispatch = self._dispatched.get(self._key(row))
+                if last_dispatch is not None and now - last_dispatch < self.min_interval:
+                    continue
+                interval = self.interval_for(row)
+                age = row.get('checked_age_sec')
+                # 갱신 주기 대비 경과 비율 (한 번도 확인 안 된 매장이 가장 먼저)
+                staleness = math.inf if age is None else float(age) / interval
+                if staleness >= 1:
+                    due.append((staleness, row))
+
+        due.sort(key=lambda item: item[0], reverse=True)
+        selected = [row for _, row in due[:self.budget]]
+        spacing = self.window_seconds / len(selected) if selected else 0
+        self.last_plan = {
+            'candidates': len(rows),
+            'due': len(due),
+            'planned': len(selected),
+            'deferred': len(due) - len(selected),
+            'planned_at': time.time()
+        }
+        return [(index * spacing, row) for index, row in enumerate(selected)]
+
+    @staticmethod
+    def _key(row: Dict[str, Any]) -> tuple:
+        """ScrapeCoalescer와 같은 매장 키"""
+        return str(row['store_id']), str(row['naver_store_id'])
+
+    def _record(self, row: Dict[str, Any], coalesced: str, now: float):
+        """큐 추가 결과 기록"""
+        with self._lock:
+            self._dispatched[self._key(row)] = now
+            self.counters['dispatched' if coalesced == 'new' else 'coalesced'] += 1
+
+    def _forget_stale(self, now: float):
+        """최소 주기가 지난 큐 추가 기록 정리"""
+        with self._lock:
+            stale = [key for key, at in self._dispatched.items() if now - at >= self.min_interval]
+            for key in stale:
+                del self._dispatched[key]
+
+    def start(self, load_candidates: Callable[[], List[Dict[str, Any]]],
+              submit: Callable[[Dict[str, Any]], str]):
+        """스레드에서 실행 (python_server용, submit은 'new'/'joined'/'fresh' 반환)"""
+        self._thread = threading.Thread(target=self._run, args=(load_candidates, submit),
+                                        name='menu-refresh', daemon=True)
+        self._thread.start()
+        logger.info(f"🔄 메뉴 갱신 스케줄러 시작 (창 {self.window_seconds:.0f}초, 분당 {self.rate_per_minute}개)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, load_candidates, submit):
+        while not self._stop.is_set():
+            window_end = time.monotonic() + self.window_seconds
+            try:
+                schedule = self.plan(load_candidates())
+                self._log_plan()
+            except Exception as e:
+                self.counters['errors'] += 1
+                logger.error(f"🔄 메뉴 갱신 계획 오류: {e}")
+                schedule = []
+
+            window_start = time.monotonic()
+            for delay, row in schedule:
+                if self._stop.wait(max(0.0, window_start + delay - time.monotonic())):
+                    return
+                try:
+                    self._record(row, submit(row), time.monotonic())
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    logger.error(f"🔄 [매장 {row['store_id']}] 갱신 작업 추가 오류: {e}")
+
+            self.counters['windows'] += 1
+            self._forget_stale(time.monotonic())
+            self._stop.wait(max(0.0, window_end - time.monotonic()))
+
+    async def run(self, load_candidates, submit):
+        """이벤트 루프에서 실행 (async_server용, load_candidates/submit은 코루틴 함수)"""
+        logger.info(f"🔄 메뉴 갱신 스케줄러 시작 (창 {self.window_seconds:.0f}초, 분당 {self.rate_per_minute}개)")
+        while True:
+            window_end = time.monotonic() + self.window_seconds
+            try:
+                schedule = self.plan(await load_candidates())
+                self._log_plan()
+            except Exception as e:
+                self.counters['errors'] += 1
+                logger.error(f"🔄 메뉴 갱신 계획 오류: {e}")
+                schedule = []
+
+            window_start = time.monotonic()
+            for delay, row in schedule:
+                await asyncio.sleep(max(0.0, window_start + delay - time.monotonic()))
+                try:
+                    self._record(row, await submit(row), time.monotonic())
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    logger.error(f"🔄 [매장 {row['store_id']}] 갱신 작업 추가 오류: {e}")
+
+            self.counters['windows'] += 1
+            self._forget_stale(time.monotonic())
+            await asyncio.sleep(max(0.0, window_end - time.monotonic()))
+
+    def _log_plan(self):
+        plan = self.last_plan
+        logger.info(f"🔄 메뉴 갱신 계획 - 대상 {plan['candidates']}개 중 갱신 필요 {plan['due']}개, "
+                    f"이번 창 {plan['planned']}개 (한도 초과로 다음 창 {plan['deferred']}개)")
+
+    def metrics(self) -> dict:
+        """스케줄러 지표"""
+        with self._lock:
+            return {
+                **self.counters,
+                'last_plan': dict(self.last_plan),
+                'tracked_stores': len(self._dispatched),
+                'window_seconds': self.window_seconds,
+                'rate_per_minute': self.rate_per_minute,
+                'budget_per_window': self.budget,
+                'min_interval': self.min_interval,
+                'max_interval': self.max_interval
+            }
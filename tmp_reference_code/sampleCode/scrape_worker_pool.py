@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python_server용 상주 작업 프로세스 풀
+
+작업마다 새 파이썬 프로세스를 띄우면 pandas, bs4, aiohttp, psycopg2 임포트와
+세션/DB 연결 생성이 매번 반복된다. 워커 프로세스는 NaverMenuScraper를 한 번만
+임포트하고 전송 세션과 DB 연결 풀을 작업 간에 재사용하며, 파이프로 작업을 받는다.
+N개 작업을 처리했거나 RSS가 한도를 넘은 워커는 새 프로세스로 교체한다.
+
+워커는 이 파일을 직접 실행한 별도 프로세스(python scrape_worker_pool.py --worker_fd N)다.
+multiprocessing spawn은 부모의 __main__(python_server.py)을 워커에서 다시 실행해
+Flask 앱, 작업 스케줄러 스레드, 결과 저장소, 로그 파일 핸들러가 워커마다 생기므로 쓰지 않는다.
+"""
+
+import os
+import io
+import sys
+import time
+import asyncio
+import logging
+import resource
+import runpy
+import socket
+import argparse
+import threading
+import subprocess
+from multiprocessing.connection import Connection
+from contextlib import redirect_stdout, redirect_stderr
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class WorkerUnavailable(Exception):
+    """사용 가능한 워커가 없음 (호출 측은 서브프로세스 실행으로 대체)"""
+
+class WorkerCrashed(Exception):
+    """작업 중 워커 프로세스가 비정상 종료됨"""
+
+class WorkerTimeout(Exception):
+    """작업 시간 초과 (워커는 종료 후 교체됨)"""
+
+def _rss_bytes() -> int:
+    """현재 프로세스 RSS (리눅스는 /proc, 그 외는 최대 RSS로 대체)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+def _run_script_in_process(script_path: str, argv: list) -> Dict[str, Any]:
+    """스크립트를 현재 프로세스에서 __main__으로 실행 (이미 임포트된 모듈은 재사용)
+
+    서브프로세스 실행과 같은 출력이 나오도록 작업마다 루트 로거 핸들러를 비워 둔다.
+    워커가 임포트한 naver_menu_scraper가 루트 로거를 이미 설정해 두어 스크립트의
+    logging.basicConfig()가 무시되고 로그가 워커의 stdout으로 새는 것을 막는다.
+    작업이 끝나면 sys.argv/sys.path/루트 로거를 되돌리고, 스크립트 디렉토리에서 새로 임포트된
+    모듈은 지워 전역 상태가 다음 작업으로 넘어가지 않게 한다.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    script_dir = os.path.dirname(os.path.abspath(script_path))
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    saved_modules = set(sys.modules)
+    saved_loggers = set(logging.root.manager.loggerDict)
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    root.handlers = []
+    root.setLevel(logging.WARNING)
+    sys.argv = [script_path] + list(argv)
+    sys.path.insert(0, script_dir)
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                runpy.run_path(script_path, run_name='__main__')
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    returncode = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except Exception as e:
+                print(f"{type(e).__name__}: {e}", file=sys.stderr)
+                returncode = 1
+    finally:
+        _reset_logger(root)
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+        for name in set(logging.root.manager.loggerDict) - saved_loggers:
+            script_logger = logging.root.manager.loggerDict[name]
+            if isinstance(script_logger, logging.Logger):
+                _reset_logger(script_logger)
+        for name in set(sys.modules) - saved_modules:
+            module_file = getattr(sys.modules[name], '__file__', None) or ''
+            if os.path.abspath(module_file).startswith(script_dir + os.sep):
+                del sys.modules[name]
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+
+    return {'returncode': returncode, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+def _reset_logger(target: logging.Logger):
+    """스크립트가 붙인 로거 핸들러 정리"""
+    for handler in list(target.handlers):
+        target.removeHandler(handler)
+        handler.close()
+
+def _worker_main(conn, cwd: str):
+    """워커 프로세스 진입점 (무거운 모듈을 먼저 임포트해 두고 작업 대기)"""
+    os.chdir(cwd)
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+
+    from naver_menu_scraper import NaverMenuScraper, NaverTransport, DBConnectionPool, scrape_output
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    state = {'transport': None, 'pools': {}}
+
+    async def scrape(payload: Dict[str, Any]) -> Dict[str, Any]:
+        # 전송 세션과 DB 연결 풀은 작업 간에 공유 (세션은 이 루프에 묶여 있음)
+        if state['transport'] is None:
+            scraper_headers = NaverMenuScraper({}, parse_executor='inline').headers
+            state['transport'] = NaverTransport(scraper_headers)
+        db_config = payload['db_config']
+        pool_key = tuple(sorted(db_config.items()))
+        if pool_key not in state['pools']:
+            state['pools'][pool_key] = DBConnectionPool(db_config, minconn=0, maxconn=2)
+
+        # SCRAPER_STORAGE=dry-run이면 DB 없이 실행 (부하 테스트용), 그 외에는 공유 psycopg2 풀 사용
+        storage = 'dry-run' if os.environ.get('SCRAPER_STORAGE') == 'dry-run' else 'psycopg2'
+        async with NaverMenuScraper(db_config, db_pool=state['pools'][pool_key], transport=state['transport'],
+                                    parse_executor='inline', storage=storage) as scraper:
+            result = await scraper.scrape_store(payload['naver_store_id'], payload['store_id'])
+        return scrape_output(result)
+
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except (EOFError, KeyboardInterrupt):
+                break
+            if job is None:
+                break
+
+            kind, payload = job
+            try:
+                if kind == 'scrape-menu':
+                    result = loop.run_until_complete(scrape(payload))
+                elif kind == 'run-script':
+                    result = _run_script_in_process(payload['script_path'], payload['argv'])
+                else:
+                    raise ValueError(f"알 수 없는 작업 종류: {kind}")
+                conn.send(('ok', result, _rss_bytes()))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}", _rss_bytes()))
+    finally:
+        if state['transport']:
+            loop.run_until_complete(state['transport'].close())
+        for pool in state['pools'].values():
+            pool.closeall()
+        loop.close()
+
+class _Worker:
+    """워커 프로세스 핸들 (소켓 쌍 위의 Connection으로 작업 송수신)"""
+
+    def __init__(self, cwd: str):
+        parent_sock, child_sock = socket.socketpair()
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--worker_fd', str(child_sock.fileno()), '--cwd', cwd],
+                pass_fds=(child_sock.fileno(),),
+                cwd=cwd
+            )
+        except Exception:
+            parent_sock.close()
+            raise
+        finally:
+            child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+        self.jobs = 0
+        self.rss = 0
+        self.started_at = time.time()
+
+    def stop(self, timeout: float = 5.0):
+        """정상 종료 요청 후 응답이 없으면 강제 종료"""
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.conn.close()
+
+    def kill(self):
+        """즉시 종료 (시간 초과/비정상 상태)"""
+        self.process.terminate()
+        try:
+            self.process.wait(5.0)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.conn.close()
+
+class WorkerPool:
+    """미리 띄워 둔 작업 프로세스 풀 (N개 작업 또는 RSS 한도 초과 시 워커 교체)"""
+
+    def __init__(self, size: int = 2, max_jobs: int = 200, max_rss_mb: Optional[int] = 512,
+                 acquire_timeout: float = 5.0, cwd: Optional[str] = None):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.acquire_timeout = acquire_timeout
+        self.cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+        self._idle = []
+        self._workers = 0
+        self._closed = True
+        self._started = False
+        self._cond = threading.Condition()
+        self.counters = {
+            'jobs': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'crashes': 0,
+            'recycled': 0,
+            'unavailable': 0
+        }
+
+    def start(self):
+        """워커를 미리 띄움 (임포트는 워커 안에서 병렬로 진행)"""
+        with self._cond:
+            self._closed = False
+            self._started = True
+            while self._workers < self.size:
+                self._idle.append(_Worker(self.cwd))
+                self._workers += 1
+        logger.info(f"작업 프로세스 풀 시작: {self.size}개 워커")
+
+    def ensure_started(self):
+        """아직 시작하지 않았으면 시작 (종료된 풀은 다시 시작하지 않음)"""
+        if not self._started:
+            self.start()
+
+    def _acquire(self) -> _Worker:
+        """유휴 워커 대여 (acquire_timeout 안에 없으면 WorkerUnavailable)"""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while not self._idle:
+                # 교체 실패로 줄어든 자리는 다시 채움 (자리만 예약하고 프로세스 기동은 락 밖에서)
+                if not self._closed and self._workers < self.size:
+                    self._workers += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if self._closed or remaining <= 0:
+                    self.counters['unavailable'] += 1
+                    raise WorkerUnavailable('사용 가능한 작업 프로세스가 없습니다.')
+                self._cond.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+
+        try:
+            return self._spawn()
+        except Exception as e:
+            self.counters['unavailable'] += 1
+            raise WorkerUnavailable(f"작업 프로세스를 시작하지 못했습니다: {e}") from e
+
+    def _spawn(self) -> _Worker:
+        """예약한 자리에 새 워커 기동 (락 밖에서 호출, 실패하면 자리를 반환하고 예외 전달)"""
+        try:
+            return _Worker(self.cwd)
+        except Exception:
+            with self._cond:
+                self._workers -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _Worker, replace: bool = False):
+        """워커 반납 (교체 대상이면 종료하고 새 워커 생성)"""
+        if not replace:
+            recycle = worker.jobs >= self.max_jobs or (self.max_rss_bytes and worker.rss > self.max_rss_bytes)
+            if recycle:
+                logger.info(f"작업 프로세스 교체: pid {worker.process.pid}, {worker.jobs}개 작업, RSS {worker.rss // (1024 * 1024)}MB")
+                self.counters['recycled'] += 1
+                worker.stop()
+                replace = True
+
+        if replace:
+            # 새 프로세스 기동 중에도 다른 요청이 워커를 대여할 수 있도록 락 밖에서 생성
+            # 실패하면 자리만 줄이고 호출 측의 원래 오류(WorkerTimeout/WorkerCrashed)나 결과를 그대로 전달
+            try:
+                worker = None if self._closed else self._spawn()
+            except Exception as e:
+                logger.error(f"작업 프로세스 교체 실패 (다음 대여 시 다시 생성): {e}")
+                return
+
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._workers -= 1
+            else:
+                self._idle.append(worker)
+                self._cond.notify()
+
+        # 풀이 종료된 뒤 반납/생성된 워커는 정리
+        if closed and worker is not None:
+            worker.stop()
+
+    def run(self, kind: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """워커에서 작업 실행 후 결과 반환 (실패 시 RuntimeError, 시간 초과 시 WorkerTimeout)"""
+        worker = self._acquire()
+        try:
+            worker.conn.send((kind, payload))
+            if not worker.conn.poll(timeout):
+                self.counters['timeouts'] += 1
+                worker.kill()
+                self._release(worker, replace=True)
+                raise WorkerTimeout(f"작업 시간 초과 ({timeout}초)")
+            status, result, rss = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self.counters['crashes'] += 1
+            worker.kill()
+            self._release(worker, replace=True)
+            raise WorkerCrashed(f"작업 프로세스 비정상 종료 (pid {worker.process.pid}, 코드 {worker.process.returncode}): {e}")
+
+        worker.jobs += 1
+        worker.rss = rss
+        self.counters['jobs'] += 1
+        self._release(worker)
+
+        if status != 'ok':
+            self.counters['failed'] += 1
+            raise RuntimeError(result)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """풀 사용량 지표"""
+        with self._cond:
+            return {
+                **self.counters,
+                'size': self.size,
+                'workers': self._workers,
+                'idle': len(self._idle)
+            }
+
+    def shutdown(self):
+        """모든 워커 종료 (사용 중인 워커는 반납 시 종료)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._workers -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+def main():
+    """워커 프로세스 실행 (WorkerPool이 소켓 fd를 넘겨 실행)"""
+    parser = argparse.ArgumentParser(description='python_server 작업 프로세스')
+    parser.add_argument('--worker_fd', type=int, required=True, help='부모와 연결된 소켓 fd')
+    parser.add_argument('--cwd', default=os.path.dirname(os.path.abspath(__file__)), help='작업 디렉토리')
+    args = parser.parse_args()
+    _worker_main(Connection(args.worker_fd), args.cwd)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python_server(Flask)와 async_server(aiohttp)가 함께 쓰는 설정과 도우미
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+from task_store import TaskStore
+from refresh_scheduler import RefreshScheduler
+
+logger = logging.getLogger(__name__)
+
+# 메뉴 스크래핑/통계 DB 설정 (환경 변수 우선)
+SCRAPE_DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'postgres'),
+    'port': os.environ.get('DB_PORT', '5432'),
+    'database': os.environ.get('DB_NAME', 'burnana_dev'),
+    'user': os.environ.get('DB_USER', 'dev_user'),
+    'password': os.environ.get('DB_PASSWORD', 'dev_password')
+}
+
+# 메뉴 통계 캐시 유지 시간(초)
+MENU_STATS_CACHE_TTL = float(os.environ.get('MENU_STATS_CACHE_TTL', '60'))
+
+# 작업 종류별 동시 실행 수
+TASK_TYPE_LIMITS = {
+    'run-script': int(os.environ.get('RUN_SCRIPT_CONCURRENCY', '2')),
+    'scrape-menu': int(os.environ.get('SCRAPE_MENU_CONCURRENCY', '2'))
+}
+
+# 작업 우선순위 (작을수록 먼저): 가입 직후 처리 > 일반 > 일괄 갱신
+TASK_PRIORITIES = {'interactive': 0, 'normal': 5, 'bulk': 10}
+
+# 작업 상태 전이: queued → running → completed (결과의 success로 성공/실패 구분)
+TASK_TRANSITIONS = {
+    None: ('queued',),
+    'queued': ('running',),
+    'running': ('completed',)
+}
+
+# 같은 네이버 가게의 최근 성공 결과를 재사용하는 시간(초, 0이면 재사용 안 함)
+SCRAPE_FRESHNESS_SEC = float(os.environ.get('SCRAPE_FRESHNESS_SEC', '300'))
+
+# 작업별 실행 시간 제한(초)
+RUN_SCRIPT_TIMEOUT = 60
+SCRAPE_MENU_TIMEOUT = 120
+
+class TaskRejected(Exception):
+    """상태 전이가 허용되지 않아 작업을 큐에 넣지 않음 (같은 작업 ID가 이미 대기/실행 중)"""
+
+def new_task_id(prefix: str, store_id) -> str:
+    """작업 ID (같은 매장에 같은 초에 들어온 요청도 겹치지 않도록 무작위 접미사 추가)"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{store_id}_{uuid.uuid4().hex[:8]}"
+
+def parse_priority(data: dict, default: str):
+    """요청의 priority (이름 또는 정수) 해석 (잘못된 값이면 None)"""
+    value = data.get('priority', default)
+    if isinstance(value, str):
+        return TASK_PRIORITIES.get(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+def parse_store_ids(data: dict):
+    """요청의 (store_id, naver_store_id) 해석 (store_id는 정수, naver_store_id는 빈 값이 아닌 문자열, 잘못되면 None)"""
+    store_id, naver_store_id = data.get('store_id'), data.get('naver_store_id')
+    if any(not isinstance(value, (int, str)) or isinstance(value, bool) for value in (store_id, naver_store_id)):
+        return None
+    try:
+        store_id = int(store_id)
+    except ValueError:
+        return None
+    naver_store_id = str(naver_store_id).strip()
+    if not naver_store_id:
+        return None
+    return store_id, naver_store_id
+
+def create_task_store() -> TaskStore:
+    """환경 변수 설정으로 작업 결과 저장소 생성 (TASK_RESULT_DB 지정 시 SQLite에 영속화)"""
+    return TaskStore(
+        max_entries=int(os.environ.get('TASK_RESULT_MAX_ENTRIES', '5000')),
+        max_bytes=int(os.environ.get('TASK_RESULT_MAX_MB', '64')) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get('TASK_RESULT_TTL_SEC', '86400')),
+        sqlite_path=os.environ.get('TASK_RESULT_DB') or None,
+        output_max_chars=int(os.environ.get('TASK_OUTPUT_MAX_CHARS', '8192'))
+    )
+
+def create_refresh_scheduler() -> Optional[RefreshScheduler]:
+    """환경 변수 설정으로 메뉴 주기 갱신 스케줄러 생성 (MENU_REFRESH_ENABLED=1일 때만)"""
+    if os.environ.get('MENU_REFRESH_ENABLED', '0') != '1':
+        return None
+    return RefreshScheduler(
+        window_seconds=float(os.environ.get('MENU_REFRESH_WINDOW_SEC', '3600')),
+        rate_per_minute=float(os.environ.get('MENU_REFRESH_RATE_PER_MIN', '30')),
+        min_interval=float(os.environ.get('MENU_REFRESH_MIN_INTERVAL_SEC', str(6 * 3600))),
+        max_interval=float(os.environ.get('MENU_REFRESH_MAX_INTERVAL_SEC', str(7 * 86400))),
+        default_interval=float(os.environ.get('MENU_REFRESH_DEFAULT_INTERVAL_SEC', '86400')),
+        change_factor=float(os.environ.get('MENU_REFRESH_CHANGE_FACTOR', '0.1'))
+    )
+
+def build_script_result(task_id: str, returncode: int, stdout: str, stderr: str) -> Dict[str, Any]:
+    """스크립트 실행 결과 (성공 시 stdout JSON 파싱, 실패 시 종료 코드 보고)"""
+    if returncode == 0:
+        # 성공 시 JSON 결과 파싱
+        try:
+            output_data = json.loads(stdout)
+            logger.info(f"작업 {task_id}: 스크립트 실행 성공")
+        except json.JSONDecodeError:
+            logger.warning(f"작업 {task_id}: JSON 파싱 실패, stdout 반환")
+            output_data = {'raw_output': stdout}
+        return {
+            'success': True,
+            'task_id': task_id,
+            'result': output_data,
+            'returncode': returncode,
+            'stdout': stdout,
+            'stderr': stderr,
+            'completed_at': datetime.now().isoformat()
+        }
+
+    logger.error(f"작업 {task_id}: 스크립트 실행 실패 (코드: {returncode})")
+    return {
+        'success': False,
+        'task_id': task_id,
+        'error': f"스크립트 실행 실패 (코드: {returncode})",
+        'returncode': returncode,
+        'stdout': stdout,
+        'stderr': stderr,
+        'completed_at': datetime.now().isoformat()
+    }
+
+def stats_etag(stats: list) -> str:
+    """메뉴 통계 응답 ETag (내용 해시)"""
+    return hashlib.sha256(json.dumps(stats, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+
+def format_sse(event: dict) -> str:
+    """Server-Sent Events 메시지 형식"""
+    return f"id: {event['seq']}\nevent: {event['status']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+class MenuStatsCache:
+    """(store_id, naver_store_id) 키의 메뉴 통계 TTL 캐시 (스크래핑 완료 시 해당 매장 항목 무효화)"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @staticmethod
+    def key(store_id, naver_store_id) -> tuple:
+        """캐시 키 (JSON/쿼리의 숫자/문자열 ID를 같은 매장으로 취급, 조회에 없는 ID는 None)"""
+        return (None if store_id is None else str(store_id),
+                None if naver_store_id is None else str(naver_store_id))
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        """유효한 항목 (stats, etag) 반환 (없거나 만료되면 None)"""
+        key = self.key(*key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.counters['hits'] += 1
+                return entry[1], entry[2]
+            self._entries.pop(key, None)
+            self.counters['misses'] += 1
+            return None
+
+    def put(self, key: tuple, stats: list, etag: str):
+        """항목 저장"""
+        key = self.key(*key)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, stats, etag)
+
+    def invalidate(self, store_id=None, naver_store_id=None):
+        """해당 매장이 포함된 항목 삭제 (store_id만/naver_store_id만으로 조회한 항목 포함)"""
+        store_id, naver_store_id = self.key(store_id, naver_store_id)
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if (store_id is not None and key[0] == store_id)
+                or (naver_store_id is not None and key[1] == naver_store_id)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.counters['invalidations'] += len(stale)
+
+    def metrics(self) -> dict:
+        """캐시 지표"""
+        with self._lock:
+            return {**self.counters, 'entries': len(self._entries), 'ttl_seconds': self.ttl_seconds}
+
+class ScrapeCoalescer:
+    """(store_id, naver_store_id) 단위 스크래핑 요청 합치기 (진행 중 작업 공유, 최근 성공 결과 재사용)
+
+    같은 네이버 가게에 연결된 POS 매장이 여럿이면 매장마다 naver_menus/naver_menu_stats 행을 따로 쓰므로 합치지 않는다.
+    """
+
+    def __init__(self, freshness_seconds: float):
+        self.freshness_seconds = freshness_seconds
+        self._inflight = {}  # (store_id, naver_store_id) → task_id
+        self._recent = {}  # (store_id, naver_store_id) → (완료 시각, task_id)
+        self._lock = threading.Lock()
+        self.counters = {'started': 0, 'joined': 0, 'fresh': 0}
+
+    @staticmethod
+    def key(store_id, naver_store_id) -> tuple:
+        """합치기 키 (JSON의 숫자/문자열 store_id를 같은 매장으로 취급)"""
+        return str(store_id), str(naver_store_id)
+
+    def claim(self, store_id, naver_store_id: str, task_id: str, allow_fresh: bool = True) -> tuple:
+        """(task_id, 'new'|'joined'|'fresh') 반환 ('new'면 호출 측이 작업을 큐에 추가)"""
+        key = self.key(store_id, naver_store_id)
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight:
+                self.counters['joined'] += 1
+                return inflight, 'joined'
+
+            recent = self._recent.get(key)
+            if recent and allow_fresh and time.monotonic() - recent[0] < self.freshness_seconds:
+                self.counters['fresh'] += 1
+                return recent[1], 'fresh'
+
+            self._inflight[key] = task_id
+            self.counters['started'] += 1
+            return task_id, 'new'
+
+    def finish(self, store_id, naver_store_id: str, task_id: str, result: Optional[Dict[str, Any]]):
+        """작업 완료 처리 (성공한 결과만 재사용 대상으로 기록)"""
+        key = self.key(store_id, naver_store_id)
+        output = (result or {}).get('result')
+        succeeded = bool(result and result.get('success')) and not (
+            isinstance(output, dict) and output.get('status') == 'failed'
+        )
+        with self._lock:
+            if self._inflight.get(key) == task_id:
+                del self._inflight[key]
+            if succeeded and self.freshness_seconds > 0:
+                self._recent[key] = (time.monotonic(), task_id)
+            else:
+                self._recent.pop(key, None)
+
+            # 재사용 기간이 지난 항목 정리
+            now = time.monotonic()
+            stale = [k for k, (finished, _) in self._recent.items() if now - finished >= self.freshness_seconds]
+            for k in stale:
+                del self._recent[k]
+
+    def forget(self, store_id, naver_store_id: str, task_id: str):
+        """큐 추가에 실패한 작업의 진행 중 표시 해제"""
+        key = self.key(store_id, naver_store_id)
+        with self._lock:
+            if self._inflight.get(key) == task_id:
+                del self._inflight[key]
+
+    def metrics(self) -> dict:
+        """합치기 지표"""
+        with self._lock:
+            return {
+                **self.counters,
+                'inflight': len(self._inflight),
+                'recent': len(self._recent),
+                'freshness_seconds': self.freshness_seconds
+            }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python_server/async_server의 /metrics (Prometheus 텍스트 형식)
+
+작업 완료 시 한 번씩 카운터와 히스토그램 버킷만 올리므로 운영 중 항상 켜 두어도 된다.
+큐 길이나 저장소 크기 같은 현재 값은 수집 시점에 서버가 게이지로 넘긴다.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Tuple, Any
+
+# 초 단위 히스토그램 버킷 (대기/처리 시간과 스크래핑 단계 공통)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: Any) -> str:
+    """라벨 값 이스케이프"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = '') -> str:
+    """{name="value",...} 형식 라벨"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    """Prometheus 숫자 표기"""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """라벨별 누적 카운터"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        """증가 (ServerMetrics 락 보유 상태에서 호출)"""
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+class Histogram:
+    """라벨별 누적 버킷 히스토그램"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # 라벨 값 → [버킷별 개수..., 합계, 개수]
+
+    def observe(self, value: float, *label_values):
+        """관측값 기록 (ServerMetrics 락 보유 상태에서 호출)"""
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _labels(self.label_names, label_values, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.label_names, label_values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            labels = _labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_number(round(series[-2], 6))}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+class ServerMetrics:
+    """작업 서버 지표 (작업 완료 결과에서 대기/처리 시간, 종료 코드, 네이버 응답, 스크래핑 단계 집계)"""
+
+    def __init__(self, prefix: str = 'python_server'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.queue_wait = Histogram(f"{prefix}_task_queue_wait_seconds",
+                                    'Time a task spent queued before running', ('task_type',))
+        self.execution = Histogram(f"{prefix}_task_execution_seconds",
+                                   'Task execution time', ('task_type',))
+        self.completed = Counter(f"{prefix}_tasks_completed_total",
+                                 'Completed tasks by outcome', ('task_type', 'outcome'))
+        self.timeouts = Counter(f"{prefix}_task_timeouts_total",
+                                'Tasks stopped by the execution time limit', ('task_type',))
+        self.exit_codes = Counter(f"{prefix}_script_exit_codes_total",
+                                  'Signup script exit codes', ('code',))
+        self.naver_responses = Counter(f"{prefix}_naver_http_responses_total",
+                                       'Naver menu page responses by HTTP status, including retried ones', ('status',))
+        self.scrape_results = Counter(f"{prefix}_scrape_results_total",
+                                      'Menu scrapes by result status', ('status',))
+        self.scrape_phases = Histogram(f"{prefix}_scrape_phase_seconds",
+                                       'Menu scrape phase duration', ('phase',))
+        self.parse_strategies = Counter(f"{prefix}_parse_strategy_total",
+                                        'Parse strategy that produced the menus', ('strategy',))
+        self.refresh_submitted = Counter(f"{prefix}_menu_refresh_submitted_total",
+                                         'Refresh scrapes submitted by result', ('result',))
+
+    def observe_task(self, task_type: str, wait_ms: float, service_ms: float, result: Dict[str, Any]):
+        """완료된 작업 결과 기록"""
+        with self._lock:
+            self.queue_wait.observe(wait_ms / 1000, task_type)
+            self.execution.observe(service_ms / 1000, task_type)
+            self.completed.inc(task_type, 'success' if result.get('success') else 'failure')
+            if result.get('timed_out'):
+                self.timeouts.inc(task_type)
+            if result.get('returncode') is not None:
+                self.exit_codes.inc(str(result['returncode']))
+
+            output = result.get('result')
+            if task_type == 'scrape-menu' and isinstance(output, dict) and 'status' in output:
+                self.scrape_results.inc(output['status'])
+                for status in output.get('http_statuses') or ():
+                    self.naver_responses.inc(str(status))
+                for phase, ms in (output.get('phase_ms') or {}).items():
+                    self.scrape_phases.observe(ms / 1000, phase)
+                if output.get('parse_strategy'):
+                    self.parse_strategies.inc(output['parse_strategy'])
+
+    def observe_refresh_submit(self, coalesced: str):
+        """갱신 스케줄러의 작업 추가 결과 기록 ('new'가 아니면 기존 작업과 합쳐짐)"""
+        with self._lock:
+            self.refresh_submitted.inc('new' if coalesced == 'new' else 'coalesced')
+
+    def render(self, gauges: Iterable[Tuple[str, str, Tuple[str, ...], Dict[tuple, float]]] = ()) -> str:
+        """텍스트 형식 출력 (gauges: (이름, 설명, 라벨 이름, {라벨 값: 현재 값}))"""
+        lines = []
+        for name, help_text, label_names, values in gauges:
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} gauge")
+            for label_values, value in sorted(values.items()):
+                lines.append(f"{full_name}{_labels(label_names, label_values)} {_number(value)}")
+
+        with self._lock:
+            for metric in (self.queue_wait, self.execution, self.completed, self.timeouts, self.exit_codes,
+                           self.naver_responses, self.scrape_results, self.scrape_phases, self.parse_strategies,
+                           self.refresh_submitted):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+def task_gauges(queue_metrics: Dict[str, Dict[str, Any]], store_metrics: Dict[str, Any]) -> list:
+    """큐/결과 저장소 지표 딕셔너리를 게이지 목록으로 변환"""
+    return [
+        ('task_queue_depth', 'Tasks waiting in the queue', ('task_type',),
+         {(task_type,): stats['queued'] for task_type, stats in queue_metrics.items()}),
+        ('task_running', 'Tasks currently running', ('task_type',),
+         {(task_type,): stats['running'] for task_type, stats in queue_metrics.items()}),
+        ('task_results_entries', 'Task results held in memory', (), {(): store_metrics['entries']}),
+        ('task_results_bytes', 'Approximate size of task results held in memory', (), {(): store_metrics['bytes']})
+    ]
+
+def refresh_gauges(refresh_metrics: Dict[str, Any]) -> list:
+    """메뉴 주기 갱신 스케줄러 지표를 게이지 목록으로 변환 (큐 추가 수는 ServerMetrics.refresh_submitted 카운터)"""
+    plan = refresh_metrics['last_plan']
+    return [
+        ('menu_refresh_stores', 'Stores in the last refresh plan by state', ('state',),
+         {('candidate',): plan['candidates'], ('due',): plan['due'],
+          ('planned',): plan['planned'], ('deferred',): plan['deferred']})
+    ]
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python_server 작업 결과 저장소
+
+메모리에는 최근 결과만 개수/크기 한도 안에서 보관하고 TTL이 지나면 제거한다.
+SQLite 파일을 지정하면 결과를 함께 기록해 재시작 후에도 조회할 수 있다.
+task_id와 store_id로 색인하므로 조회는 O(1), 목록은 페이지 단위로 반환한다.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class TaskStore:
+    """크기 제한과 TTL이 있는 작업 결과 저장소 (선택적으로 SQLite에 영속화)"""
+
+    # stdout/stderr는 끝부분만 보관 (오류 메시지는 대개 마지막에 있음)
+    OUTPUT_FIELDS = ('stdout', 'stderr')
+
+    # SQLite의 만료 결과는 이 횟수의 저장마다 한 번 정리
+    PURGE_EVERY = 500
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 86400, sqlite_path: Optional[str] = None,
+                 output_max_chars: int = 8192):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.output_max_chars = output_max_chars
+        self._entries = OrderedDict()  # task_id → 항목 (완료 순)
+        self._by_store = {}  # store_id → {task_id: None} (완료 순)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'expired': 0, 'evicted': 0, 'truncated': 0}
+        self._puts = 0
+
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS task_results (
+                    task_id TEXT PRIMARY KEY,
+                    store_id TEXT,
+                    completed_at REAL NOT NULL,
+                    result TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_task_results_store ON task_results (store_id, completed_at);
+                CREATE INDEX IF NOT EXISTS idx_task_results_completed ON task_results (completed_at);
+            """)
+            self._db.commit()
+            self._purge_db()
+
+    def _truncate_output(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """긴 stdout/stderr를 끝부분만 남기고 자름"""
+        truncated = None
+        for name in self.OUTPUT_FIELDS:
+            value = result.get(name)
+            if isinstance(value, str) and len(value) > self.output_max_chars:
+                if truncated is None:
+                    truncated = dict(result)
+                truncated[name] = value[-self.output_max_chars:]
+                truncated[f"{name}_truncated"] = len(value) - self.output_max_chars
+        if truncated is not None:
+            self.counters['truncated'] += 1
+            return truncated
+        return result
+
+    def _remove(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """메모리에서 항목 제거 (락 보유 상태에서 호출)"""
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return None
+        self._bytes -= entry['size']
+        store_tasks = self._by_store.get(entry['store_id'])
+        if store_tasks is not None:
+            store_tasks.pop(task_id, None)
+            if not store_tasks:
+                del self._by_store[entry['store_id']]
+        return entry
+
+    def _expire(self, now: float):
+        """TTL이 지난 항목과 한도를 넘는 오래된 항목 제거 (락 보유 상태에서 호출)"""
+        while self._entries:
+            task_id, entry = next(iter(self._entries.items()))
+            if now - entry['completed_at'] > self.ttl_seconds:
+                self.counters['expired'] += 1
+            elif len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self.counters['evicted'] += 1
+            else:
+                break
+            self._remove(task_id)
+
+    def _purge_db(self):
+        """SQLite에서 TTL이 지난 결과 삭제 (락 보유 상태 또는 초기화 중 호출)"""
+        self._db.execute("DELETE FROM task_results WHERE completed_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.commit()
+
+    def put(self, task_id: str, result: Dict[str, Any], store_id: Any = None):
+        """작업 결과 저장"""
+        result = self._truncate_output(result)
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        store_key = str(store_id) if store_id is not None else None
+        now = time.time()
+
+        with self._lock:
+            self._remove(task_id)
+            self._entries[task_id] = {
+                'task_id': task_id,
+                'store_id': store_key,
+                'completed_at': now,
+                'size': len(payload),
+                'result': result
+            }
+            self._bytes += len(payload)
+            if store_key is not None:
+                self._by_store.setdefault(store_key, {})[task_id] = None
+            self._expire(now)
+
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO task_results (task_id, store_id, completed_at, result) VALUES (?, ?, ?, ?)",
+                    (task_id, store_key, now, payload)
+                )
+                self._db.commit()
+                self._puts += 1
+                if self._puts % self.PURGE_EVERY == 0:
+                    self._purge_db()
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """작업 결과 조회 (메모리에서 밀려난 결과는 SQLite에서 조회)"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(task_id)
+            if entry is not None:
+                return entry['result']
+            if self._db:
+                row = self._db.execute(
+                    "SELECT result FROM task_results WHERE task_id = ? AND completed_at >= ?",
+                    (task_id, now - self.ttl_seconds)
+                ).fetchone()
+                if row:
+                    return json.loads(row[0])
+        return None
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _summary(self, task_id: str, store_id: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+        """목록용 요약"""
+        output = result.get('result')
+        return {
+            'task_id': task_id,
+            'success': result.get('success', False),
+            'completed_at': result.get('completed_at'),
+            'store_id': output.get('store_id') if isinstance(output, dict) and output.get('store_id') is not None else store_id,
+            'task_type': result.get('task_type')
+        }
+
+    def list(self, store_id: Any = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """최근 완료 순 목록 한 페이지 (store_id 지정 시 해당 매장만)"""
+        store_key = str(store_id) if store_id is not None else None
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+            if self._db:
+                where, params = "completed_at >= ?", [now - self.ttl_seconds]
+                if store_key is not None:
+                    where += " AND store_id = ?"
+                    params.append(store_key)
+                total = self._db.execute(f"SELECT COUNT(*) FROM task_results WHERE {where}", params).fetchone()[0]
+                rows = self._db.execute(
+                    f"SELECT task_id, store_id, result FROM task_results WHERE {where} "
+                    f"ORDER BY completed_at DESC LIMIT ? OFFSET ?",
+                    params + [limit, offset]
+                ).fetchall()
+                tasks = [self._summary(task_id, sid, json.loads(result)) for task_id, sid, result in rows]
+            else:
+                task_ids = self._by_store.get(store_key, {}) if store_key is not None else self._entries
+                total = len(task_ids)
+                page = list(itertools.islice(reversed(task_ids), offset, offset + limit))
+                tasks = [
+                    self._summary(task_id, self._entries[task_id]['store_id'], self._entries[task_id]['result'])
+                    for task_id in page
+                ]
+
+        return {
+            'tasks': tasks,
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'next_offset': offset + len(tasks) if offset + len(tasks) < total else None
+        }
+
+    def clear(self) -> int:
+        """모든 결과 삭제 (삭제한 개수 반환)"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._by_store.clear()
+            self._bytes = 0
+            if self._db:
+                count = max(count, self._db.execute("SELECT COUNT(*) FROM task_results").fetchone()[0])
+                self._db.execute("DELETE FROM task_results")
+                self._db.commit()
+        return count
+
+    def metrics(self) -> Dict[str, Any]:
+        """저장소 사용량 지표"""
+        with self._lock:
+            return {
+                **self.counters,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'stores': len(self._by_store),
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': self._db is not None
+            }